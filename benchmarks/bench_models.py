@@ -0,0 +1,99 @@
+import pytest
+
+from benchmarks.conftest import (
+    BEATMAPS_JSON,
+    DISCUSSION_PAGE,
+    EVENTS_JSON,
+    POP_PAGE,
+    USERS_JSON,
+    serve,
+)
+from phillip import helper
+from phillip.application import Phillip
+from phillip.beatmapsets import BeatmapsetStore
+from phillip.discord import gen_embed
+from phillip.osu.classes.api import Beatmap as ApiBeatmap
+from phillip.osu.classes.web import Beatmap as WebBeatmap
+from phillip.osu.classes.web import GroupUser
+from tests.mocks.discord.mocks import get_api, map_json, popped_map_json
+
+
+def members(count: int, offset: int = 0):
+    users = []
+    for i in range(count):
+        js = dict(USERS_JSON[i % len(USERS_JSON)])
+        js["id"] = offset + i
+        users.append(GroupUser(js))
+    return users
+
+
+def test_group_user(benchmark):
+    assert len(benchmark(lambda: [GroupUser(js) for js in USERS_JSON])) == len(
+        USERS_JSON
+    )
+
+
+def test_api_beatmap(benchmark):
+    assert benchmark(lambda: [ApiBeatmap(js) for js in BEATMAPS_JSON])
+
+
+def test_web_beatmap(benchmark):
+    assert benchmark(lambda: [WebBeatmap(e["beatmapset"]) for e in EVENTS_JSON])
+
+
+def test_event_properties(benchmark, loop, app: Phillip):
+    app.web.get_raw = serve(POP_PAGE)
+    events = loop.run_until_complete(_events(app))
+
+    def read():
+        # What check_map_events and gen_embed read for every event.
+        for event in events:
+            event.time, event.id, event.user_id, event.beatmapset.id
+            event.creator, event.artist, event.title, event.map_cover
+            event.event_source_url, event.event_type
+            event.discussion and event.discussion.starting_post.message
+
+    benchmark(read)
+
+
+async def _events(app: Phillip):
+    return [e async for e in app.web.get_events()]
+
+
+@pytest.mark.parametrize("count", [10, 1000, 10000])
+def test_has_user(benchmark, count: int):
+    users = members(count)
+    # A user that is not there walks the whole list.
+    assert not benchmark(helper.has_user, {"id": -1}, users)
+
+
+@pytest.mark.parametrize("count", [10, 1000, 10000])
+def test_diff_users(benchmark, count: int):
+    before = helper.index_users(members(count))
+    # A tenth of the group replaced.
+    after = helper.index_users(members(count, offset=count // 10))
+    diff = benchmark(helper.diff_users, before, after)
+    assert len(diff.added) == len(diff.removed) == count // 10
+
+
+EMBEDS = {
+    "ranked": (DISCUSSION_PAGE, map_json),
+    "disqualified": (POP_PAGE, popped_map_json),
+}
+
+
+@pytest.mark.parametrize("name", EMBEDS)
+def test_gen_embed(benchmark, loop, app: Phillip, name: str):
+    page, beatmaps = EMBEDS[name]
+    app.web.get_raw = serve(page)
+    app.api.get_api = get_api
+    event = loop.run_until_complete(_events(app))[0]
+    event._beatmap = [ApiBeatmap(js) for js in beatmaps]
+
+    def embed():
+        # A new event of the set, nothing in the store can be reused.
+        app.beatmapsets = BeatmapsetStore()
+        return loop.run_until_complete(gen_embed(event, app))
+
+    embed = benchmark(embed)
+    assert embed["title"]
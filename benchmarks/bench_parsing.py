@@ -0,0 +1,37 @@
+import pytest
+
+from benchmarks.conftest import DISCUSSION_PAGE, POP_PAGE, WEB_PAGE, serve
+from phillip.application import Phillip
+
+# Keyed by name, so the saved baselines hold the name rather than the page.
+PAGES = {
+    "events": (WEB_PAGE, "json-events"),
+    "users": (WEB_PAGE, "json-users"),
+    "discussion": (DISCUSSION_PAGE, "json-beatmapset-discussion"),
+    "discussion-pop": (POP_PAGE, "json-beatmapset-discussion"),
+}
+
+
+@pytest.mark.parametrize("name", PAGES)
+def test_get_json(benchmark, loop, app: Phillip, name: str):
+    page, tag_id = PAGES[name]
+    app.web.get_raw = serve(page)
+    result = benchmark(lambda: loop.run_until_complete(app.web.get_json("", tag_id)))
+    assert result
+
+
+def test_get_events(benchmark, loop, app: Phillip):
+    app.web.get_raw = serve(WEB_PAGE)
+
+    async def materialize():
+        return [e async for e in app.web.get_events()]
+
+    assert benchmark(lambda: loop.run_until_complete(materialize()))
+
+
+def test_nomination_history(benchmark, loop, app: Phillip):
+    app.web.get_raw = serve(DISCUSSION_PAGE)
+    history = benchmark(
+        lambda: loop.run_until_complete(app.web.nomination_history(1, users={}))
+    )
+    assert history
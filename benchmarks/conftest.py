@@ -0,0 +1,64 @@
+"""pytest-benchmark suite for the hot paths: parsing, model construction and embed generation.
+
+Install the dev dependencies (``poetry install``), then from the repository root:
+
+* ``python -m pytest benchmarks`` -- run the suite.
+* ``python -m pytest benchmarks --benchmark-compare=0001 --benchmark-compare-fail=median:10%`` -- compare
+  against the stored baseline, failing if any benchmark got 10% slower.
+* ``python -m pytest benchmarks --benchmark-save=<name>`` -- store a new baseline in ``benchmarks/baselines``.
+
+The stored baseline was recorded on CPython 3.8, the oldest supported version. Baselines only compare on
+the Python version and machine that recorded them, save one before trying an optimization and
+compare against it afterwards.
+"""
+
+import asyncio
+import json
+
+import aiohttp
+import pytest
+
+from phillip.application import Phillip
+from phillip.helper import find_json_island
+
+with open("tests/mocks/web_mocks.html", "rb") as f:
+    WEB_PAGE = f.read()
+
+with open("tests/mocks/discord/mocks.html", "rb") as f:
+    DISCUSSION_PAGE = f.read()
+
+with open("tests/mocks/discord/pop_mock.html", "rb") as f:
+    POP_PAGE = f.read()
+
+EVENTS_JSON = json.loads(find_json_island(WEB_PAGE, "json-events"))
+USERS_JSON = json.loads(find_json_island(WEB_PAGE, "json-users"))
+
+with open("tests/mocks/api_mocks.json") as f:
+    BEATMAPS_JSON = [d for diffs in json.load(f).values() for d in diffs]
+
+
+def serve(page: bytes):
+    # A plain coroutine rather than an AsyncMock, which would record every call.
+    async def get_raw(uri: str, conditional: bool = False) -> bytes:
+        return page
+
+    return get_raw
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def app(loop):
+    async def new_session():
+        return aiohttp.ClientSession()
+
+    session = loop.run_until_complete(new_session())
+    app = Phillip("key", loop=loop, session=session)
+    app.TESTING = True
+    yield app
+    loop.run_until_complete(session.close())
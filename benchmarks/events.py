@@ -0,0 +1,61 @@
+"""Per-event cost of the `EventBase` properties read while filtering and embedding an event.
+
+``Uncached`` rebuilds `beatmapset` and `discussion` and runs ``strptime`` on every access, as
+`EventBase` did before its properties were memoized.
+
+Run from the repository root with ``python -m benchmarks.events``.
+"""
+
+import json
+import timeit
+from datetime import datetime
+
+from phillip.classes import Disqualified
+from phillip.helper import find_json_island
+from phillip.osu.classes.web import Beatmap as WebBeatmap
+from phillip.osu.classes.web import Discussion
+
+
+class Uncached(Disqualified):
+    @property
+    def time(self) -> datetime:
+        return datetime.strptime(self.js["created_at"], "%Y-%m-%dT%H:%M:%S+00:00")
+
+    @property
+    def beatmapset(self) -> WebBeatmap:
+        return WebBeatmap(self.js["beatmapset"])
+
+    @property
+    def discussion(self) -> Discussion:
+        js_obj = self.js.get("discussion")
+        if not js_obj:
+            return None
+        return Discussion(js_obj)
+
+
+def process(event):
+    # What check_map_events and gen_embed read for one event.
+    for _ in range(3):
+        event.time
+    event.beatmapset.id
+    event.creator, event.artist, event.title, event.map_cover
+    event.event_source_url
+    event.discussion and event.discussion.starting_post.message
+
+
+def main():
+    with open("tests/mocks/web_mocks.html", "rb") as f:
+        events = json.loads(find_json_island(f.read(), "json-events"))
+    events = [js for js in events if js["type"] in ("disqualify", "nomination_reset")]
+
+    number = 2000
+    print(f"{'':<10} {'per event':>10}")
+    for name, cls in [("before", Uncached), ("after", Disqualified)]:
+        seconds = timeit.timeit(
+            lambda: [process(cls(js)) for js in events], number=number
+        )
+        print(f"{name:<10} {seconds / number / len(events) * 1e6:>8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compare the old decode path against `jsonlib` on the saved fixture pages.
+
+The old path decodes the page to text, finds the script tag with BeautifulSoup and hands the string to
+`json.loads`. The new one finds the island in the response bytes and decodes it in place with each
+installed backend.
+
+Run from the repository root with ``python -m benchmarks.json_decode``.
+"""
+
+import json
+import timeit
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from phillip import jsonlib
+from phillip.helper import json_island_span
+
+PAGES = [
+    ("tests/mocks/web_mocks.html", "json-events"),
+    ("tests/mocks/web_mocks.html", "json-users"),
+    ("tests/mocks/discord/mocks.html", "json-beatmapset-discussion"),
+    ("tests/mocks/discord/pop_mock.html", "json-beatmapset-discussion"),
+]
+
+BACKENDS = [
+    name
+    for name, module in [("orjson", jsonlib.orjson), ("ujson", jsonlib.ujson)]
+    if module is not None
+] + ["json"]
+
+
+def old_path(page: bytes, tag_id: str):
+    soup = BeautifulSoup(page.decode(), features="html.parser")
+    return json.loads(soup.find(id=tag_id).string)
+
+
+def new_path(backend: str):
+    def decode(page: bytes, tag_id: str):
+        start, end = json_island_span(page, tag_id)
+        return jsonlib.loads(memoryview(page)[start:end], backend=backend)
+
+    return decode
+
+
+def measure(func, page: bytes, tag_id: str, number: int):
+    seconds = timeit.timeit(lambda: func(page, tag_id), number=number) / number
+    tracemalloc.start()
+    func(page, tag_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    header = f"{'page':<40} {'tag':<28} {'old':>18}"
+    for backend in BACKENDS:
+        header += f" {backend:>18}"
+    print(header)
+    for path, tag_id in PAGES:
+        with open(path, "rb") as f:
+            page = f.read()
+        expected = old_path(page, tag_id)
+
+        old_time, old_peak = measure(old_path, page, tag_id, 10)
+        line = (
+            f"{path:<40} {tag_id:<28} "
+            f"{old_time * 1000:>7.2f}ms {old_peak / 1024:>6.0f}KiB"
+        )
+        for backend in BACKENDS:
+            decode = new_path(backend)
+            assert decode(page, tag_id) == expected
+            new_time, new_peak = measure(decode, page, tag_id, 200)
+            line += f" {new_time * 1000:>7.3f}ms {new_peak / 1024:>6.0f}KiB"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
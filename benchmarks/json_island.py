@@ -0,0 +1,62 @@
+"""Compare `find_json_island` against BeautifulSoup on the saved fixture pages.
+
+Only the extraction is timed, decoding the JSON costs the same either way.
+
+Run from the repository root with ``python -m benchmarks.json_island``.
+"""
+
+import json
+import timeit
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from phillip.helper import find_json_island
+
+PAGES = [
+    ("tests/mocks/web_mocks.html", "json-events"),
+    ("tests/mocks/web_mocks.html", "json-users"),
+    ("tests/mocks/discord/mocks.html", "json-beatmapset-discussion"),
+    ("tests/mocks/discord/pop_mock.html", "json-beatmapset-discussion"),
+]
+
+
+def with_soup(page: bytes, tag_id: str):
+    soup = BeautifulSoup(page, features="html.parser")
+    return soup.find(id=tag_id).string
+
+
+def with_island(page: bytes, tag_id: str):
+    return find_json_island(page, tag_id)
+
+
+def measure(func, page: bytes, tag_id: str, number: int):
+    seconds = timeit.timeit(lambda: func(page, tag_id), number=number) / number
+    tracemalloc.start()
+    func(page, tag_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    print(f"{'page':<40} {'tag':<28} {'soup':>18} {'island':>18} {'speedup':>8}")
+    for path, tag_id in PAGES:
+        with open(path, "rb") as f:
+            page = f.read()
+        assert json.loads(with_soup(page, tag_id)) == json.loads(
+            with_island(page, tag_id)
+        )
+
+        soup_time, soup_peak = measure(with_soup, page, tag_id, 10)
+        island_time, island_peak = measure(with_island, page, tag_id, 1000)
+        print(
+            f"{path:<40} {tag_id:<28} "
+            f"{soup_time * 1000:>7.2f}ms {soup_peak / 1024:>6.0f}KiB "
+            f"{island_time * 1000:>7.2f}ms {island_peak / 1024:>6.0f}KiB "
+            f"{soup_time / island_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
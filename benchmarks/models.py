@@ -0,0 +1,163 @@
+"""Memory retained by the model classes for a day of events and all group snapshots.
+
+Every case decodes the JSON from bytes, builds the models and drops the decoded list, so what is
+counted is everything the models keep alive: their own instances plus the values they copied out of
+the source dictionaries. The ``Old*`` classes are the models as they were before they became slotted,
+keeping their fields in an instance ``__dict__``.
+
+Run from the repository root with ``python -m benchmarks.models``.
+"""
+
+import json
+import tracemalloc
+
+from phillip import jsonlib
+from phillip.helper import find_json_island
+from phillip.osu.classes.api import Beatmap as ApiBeatmap
+from phillip.osu.classes.web import Beatmap as WebBeatmap
+from phillip.osu.classes.web import GroupUser
+
+EVENTS_PER_DAY = 2000
+GROUP_MEMBERS = 1000
+
+
+class OldWebBeatmap:
+    def __init__(self, js):
+        self.artist = js.get("artist")
+        self.covers = js.get("covers")
+        self.creator = js.get("creator")
+        self.favourite_count = js.get("favourite_count")
+        self.id = js.get("id")
+        self.play_count = js.get("play_count")
+        self.preview_url = js.get("preview_url")
+        self.source = js.get("source")
+        self.status = js.get("status")
+        self.title = js.get("title")
+        self.user_id = js.get("user_id")
+        self.video = js.get("video")
+        self.user = OldUser(js.get("user"))
+
+
+class OldUser:
+    def __init__(self, js):
+        self.avatar_url = js.get("avatar_url")
+        self.country_code = js.get("country_code")
+        self.default_group = js.get("default_group")
+        self.id = js.get("id")
+        self.is_active = js.get("is_active")
+        self.is_bot = js.get("is_bot")
+        self.is_online = js.get("is_online")
+        self.is_supporter = js.get("is_supporter")
+        self.last_visit = js.get("last_visit")
+        self.pm_friends_only = js.get("pm_friends_only")
+        self.profile_colour = js.get("profile_colour")
+        self.username = js.get("username")
+
+
+class OldGroupUser:
+    def __init__(self, obj):
+        self.id = obj["id"]
+        self.username = obj["username"]
+        self.profile_colour = obj["profile_colour"]
+        self.avatar_url = obj["avatar_url"]
+        self.country_code = obj["country_code"]
+        self.default_group = obj["default_group"]
+        self.is_active = obj["is_active"]
+        self.is_bot = obj["is_bot"]
+        self.is_online = obj["is_online"]
+        self.is_supporter = obj["is_supporter"]
+        self.last_visit = obj["last_visit"]
+        self.pm_friends_only = obj["pm_friends_only"]
+        self.country = obj["country"]
+        self.cover = obj["cover"]
+        self.support_level = obj["support_level"]
+
+
+class OldApiBeatmap:
+    def __init__(self, js):
+        self.beatmapset_id = js["beatmapset_id"]
+        self.beatmap_id = js["beatmap_id"]
+        self.approved = js["approved"]
+        self.total_length = js["total_length"]
+        self.hit_length = js["hit_length"]
+        self.version = js["version"]
+        self.file_md5 = js["file_md5"]
+        self.diff_size = js["diff_size"]
+        self.diff_overall = js["diff_overall"]
+        self.diff_approach = js["diff_approach"]
+        self.diff_drain = js["diff_drain"]
+        self.mode = js["mode"]
+        self.count_normal = js["count_normal"]
+        self.count_slider = js["count_slider"]
+        self.count_spinner = js["count_spinner"]
+        self.submit_date = js["submit_date"]
+        self.approved_date = js["approved_date"]
+        self.last_update = js["last_update"]
+        self.artist = js["artist"]
+        self.title = js["title"]
+        self.creator = js["creator"]
+        self.creator_id = js["creator_id"]
+        self.bpm = js["bpm"]
+        self.source = js["source"]
+        self.tags = js["tags"]
+        self.genre_id = js["genre_id"]
+        self.language_id = js["language_id"]
+        self.favourite_count = js["favourite_count"]
+        self.rating = js["rating"]
+        self.download_unavailable = js["download_unavailable"]
+        self.audio_unavailable = js["audio_unavailable"]
+        self.playcount = js["playcount"]
+        self.passcount = js["passcount"]
+        self.max_combo = js["max_combo"]
+        self.diff_aim = js["diff_aim"]
+        self.diff_speed = js["diff_speed"]
+        self.difficultyrating = js["difficultyrating"]
+
+
+def load():
+    """JSON lists of the recorded objects, repeated to a day's worth, as bytes to decode."""
+    with open("tests/mocks/web_mocks.html", "rb") as f:
+        page = f.read()
+    with open("tests/mocks/api_mocks.json") as f:
+        difficulties = [d for diffs in json.load(f).values() for d in diffs]
+    events = json.loads(find_json_island(page, "json-events"))
+    users = json.loads(find_json_island(page, "json-users"))
+
+    sets = [events[i % len(events)]["beatmapset"] for i in range(EVENTS_PER_DAY)]
+    diffs = [difficulties[i % len(difficulties)] for i in range(EVENTS_PER_DAY)]
+    members = [users[i % len(users)] for i in range(GROUP_MEMBERS)]
+    return [json.dumps(objects).encode() for objects in (sets, diffs, members)]
+
+
+def measure(raw: bytes, model) -> int:
+    tracemalloc.start()
+    decoded = jsonlib.loads(raw)
+    objects = [model(js) for js in decoded]
+    del decoded
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current
+
+
+def main():
+    sets, diffs, members = load()
+    cases = [
+        ("web Beatmap", sets, OldWebBeatmap, WebBeatmap),
+        ("api Beatmap", diffs, OldApiBeatmap, ApiBeatmap),
+        ("GroupUser", members, OldGroupUser, GroupUser),
+    ]
+    print(f"JSON decoded with {jsonlib.BACKEND}")
+    print(f"{'model':<14} {'count':>6} {'old':>10} {'slotted':>10} {'ratio':>7}")
+    for name, raw, old, model in cases:
+        count = len(jsonlib.loads(raw))
+        before = measure(raw, old)
+        after = measure(raw, model)
+        print(
+            f"{name:<14} {count:>6} {before / 1024:>8.0f}KiB "
+            f"{after / 1024:>8.0f}KiB {after / before:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""Replay events and group snapshots through `Phillip` against a local stand-in for osu!.
+
+A local aiohttp server serves the events page, group pages and the osu! API v1 beatmaps endpoint, with
+simulated latency and a rate limit on the web pages (answered with 429 like osu! does). Before every
+cycle it publishes new events and changes the groups, then `check_map_events` and `check_role_change`
+run once each. Cycles are spaced by the feeds' `PollScheduler` delays, which are ``--interval`` unless the
+request budget or a ``Retry-After`` asks for longer, and after the last cycle the map feed is polled
+until it has caught up. Events are built from the ones recorded in ``tests/mocks/web_mocks.html`` (or a JSON list
+given with ``--events``), with new IDs, beatmapsets and timestamps.
+
+It reports emitted events per second, the p50/p99 latency from an event being published to its handler
+being called, and the peak RSS of the process (``ru_maxrss``, KiB on Linux).
+
+Run from the repository root with ``python -m benchmarks.replay``, see ``--help`` for the knobs.
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import random
+import resource
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import aiohttp
+from aiohttp import web
+
+from phillip.application import Phillip
+from phillip.handlers import Handler
+from phillip.helper import find_json_island
+from phillip.osu.new.scheduler import RequestScheduler
+from phillip.osu.new.web import WebClient
+from phillip.polling import PollScheduler
+
+START = datetime(2020, 1, 1)
+PAGE_SIZE = 50
+GROUP_IDS = [4, 7, 16, 28, 32]
+
+
+def render(tag_id: str, data) -> bytes:
+    js = json.dumps(data).replace("</", "<\\/")
+    return (
+        f'<html><body><div id="app"></div><script id="{tag_id}" type="application/json">'
+        f"{js}</script></body></html>"
+    ).encode()
+
+
+class StandInServer:
+    """Serves the pages Phillip polls from an in-memory timeline."""
+
+    def __init__(
+        self,
+        templates: List[dict],
+        user_template: dict,
+        beatmaps: List[dict],
+        group_size: int,
+        latency: float,
+        jitter: float,
+        rate_limit: float,
+        seed: int = 0,
+    ):
+        self.templates = templates
+        self.user_template = user_template
+        self.beatmaps = beatmaps
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+
+        self.events: List[dict] = []
+        self.published: Dict[int, float] = dict()
+        self.expected = 0
+        self.requests = 0
+        self.limited = 0
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self._next_user = 10_000_000
+
+        self.groups: Dict[int, List[dict]] = {
+            gid: [self._new_user(gid) for _ in range(group_size)] for gid in GROUP_IDS
+        }
+
+    def _new_user(self, gid: int) -> dict:
+        user = copy.deepcopy(self.user_template)
+        self._next_user += 1
+        user["id"] = self._next_user
+        user["username"] = f"user{self._next_user}"
+        user["groups"] = [dict(g, id=gid) for g in user.get("groups", [])[:1]]
+        return user
+
+    def publish(self, count: int):
+        """Make `count` new events visible, newest last."""
+        for _ in range(count):
+            event_id = len(self.events) + 1
+            event = copy.deepcopy(self.templates[event_id % len(self.templates)])
+            event["id"] = event_id
+            # Several events share a second, as in a burst of nominations.
+            event["created_at"] = (START + timedelta(seconds=event_id // 3)).strftime(
+                "%Y-%m-%dT%H:%M:%S+00:00"
+            )
+            # Pairs of events share a beatmapset, like a nomination followed by a qualification.
+            event["beatmapset"]["id"] = 1_000_000 + event_id // 2
+            self.events.append(event)
+            self.published[event_id] = time.perf_counter()
+            # Qualifications and BanchoBot's bubble pops are never emitted.
+            bancho = event["user_id"] == 3 and event["type"] not in ("rank", "love")
+            if event["type"] != "qualify" and not bancho:
+                self.expected += 1
+
+    def churn(self, count: int):
+        """Replace `count` members of every group."""
+        for gid, users in self.groups.items():
+            for _ in range(min(count, len(users))):
+                users.pop(self.random.randrange(len(users)))
+                users.append(self._new_user(gid))
+
+    def _allowed(self) -> bool:
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(
+            self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit
+        )
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        self.requests += 1
+        await asyncio.sleep(
+            max(self.latency + self.random.uniform(-1, 1) * self.jitter, 0)
+        )
+        if not request.path.startswith("/api/") and not self._allowed():
+            self.limited += 1
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        return await handler(request)
+
+    async def get_events(self, request: web.Request) -> web.Response:
+        page = int(request.query.get("page", 1))
+        end = len(self.events) - (page - 1) * PAGE_SIZE
+        shown = self.events[max(end - PAGE_SIZE, 0) : max(end, 0)][::-1]
+        return web.Response(body=render("json-events", shown), content_type="text/html")
+
+    async def get_group(self, request: web.Request) -> web.Response:
+        users = self.groups.get(int(request.match_info["gid"]), [])
+        return web.Response(body=render("json-users", users), content_type="text/html")
+
+    async def get_beatmaps(self, request: web.Request) -> web.Response:
+        set_id = request.query["s"]
+        return web.json_response([dict(b, beatmapset_id=set_id) for b in self.beatmaps])
+
+    async def start(self) -> web.AppRunner:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get("/beatmapsets/events", self.get_events)
+        app.router.add_get("/groups/{gid}", self.get_group)
+        app.router.add_get("/api/get_beatmaps", self.get_beatmaps)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        return runner
+
+
+class ReplayWebClient(WebClient):
+    def __init__(self, base_url: str, *args, **kwargs):
+        self.base_url = base_url
+        super().__init__(*args, **kwargs)
+
+    @property
+    def events_url(self):
+        return self.base_url + "/beatmapsets/events?user=&types%5B%5D="
+
+    @property
+    def groups_url(self):
+        return self.base_url + "/groups/"
+
+
+class Recorder(Handler):
+    """Records when every event reaches its handler."""
+
+    def __init__(self, server: StandInServer, delay: float):
+        super().__init__()
+        self.server = server
+        self.delay = delay
+        self.latencies: List[float] = []
+        self.group_events = 0
+
+    async def on_map_event(self, event):
+        self.latencies.append(time.perf_counter() - self.server.published[event.id])
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+    async def on_group_added(self, user):
+        self.group_events += 1
+
+    async def on_group_removed(self, user):
+        self.group_events += 1
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def load_templates(path: str = None):
+    with open("tests/mocks/web_mocks.html", "rb") as f:
+        page = f.read()
+    users = json.loads(find_json_island(page, "json-users"))
+    if path:
+        with open(path) as f:
+            events = json.load(f)
+    else:
+        events = json.loads(find_json_island(page, "json-events"))
+    with open("tests/mocks/api_mocks.json") as f:
+        beatmaps = next(iter(json.load(f).values()))
+    return events, users[0], beatmaps
+
+
+async def replay(args):
+    templates, user_template, beatmaps = load_templates(args.events)
+    server = StandInServer(
+        templates,
+        user_template,
+        beatmaps,
+        args.group_size,
+        args.latency,
+        args.jitter,
+        args.server_rate,
+    )
+    runner = await server.start()
+    host, port = runner.addresses[0][:2]
+    base_url = f"http://{host}:{port}"
+
+    errors: Dict[str, int] = dict()
+
+    async def on_error(error):
+        errors[type(error).__name__] = errors.get(type(error).__name__, 0) + 1
+
+    session = aiohttp.ClientSession()
+    recorder = Recorder(server, args.handler_delay)
+    scheduler = RequestScheduler(args.client_rate, 1)
+    app = Phillip(
+        "key",
+        loop=asyncio.get_event_loop(),
+        session=session,
+        handlers=[recorder],
+        max_concurrency=args.max_concurrency,
+        # Every poll is busy in a replay, so both feeds wait `--interval` unless the request budget
+        # or a Retry-After asks for longer.
+        map_poll=PollScheduler(
+            args.interval, args.interval, args.interval, jitter=0, scheduler=scheduler
+        ),
+        group_poll=PollScheduler(
+            args.interval,
+            args.interval,
+            args.interval,
+            jitter=0,
+            requests_per_poll=len(GROUP_IDS),
+            scheduler=scheduler,
+        ),
+    )
+    app.TESTING = True
+    app.on_error = on_error
+    app.web = ReplayWebClient(
+        base_url,
+        session,
+        app=app,
+        scheduler=scheduler,
+        metrics=app.metrics,
+    )
+    app.api.BASE_URL = base_url + "/api/"
+
+    started = time.perf_counter()
+    for _ in range(args.cycles):
+        server.publish(args.events_per_cycle)
+        server.churn(args.group_churn)
+        await asyncio.gather(app.check_map_events(), app.check_role_change())
+        # Both feeds share the rate limit, so the next cycle waits for the later of the two.
+        await asyncio.sleep(max(app.map_poll.next_delay(), app.group_poll.next_delay()))
+    # Polls cut short by the rate limit leave the newest events unfetched, catch up on them.
+    for _ in range(args.cycles):
+        if (app.last_event_id or 0) >= len(server.events):
+            break
+        await app.check_map_events()
+        await asyncio.sleep(app.map_poll.next_delay())
+    await recorder.dispatcher.join()
+    elapsed = time.perf_counter() - started
+
+    await app.close()
+    await session.close()
+    await runner.cleanup()
+
+    emitted = len(recorder.latencies)
+    print(f"cycles           {args.cycles}")
+    print(f"published        {len(server.events)} events")
+    print(
+        f"emitted          {emitted} of {server.expected} events, {recorder.group_events} group changes"
+    )
+    print(f"throughput       {emitted / elapsed:.1f} events/s over {elapsed:.2f}s")
+    print(f"emit latency     p50 {percentile(recorder.latencies, 0.5) * 1000:.1f}ms")
+    print(f"                 p99 {percentile(recorder.latencies, 0.99) * 1000:.1f}ms")
+    print(f"requests         {server.requests}, {server.limited} rate limited")
+    print(f"errors           {errors or 'none'}")
+    print(f"peak RSS         {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--events-per-cycle", type=int, default=20)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0,
+        help="seconds between cycles, longer when rate limited",
+    )
+    parser.add_argument("--events", help="JSON list of recorded events to replay")
+    parser.add_argument("--group-size", type=int, default=100)
+    parser.add_argument("--group-churn", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="seconds")
+    parser.add_argument(
+        "--server-rate", type=float, default=0, help="web pages/s, 0 for no limit"
+    )
+    parser.add_argument("--client-rate", type=int, default=100, help="requests/s")
+    parser.add_argument("--max-concurrency", type=int, default=5)
+    parser.add_argument("--handler-delay", type=float, default=0, help="seconds")
+    asyncio.get_event_loop().run_until_complete(replay(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import cached_property
 from typing import List, Optional
 
 from phillip.osu.classes.api import Beatmap as ApiBeatmap
@@ -7,6 +8,25 @@ from phillip.osu.classes.web import Beatmap as WebBeatmap
 from phillip.osu.classes.web import Discussion
 
 
+def parse_time(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp from osu! into a naive `datetime` in UTC.
+
+    **Parameters:**
+
+    * value - `str` -- The timestamp, e.g. `2020-09-29T07:43:31+00:00`.
+
+    **Returns**
+
+    * `datetime` -- The parsed time.
+    """
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
 class EventBase(ABC):
     """An Abstract Class (ABC) representing base osu! beatmapset event."""
 
@@ -16,12 +36,23 @@ class EventBase(ABC):
         self.next_event = next_event
         self._beatmap: Optional[List[ApiBeatmap]] = None
 
+    def __getstate__(self):
+        # The app holds the session and loop, it is attached again after unpickling.
+        state = self.__dict__.copy()
+        state["app"] = None
+        return state
+
     async def get_beatmap(self) -> List[ApiBeatmap]:
-        """Fetch beatmapset info from osu! API."""
+        """Fetch beatmapset info from osu! API, shared with other events of the set through `app.beatmapsets`."""
         if not self._beatmap:
-            self._beatmap = await self.app.api.get_beatmaps(s=self.beatmapset.id)
+            self._beatmap = await self.app.beatmapsets.difficulties(self, self.app.api)
         return self._beatmap  # type: ignore
 
+    @property
+    def id(self) -> int:
+        """ID of the event."""
+        return self.js["id"]
+
     @property
     def creator(self) -> str:
         """Mapper of beatmap."""
@@ -47,11 +78,10 @@ class EventBase(ABC):
         """The user that causes this event to occur."""
         return self.js["user_id"]
 
-    @property
+    @cached_property
     def time(self) -> datetime:
-        """A `datetime` object representing the time where the event happened."""
-        dt = self.js["created_at"]
-        return datetime.strptime(dt, "%Y-%m-%dT%H:%M:%S+00:00")
+        """A `datetime` object representing the time where the event happened, in UTC."""
+        return parse_time(self.js["created_at"])
 
     @property
     @abstractmethod
@@ -82,12 +112,12 @@ class EventBase(ABC):
         """Difficulties returned by osu! API."""
         return self._beatmap  # type: ignore
 
-    @property
+    @cached_property
     def beatmapset(self) -> WebBeatmap:
         """Beatmapset info returned by the osu-web JSON."""
         return WebBeatmap(self.js["beatmapset"])
 
-    @property
+    @cached_property
     def discussion(self) -> Discussion:
         """Discussion info returned by the osu-web JSON."""
         js_obj = self.js.get("discussion")
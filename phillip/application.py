@@ -1,18 +1,35 @@
 import asyncio
 import signal
 import sys
+import time
 import traceback
-from datetime import datetime, timedelta
-from typing import Dict, List
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
 
 import aiohttp
 from pyee import AsyncIOEventEmitter
 
 from phillip import helper
+from phillip.abstract import EventBase
+from phillip.beatmapsets import BeatmapsetStore
+from phillip.cache import Cache
+from phillip.checkpoint import Checkpoint, CheckpointStore
+from phillip.dedupe import SeenEvents
+from phillip.filters import EventFilter
 from phillip.handlers import Handler
+from phillip.metrics import MetricsRegistry
 from phillip.osu.classes.web import GroupUser
+from phillip.osu.client import OsuClient
+from phillip.osu.new.abstract import NotModified, RateLimited
+from phillip.osu.new.api import APIClient as APIClientV2
 from phillip.osu.new.web import WebClient
 from phillip.osu.old.api import APIClient
+from phillip.polling import PollScheduler
+
+if TYPE_CHECKING:
+    from phillip.hub import FeedHub
+
+EPOCH = datetime.utcfromtimestamp(0)
 
 
 class Phillip:
@@ -31,6 +48,25 @@ class Phillip:
     * disable_mapfeed - `bool` | optional -- Whether to disable map feed or not.
     * skip_bancho - `bool` | optional -- Whether to skip BanchoBot's events or not. Useful if you don't want to get spammed by bubble pops events.
     * session - `aiohttp.ClientSession` | optional -- aiohttp client session to use for http requests.
+    * max_concurrency - `int` | optional -- Maximum osu! API requests in flight while fetching beatmaps of new events, defaults to 5.
+    * cache - `cache.Cache` | optional -- Cache for osu! API responses, defaults to an in-memory cache. Use `cache.FileCache` to keep it across restarts.
+    * checkpoint - `checkpoint.CheckpointStore` | optional -- Where to save the feed state after every cycle, and resume it from on start. \
+        A given `last_date` takes precedence over the saved map feed state.
+    * map_poll - `polling.PollScheduler` | optional -- Decides the wait between map feed polls, defaults to 1 to 15 minutes.
+    * group_poll - `polling.PollScheduler` | optional -- Decides the wait between group feed sweeps, defaults to 5 to 60 minutes.
+    * event_filter - `filters.EventFilter` | optional -- Only emit the map events matching this filter. \
+        Events filtered out early never cost an osu! API request.
+    * modes - `List[str]` | optional -- Shorthand for `EventFilter(modes=...)`, ignored if `event_filter` is given.
+    * event_types - `List[str]` | optional -- Shorthand for `EventFilter(event_types=...)`, ignored if `event_filter` is given.
+    * hub - `hub.FeedHub` | optional -- Hub that fetches the feeds for this instance, see `FeedHub.add_pipeline`.
+    * api_v2 - `osu.new.APIClient` | optional -- osu! API v2 client. When given, feeds and users are read from osu! API v2 \
+        and fall back to scraping or osu! API v1 if it fails, see `osu.client.OsuClient`. It is closed with the instance.
+    * metrics - `metrics.MetricsRegistry` | optional -- Registry to record poll, HTTP, cache and handler metrics in, \
+        defaults to a new one. Export it with `metrics.snapshot()`, `metrics.to_prometheus()` or `await metrics.serve()`.
+    * seen_events - `dedupe.SeenEvents` | optional -- IDs of the processed map events, so each event is emitted once. \
+        Saved with the checkpoint. Defaults to the last 10000 IDs, give it a `BloomFilter` to remember more.
+    * beatmapsets - `beatmapsets.BeatmapsetStore` | optional -- Beatmapset data shared by the events of a set, \
+        kept until the set has a new event. Defaults to a new store, or the hub's.
 
     **Raises:**
 
@@ -49,6 +85,19 @@ class Phillip:
         disable_mapfeed: bool = False,
         skip_bancho: bool = True,
         session=None,
+        max_concurrency: int = 5,
+        cache: Cache = None,
+        checkpoint: CheckpointStore = None,
+        map_poll: PollScheduler = None,
+        group_poll: PollScheduler = None,
+        metrics: MetricsRegistry = None,
+        event_filter: EventFilter = None,
+        modes: List[str] = None,
+        event_types: List[str] = None,
+        hub: "FeedHub" = None,
+        api_v2: APIClientV2 = None,
+        seen_events: SeenEvents = None,
+        beatmapsets: BeatmapsetStore = None,
     ):
         self.TESTING = False
         self._closed = False
@@ -60,17 +109,41 @@ class Phillip:
         self.webhook_url = webhook_url
         self.apitoken = token
 
-        self.last_date = last_date or datetime.utcfromtimestamp(0)
+        self.last_date = last_date or EPOCH
         self.loop = loop or asyncio.get_event_loop()
         self.last_event = None
+        self.last_event_id: Optional[int] = None
+        self.seen_events = seen_events or SeenEvents()
         self.skip_bancho = skip_bancho
         self.disable_user = disable_groupfeed
         self.disable_map = disable_mapfeed
+        self.max_concurrency = max_concurrency
+        self.event_filter = event_filter or EventFilter(
+            event_types=event_types, modes=modes
+        )
+        self.hub = hub
         self.tasks: List[asyncio.Task] = []
 
-        self.session = session or aiohttp.ClientSession()
-        self.api = APIClient(self.session, self.apitoken)
-        self.web = WebClient(self.session, app=self)
+        if hub is not None:
+            self.metrics = metrics or hub.metrics
+            self.session = hub.session
+            self.api = hub.api
+            self.web = hub.web
+            self.beatmapsets = beatmapsets or hub.beatmapsets
+        else:
+            self.metrics = metrics or MetricsRegistry()
+            self.session = session or aiohttp.ClientSession()
+            self.api = APIClient(
+                self.session, self.apitoken, cache=cache, metrics=self.metrics
+            )
+            self.web = WebClient(self.session, app=self, metrics=self.metrics)
+            self.beatmapsets = beatmapsets or BeatmapsetStore()
+        if api_v2 is not None:
+            api_v2._app = api_v2._app or self
+            self.web = OsuClient(
+                self.web, api=self.api, api_v2=api_v2, metrics=self.metrics
+            )
+        self.metrics.add_collector(self._collect_metrics)
 
         self.group_ids = [
             # https://github.com/ppy/osu-web/blob/master/app/Models/UserGroup.php
@@ -80,16 +153,107 @@ class Phillip:
             28,  # Full BN
             32,  # Probation BN
         ]
-        self.last_users: Dict[int, List[GroupUser]] = dict()
+        self.map_poll = map_poll or PollScheduler(
+            5 * 60, 60, 15 * 60, scheduler=self.web.scheduler
+        )
+        self.group_poll = group_poll or PollScheduler(
+            15 * 60,
+            5 * 60,
+            60 * 60,
+            requests_per_poll=len(self.group_ids),
+            scheduler=self.web.scheduler,
+        )
+        self.last_users: Dict[int, Dict[int, GroupUser]] = dict()
+        self._changes = {"groups": 0, "seen": 0}
+        self._saved: Dict[str, Any] = dict()
+        self._save_lock: Optional[asyncio.Lock] = None
 
         for gid in self.group_ids:
-            self.last_users[gid] = list()
+            self.last_users[gid] = dict()
+
+        self.checkpoint = checkpoint
+        if checkpoint:
+            self._restore(checkpoint.load(), restore_map=last_date is None)
 
         self.emitter = emitter or AsyncIOEventEmitter()
         if self.handlers:
             for handler in self.handlers:
                 self._prepare_handler(handler)
 
+    def _restore(self, state: Optional[Checkpoint], restore_map: bool = True):
+        if state is None:
+            return
+        if restore_map:
+            self.last_date = state.last_date or self.last_date
+            self.last_event_id = state.last_event_id
+            self.seen_events.restore(state.seen)
+            self.beatmapsets.restore(state.beatmapsets)
+        for gid, users in state.groups.items():
+            if gid in self.last_users:
+                self.last_users[gid] = helper.index_users(GroupUser(u) for u in users)
+
+    def _checkpoint_versions(self) -> Dict[str, Any]:
+        return {
+            "last_date": self.last_date,
+            "last_event_id": self.last_event_id,
+            "groups": self._changes["groups"],
+            "seen": self._changes["seen"],
+            "beatmapsets": self.beatmapsets.changes,
+        }
+
+    async def save_checkpoint(self):
+        """Save the parts of the feed state that changed since the last save to `checkpoint`, if there is one.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        The changed parts are copied on the loop, then encoded and written from an executor.
+        """
+        if not self.checkpoint:
+            return
+        if self._save_lock is None:
+            self._save_lock = asyncio.Lock()
+        async with self._save_lock:
+            versions = self._checkpoint_versions()
+            dirty = [key for key, v in versions.items() if self._saved.get(key) != v]
+            if not dirty:
+                return
+
+            groups = None
+            if "groups" in dirty:
+                groups = {
+                    gid: [user.to_dict() for user in users.values()]
+                    for gid, users in self.last_users.items()
+                }
+            checkpoint = Checkpoint(
+                self.last_date,
+                self.last_event_id,
+                groups,
+                self.seen_events.to_dict() if "seen" in dirty else None,
+                self.beatmapsets.to_dict() if "beatmapsets" in dirty else None,
+            )
+            await self.loop.run_in_executor(
+                None, self.checkpoint.save, checkpoint, dirty
+            )
+            self._saved.update(versions)
+
+    def _collect_metrics(self):
+        depth = self.metrics.gauge(
+            "phillip_handler_queue_depth",
+            "Callbacks waiting in a handler's queue, by pipeline (index in the FeedHub, 0 without one) "
+            "and position of the handler in it.",
+        )
+        pipeline = 0
+        if self.hub is not None and self in self.hub.pipelines:
+            pipeline = self.hub.pipelines.index(self)
+        for index, handler in enumerate(self.handlers):
+            dispatcher = getattr(handler, "dispatcher", None)
+            if dispatcher is not None:
+                depth.set(
+                    dispatcher.depth,
+                    handler=type(handler).__name__,
+                    pipeline=str(pipeline),
+                    index=str(index),
+                )
+
     def _prepare_handler(self, h: Handler):
         h.register_emitter(self.emitter)
         h.app = self
@@ -101,85 +265,266 @@ class Phillip:
 
         * error - `Exception` -- The exception raised.
         """
+        self.metrics.counter("phillip_errors_total", "Errors by exception type.").inc(
+            error=type(error).__name__
+        )
         print("An error occured, will keep running anyway.", file=sys.stderr)
         traceback.print_exception(
             type(error), error, error.__traceback__, file=sys.stderr
         )
 
+    async def _backpressure(self):
+        # Handlers with the `block` overflow policy hold the feed until they catch up.
+        for handler in self.handlers:
+            dispatcher = getattr(handler, "dispatcher", None)
+            if dispatcher is not None:
+                await dispatcher.wait_writable()
+
+    async def enrich_events(self, events: List[EventBase]):
+        """Fetch beatmap data for all events concurrently.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        Events of the same beatmapset share a single request, and at most
+        `max_concurrency` requests are in flight at once.
+
+        **Parameters:**
+
+        * events - `List[EventBase]` -- Events to fetch beatmap data for.
+        """
+        await helper.enrich_events(events, self.max_concurrency)
+
+    async def nomination_history(
+        self, set_id: int, users: Dict[int, dict] = None
+    ) -> List[Tuple[str, int]]:
+        """Get nomination history of a beatmapset from the map events seen so far.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        Sets the map feed saw from their first nomination on are answered from its log alone. The discussion
+        page is scraped once for the others, see `beatmapsets.BeatmapsetStore`.
+
+        **Parameters:**
+
+        * set_id - `int` -- ID of the beatmapset.
+        * users - `Dict[int, dict]` | optional -- If given, filled with the user objects known for the set.
+
+        **Returns**
+
+        * `List[Tuple[str, int]]` -- Event types and IDs of the users triggering them, see `ABCClient.nomination_history`.
+        """
+        return await self.beatmapsets.nomination_history(set_id, self.web, users=users)
+
+    async def resolve_users(
+        self, ids: Iterable[int], known: Dict[int, dict] = None
+    ) -> Dict[int, dict]:
+        """Get many osu! users at once, from osu! API v2 with failover to API v1 when `api_v2` is given.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * ids - `Iterable[int]` -- osu! user IDs to resolve.
+        * known - `Dict[int, dict]` | optional -- User objects that are already available, these are not requested again.
+
+        **Returns**
+
+        * `Dict[int, dict]` -- User objects keyed by user ID. Users that could not be found are left out.
+        """
+        if isinstance(self.web, OsuClient):
+            return await self.web.resolve_users(ids, known=known)
+        return await self.api.resolve_users(ids, known=known)
+
+    def _record_poll(self, feed: str, started: float, found: int):
+        self.metrics.histogram(
+            "phillip_poll_seconds", "Duration of a feed poll, including enrichment."
+        ).observe(time.perf_counter() - started, feed=feed)
+        self.metrics.counter("phillip_polls_total", "Feed polls by outcome.").inc(
+            feed=feed, result="found" if found else "idle"
+        )
+
+    def is_new_event(self, event: EventBase) -> bool:
+        """Whether `event` was not processed yet.
+
+        Decided by `seen_events`, or by `last_date` until the first event is processed.
+        """
+        if self.seen_events:
+            return event.id not in self.seen_events
+        return event.time >= self.last_date
+
+    def map_cursor(self) -> Dict[str, Any]:
+        """Arguments for `ABCClient.get_events` to fetch only events after the last processed one."""
+        if self.last_event_id is not None:
+            return dict(since_id=self.last_event_id)
+        if self.last_date > EPOCH:
+            return dict(since=self.last_date)
+        return dict()
+
+    async def process_map_events(
+        self, events: List[EventBase], newest_id: int = None
+    ) -> int:
+        """Emit the events that were not processed yet and match `event_filter`, and save the checkpoint.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * events - `List[EventBase]` -- Events, oldest first. Those that may match `event_filter` must be enriched.
+        * newest_id - `int` | optional -- ID of the newest event fetched, including filtered ones, to move the cursor past them.
+
+        **Returns**
+
+        * `int` -- Number of events emitted.
+        """
+        emitted = 0
+        for event in events:
+            if not self.is_new_event(event):
+                continue
+            self.seen_events.add(event.id)
+            self._changes["seen"] += 1
+            self.beatmapsets.record(event)
+            self.last_event = event
+            self.last_event_id = max(self.last_event_id or 0, event.id)
+            self.last_date = max(self.last_date, event.time)
+            if event.event_type not in ["Ranked", "Loved"]:
+                # Skip BanchoBot bubble pops
+                if event.user_id == 3 and self.skip_bancho:
+                    continue
+            if not self.event_filter.match(event):
+                continue
+
+            self.emitter.emit("map_event", event)
+            self.emitter.emit(event.event_type.lower(), event)
+            self.metrics.counter("phillip_events_total", "Events emitted by type.").inc(
+                type=event.event_type
+            )
+            emitted += 1
+            await self._backpressure()
+
+        if newest_id is not None:
+            self.last_event_id = max(self.last_event_id or 0, newest_id)
+        await self.save_checkpoint()
+        return emitted
+
     async def check_map_events(self):
         """Check for map events. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*"""
         while not self._closed:
+            found = 0
+            started = time.perf_counter()
             try:
-                events = [e async for e in self.web.get_events()]
-                for i, event in enumerate(events):
-                    if event.time < self.last_date:
-                        continue
-                    await event.get_beatmap()
-
-                    if event.time == self.last_date:
-                        if (
-                            self.last_event
-                            and event.beatmapset.id == self.last_event.beatmapset.id
-                        ):
-                            continue
-
-                    if event.time == self.last_date and i + 1 == len(events):
-                        self.last_date = event.time + timedelta(seconds=1)
-                    else:
-                        self.last_date = event.time
-
-                    self.last_event = event
-                    if event.event_type not in ["Ranked", "Loved"]:
-                        # Skip BanchoBot bubble pops
-                        if event.user_id == 3 and self.skip_bancho:
-                            continue
-
-                    self.emitter.emit("map_event", event)
-                    self.emitter.emit(event.event_type.lower(), event)
+                events = [
+                    e
+                    async for e in self.web.get_events(
+                        conditional=True,
+                        event_filter=self.event_filter,
+                        beatmapsets=self.beatmapsets,
+                        **self.map_cursor(),
+                    )
+                    if self.is_new_event(e) and self.event_filter.match_event(e)
+                ]
+                await self.enrich_events(events)
+                found = len(events)
+                await self.process_map_events(events, self.web.newest_event_id)
             except Exception as e:
+                if isinstance(e, RateLimited):
+                    self.map_poll.retry_after(e.retry_after)
+                # Make sure the events are fetched again rather than skipped as unchanged.
+                self.web.invalidate()
                 await self.on_error(e)
 
+            self._record_poll("map", started, found)
+            self.map_poll.record(found)
             if self.TESTING:
                 break
-            await asyncio.sleep(5 * 60)  # pragma: no cover
+            await asyncio.sleep(self.map_poll.next_delay())  # pragma: no cover
+
+    async def process_group(self, gid: int, users: List[GroupUser]) -> bool:
+        """Emit the changes of a group since it was last processed.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * gid - `int` -- ID of the group.
+        * users - `List[GroupUser]` -- Current members of the group.
+
+        **Returns**
+
+        * `bool` -- Whether anything changed.
+        """
+        indexed = helper.index_users(users)
+        diff = helper.diff_users(self.last_users.get(gid, {}), indexed)
+
+        self.metrics.counter("phillip_events_total", "Events emitted by type.").inc(
+            len(diff.added) + len(diff.removed) + len(diff.changed), type="group"
+        )
+        for user in diff.added:
+            self.emitter.emit("group_added", user)
+            self.emitter.emit(user.default_group, user)
+
+        for user in diff.removed:
+            self.emitter.emit("group_removed", user)
+            self.emitter.emit(user.default_group, user)
+
+        for user, changes in diff.changed:
+            self.emitter.emit("group_changed", user, changes)
+
+        self.last_users[gid] = indexed
+        if diff:
+            self._changes["groups"] += 1
+        await self._backpressure()
+        return bool(diff)
 
     async def check_role_change(self):
         """Check for role changes. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*"""
         while not self._closed:
-            for gid in self.group_ids:
+            found = 0
+            started = time.perf_counter()
+            # Pages are fetched concurrently, the web client's scheduler keeps them within the rate limit.
+            results = await asyncio.gather(
+                *(self.web.get_users(gid, conditional=True) for gid in self.group_ids),
+                return_exceptions=True,
+            )
+            for gid, result in zip(self.group_ids, results):
                 try:
-                    users = await self.web.get_users(gid)
-
-                    for user in users:
-                        if not helper.has_user(user, self.last_users[gid]):
-                            self.emitter.emit("group_added", user)
-                            self.emitter.emit(user.default_group, user)
-
-                    for user in self.last_users[gid]:
-                        if not helper.has_user(user, users):
-                            self.emitter.emit("group_removed", user)
-                            self.emitter.emit(user.default_group, user)
-
-                    self.last_users[gid] = users
+                    if isinstance(result, NotModified):
+                        continue
+                    if isinstance(result, Exception):
+                        raise result
+                    found += await self.process_group(gid, result)
                 except Exception as e:
+                    if isinstance(e, RateLimited):
+                        self.group_poll.retry_after(e.retry_after)
+                    self.web.invalidate(self.web.groups_url + str(gid))
                     await self.on_error(e)
 
+            try:
+                await self.save_checkpoint()
+            except Exception as e:
+                await self.on_error(e)
+
+            self._record_poll("group", started, found)
+            self.group_poll.requests_per_poll = len(self.group_ids)
+            self.group_poll.record(found)
             if self.TESTING:
                 break
-            await asyncio.sleep(15 * 60)  # pragma: no cover
+            await asyncio.sleep(self.group_poll.next_delay())  # pragma: no cover
 
-    def start(self):
-        """Start all tasks loop tasks."""
-        if self.disable_map and self.disable_user:
-            raise Exception("Cannot disable both map and role check.")
+    def prepare_handlers(self):
+        """Add a `DiscordHandler` for `webhook_url` if no handler was given.
+
+        **Raises:**
 
+        * `Exception` -- if no handlers nor webhook_url assigned.
+        """
         if not self.handlers:
             if not self.webhook_url:
                 raise Exception("Requires Handler or webhook_url")
             from phillip.discord import DiscordHandler
 
-            self.handlers.append(DiscordHandler(self.webhook_url))
+            self.add_handler(DiscordHandler(self.webhook_url))
+
+    def start(self):
+        """Start all tasks loop tasks."""
+        if self.disable_map and self.disable_user:
+            raise Exception("Cannot disable both map and role check.")
 
+        self.prepare_handlers()
         if not self.disable_map:
             self.tasks.append(self.loop.create_task(self.check_map_events()))
         if not self.disable_user:
@@ -195,14 +540,40 @@ class Phillip:
         self.handlers.append(handler)
         self._prepare_handler(handler)
 
-    async def close(self):
+    async def close(self, timeout: float = 10):
         """Cancel all task. This will technically shut down the instance.
 
-        However, the session and loop is not closed, so you need to do cleanup on your own."""
+        Handlers get up to `timeout` seconds in total to run their queued callbacks. Whatever is left is
+        dropped, except the callbacks spilled to disk, which are resumed by the next run.
+
+        However, the session and loop is not closed, so you need to do cleanup on your own.
+
+        **Parameters:**
+
+        * timeout - `float` | optional -- Seconds to wait for the handlers' queues to drain, defaults to 10.
+        """
         self._closed = True
         for t in self.tasks:
             t.cancel()
         asyncio.gather(*self.tasks, return_exceptions=True)
+        deadline = self.loop.time() + timeout
+        for handler in self.handlers:
+            dispatcher = getattr(handler, "dispatcher", None)
+            if dispatcher is not None:
+                try:
+                    await asyncio.wait_for(
+                        dispatcher.join(), max(deadline - self.loop.time(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                await dispatcher.close()
+            await handler.close()
+        await self.api.cache.flush()
+        if isinstance(self.web, OsuClient) and (
+            self.hub is None or self.web is not self.hub.web
+        ):
+            # The hub closes the client it shares.
+            await self.web.close()
 
     def run(self):
         """Setup and run the instance. This function does not take any parameter.
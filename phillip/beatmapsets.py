@@ -0,0 +1,265 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from phillip.osu.classes.api import Beatmap as ApiBeatmap
+from phillip.osu.classes.web import Beatmap as WebBeatmap
+from phillip.osu.new.abstract import ABCClient
+
+if TYPE_CHECKING:
+    from phillip.abstract import EventBase
+
+# Nothing is added to the history of a set after these.
+FINAL_TYPES = ["rank", "love"]
+
+
+class BeatmapsetEntry:
+    """What is known about one beatmapset.
+
+    **Attributes:**
+
+    * set_id - `int` -- ID of the beatmapset.
+    * beatmapset - `Optional[WebBeatmap]` -- osu-web metadata from the newest event.
+    * last_event_id - `int` -- ID of the newest event recorded, 0 if none.
+    * events - `List[dict]` -- Log of the set's events as `id`, `type` and `user_id`, in osu!'s raw form, oldest first.
+    * difficulties - `Optional[List[ApiBeatmap]]` -- Difficulties from osu! API, fetched for the event `difficulties_for`.
+    * users - `Dict[int, dict]` -- User objects embedded in the scraped discussion page.
+    """
+
+    def __init__(self, set_id: int):
+        self.set_id = set_id
+        self.beatmapset: Optional[WebBeatmap] = None
+        self.last_event_id = 0
+        self.events: List[dict] = []
+        self.difficulties: Optional[List[ApiBeatmap]] = None
+        self.difficulties_for = 0
+        self.users: Dict[int, dict] = dict()
+        self._ids: Set[int] = set()
+
+    def log(self, event: dict):
+        """Add a raw event to `events` in ID order, unless it is there already.
+
+        **Parameters:**
+
+        * event - `dict` -- osu! beatmapset event object, only `id`, `type` and `user_id` are kept.
+        """
+        if event["id"] in self._ids:
+            return
+        self._ids.add(event["id"])
+        self.events.append(
+            {"id": event["id"], "type": event["type"], "user_id": event.get("user_id")}
+        )
+        if len(self.events) > 1 and self.events[-2]["id"] > event["id"]:
+            self.events.sort(key=lambda e: e["id"])
+
+    @property
+    def history(self) -> List[Tuple[str, int]]:
+        """Nomination history built from `events`, see `ABCClient.nomination_history`."""
+        return ABCClient.history_from_events(self.events)
+
+
+class BeatmapsetStore:
+    """Beatmapsets keyed by set ID, shared by events, embeds and nomination history.
+
+    A beatmapset goes through many events (bubbled, qualified, popped, ranked...). Its osu! API difficulties
+    are kept until a newer event of the same set is recorded, rather than for a fixed time, so later lookups
+    for the same event cost nothing. A new event fetches them past the osu! API client's cache, whose copy
+    may predate the event.
+
+    Every fetched event is added to its set's log (`log_fetch`), which answers `nomination_history`. A log is
+    complete when the feed first saw its set at a nomination, in a fetch that picked up right after the
+    previous one and left out nothing. Its history then started while Phillip was watching, and no
+    discussion scrape is needed. Sets first seen mid-history, or in the first fetch after startup, have
+    their discussion page scraped once to complete the log. A fetch that may have left out history events
+    (filtered event types or users) makes the logs of sets that are not ranked or loved yet incomplete
+    again. Logs are saved with the checkpoint (`to_dict`), so a restart does not scrape them again.
+
+    A set nominated and reset before Phillip started, then nominated again, looks new to the feed. Its
+    earlier rounds are left out of the history.
+
+    **Parameters:**
+
+    * maxsize - `int` | optional -- Beatmapsets to keep, least recently used first out, defaults to 10000.
+
+    **Attributes:**
+
+    * changes - `int` -- Number of changes to the logs, to tell whether they need saving again.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.changes = 0
+        self._entries: "OrderedDict[int, BeatmapsetEntry]" = OrderedDict()
+        self._complete: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, set_id: int) -> Optional[BeatmapsetEntry]:
+        """Get the entry of a beatmapset, if there is one.
+
+        **Parameters:**
+
+        * set_id - `int` -- ID of the beatmapset.
+
+        **Returns**
+
+        * `Optional[BeatmapsetEntry]` -- The entry, or `None` if the beatmapset is unknown.
+        """
+        entry = self._entries.get(set_id)
+        if entry is not None:
+            self._entries.move_to_end(set_id)
+        return entry
+
+    def entry(self, set_id: int) -> BeatmapsetEntry:
+        """Get the entry of a beatmapset, creating it if needed."""
+        entry = self.get(set_id)
+        if entry is None:
+            entry = self._entries[set_id] = BeatmapsetEntry(set_id)
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                self._complete.discard(evicted)
+        return entry
+
+    def is_complete(self, set_id: int) -> bool:
+        """Whether the log of a beatmapset goes back to its first event, so no scrape is needed."""
+        return set_id in self._complete
+
+    def log_fetch(
+        self, events: List[dict], full: bool = True, contiguous: bool = False
+    ):
+        """Add the raw events of a feed fetch to the logs of their beatmapsets, before any filtering.
+
+        **Parameters:**
+
+        * events - `List[dict]` -- osu! beatmapset event objects, every one that was fetched, oldest first.
+        * full - `bool` | optional -- Whether the fetch included every event type of the nomination history \
+            for every user, otherwise logs of sets still in progress may have gaps. Defaults to True.
+        * contiguous - `bool` | optional -- Whether the fetch picked up right after the previous one, so sets \
+            first seen at a nomination have no earlier history. Defaults to False.
+        """
+        if events or not full:
+            self.changes += 1
+        if not full:
+            for set_id in list(self._complete):
+                entry = self._entries[set_id]
+                if not entry.events or entry.events[-1]["type"] not in FINAL_TYPES:
+                    self._complete.discard(set_id)
+
+        for event in events:
+            set_id = event["beatmapset"]["id"]
+            first_seen = self.get(set_id) is None
+            self.entry(set_id).log(event)
+            if first_seen and full and contiguous and event["type"] == "nominate":
+                self._complete.add(set_id)
+
+    def record(self, event: "EventBase") -> bool:
+        """Add an event to the history of its beatmapset. Data fetched for older events goes stale.
+
+        **Parameters:**
+
+        * event - `abstract.EventBase` -- The event.
+
+        **Returns**
+
+        * `bool` -- Whether the event was new to the store.
+        """
+        entry = self.entry(event.beatmapset.id)
+        if event.id <= entry.last_event_id:
+            return False
+        entry.last_event_id = event.id
+        entry.beatmapset = event.beatmapset
+        self.changes += 1
+        entry.log(event.js)
+        # Qualifications are not yielded by `get_events`, but follow the nomination that caused them.
+        following = event.next_event
+        if (
+            following
+            and following["type"] == "qualify"
+            and following["beatmapset"]["id"] == entry.set_id
+        ):
+            entry.log(following)
+        return True
+
+    async def difficulties(self, event: "EventBase", api) -> List[ApiBeatmap]:
+        """Get the osu! API difficulties of an event's beatmapset, fetching them only if none were fetched for it or a newer event.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * event - `abstract.EventBase` -- The event.
+        * api - `old.APIClient` -- Client to fetch the difficulties with.
+
+        **Returns**
+
+        * `List[ApiBeatmap]` -- The difficulties.
+        """
+        entry = self.entry(event.beatmapset.id)
+        if entry.difficulties is not None and entry.difficulties_for >= event.id:
+            return entry.difficulties
+
+        difficulties = await api.get_beatmaps(s=entry.set_id, fresh=True)
+        if event.id >= entry.difficulties_for:
+            entry.difficulties = difficulties
+            entry.difficulties_for = event.id
+        return difficulties
+
+    async def nomination_history(
+        self, set_id: int, web, users: Dict[int, dict] = None
+    ) -> List[Tuple[str, int]]:
+        """Get the nomination history of a beatmapset from its log, scraping only to complete it.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * set_id - `int` -- ID of the beatmapset.
+        * web - `ABCClient` -- Client to scrape the history with.
+        * users - `Dict[int, dict]` | optional -- If given, filled with the user objects known for the set.
+
+        **Returns**
+
+        * `List[Tuple[str, int]]` -- Event types and IDs of the users triggering them, see `ABCClient.nomination_history`.
+        """
+        entry = self.entry(set_id)
+        if not self.is_complete(set_id):
+            scraped: Dict[int, dict] = dict()
+            for event in await web.beatmapset_events(set_id, users=scraped):
+                entry.log(event)
+            entry.users.update(scraped)
+            self._complete.add(set_id)
+            self.changes += 1
+
+        if users is not None:
+            users.update(entry.users)
+        return entry.history
+
+    def to_dict(self) -> dict:
+        """Serialize the complete logs, and the IDs of the sets with incomplete ones, into a JSON compatible dictionary."""
+        return {
+            "complete": {
+                str(set_id): [[e["id"], e["type"], e["user_id"]] for e in entry.events]
+                for set_id, entry in self._entries.items()
+                if set_id in self._complete
+            },
+            "partial": [
+                set_id for set_id in self._entries if set_id not in self._complete
+            ],
+        }
+
+    def restore(self, js: Optional[dict]):
+        """Add the logs saved by `to_dict`.
+
+        They stay complete only if the feed resumes from the checkpoint they were saved with. Sets saved with
+        an incomplete log are not taken for new ones when the feed sees them again.
+
+        **Parameters:**
+
+        * js - `dict` | optional -- The saved logs, nothing is done if `None`.
+        """
+        js = js or {}
+        for set_id in js.get("partial", []):
+            self.entry(set_id)
+        for set_id, events in js.get("complete", {}).items():
+            entry = self.entry(int(set_id))
+            for event_id, event_type, user_id in events:
+                entry.log({"id": event_id, "type": event_type, "user_id": user_id})
+            self._complete.add(entry.set_id)
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from phillip import helper
+
+
+class Cache(ABC):
+    """Base class of an async key-value cache with expiring entries.
+
+    **Attributes:**
+
+    * hits - `int` -- Number of lookups answered from the cache.
+    * misses - `int` -- Number of lookups that were not in the cache or expired.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a value from the cache. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * key - `str` -- Key of the entry.
+
+        **Returns**
+
+        * `Any` -- The cached value, or `None` if it is missing or expired.
+        """
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float):
+        """Store a value in the cache. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * key - `str` -- Key of the entry.
+        * value - `Any` -- Value to store, must not be `None`.
+        * ttl - `float` -- Seconds until the entry expires.
+        """
+        pass
+
+    @abstractmethod
+    async def clear(self):
+        """Remove every entry from the cache. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*"""
+        pass
+
+    async def flush(self):
+        """Write out any pending changes, for caches that persist. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*"""
+        pass
+
+
+class MemoryCache(Cache):
+    """In-memory cache with least recently used eviction.
+
+    **Parameters:**
+
+    * maxsize - `int` | optional -- Maximum entries to keep, defaults to 1024.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        super().__init__()
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None or item[0] <= time.time():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._data[key] = (time.time() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def clear(self):
+        self._data.clear()
+
+
+class FileCache(MemoryCache):
+    """`MemoryCache` that is mirrored to a JSON file, so restarts start warm.
+
+    The file is rewritten atomically at most once per `flush_delay` seconds after entries are stored, from
+    an executor so the event loop is not blocked, and when `flush` is awaited. Values must be JSON serializable.
+
+    **Parameters:**
+
+    * path - `str` -- Path of the JSON file.
+    * maxsize - `int` | optional -- Maximum entries to keep, defaults to 1024.
+    * flush_delay - `float` | optional -- Seconds to gather stored entries for before writing them, defaults to 1.
+    """
+
+    def __init__(self, path: str, maxsize: int = 1024, flush_delay: float = 1):
+        super().__init__(maxsize)
+        self.path = path
+        self.flush_delay = flush_delay
+        self._pending: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        now = time.time()
+        for key, expires, value in entries[-self.maxsize :]:
+            if expires > now:
+                self._data[key] = (expires, value)
+
+    def _save(self, entries: list):
+        helper.atomic_write(self.path, json.dumps(entries))
+
+    async def _save_later(self):
+        await asyncio.sleep(self.flush_delay)
+        self._pending = None
+        await self.flush()
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await super().set(key, value, ttl)
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._save_later())
+
+    async def clear(self):
+        await super().clear()
+        await self.flush()
+
+    async def flush(self):
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        entries = [
+            [key, expires, value] for key, (expires, value) in self._data.items()
+        ]
+        async with self._lock:
+            # One write at a time, in the order the snapshots were taken.
+            await asyncio.get_event_loop().run_in_executor(None, self._save, entries)
@@ -0,0 +1,169 @@
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from phillip import helper
+
+
+class Checkpoint:
+    """State of the feeds, used to resume after a restart.
+
+    **Parameters:**
+
+    * last_date - `datetime` | optional -- Time of the last processed event.
+    * last_event_id - `int` | optional -- ID of the last processed event.
+    * groups - `Dict[int, List[dict]]` | optional -- Members of each group as osu! user objects, keyed by group ID.
+    * seen - `dict` | optional -- Processed event IDs, as serialized by `dedupe.SeenEvents.to_dict`.
+    * beatmapsets - `dict` | optional -- Beatmapset logs, as serialized by `beatmapsets.BeatmapsetStore.to_dict`.
+    """
+
+    def __init__(
+        self,
+        last_date: datetime = None,
+        last_event_id: int = None,
+        groups: Dict[int, List[dict]] = None,
+        seen: dict = None,
+        beatmapsets: dict = None,
+    ):
+        self.last_date = last_date
+        self.last_event_id = last_event_id
+        self.groups = groups or dict()
+        self.seen = seen
+        self.beatmapsets = beatmapsets
+
+    def to_dict(self, keys: Iterable[str] = None) -> dict:
+        """Serialize the checkpoint into a JSON compatible dictionary.
+
+        **Parameters:**
+
+        * keys - `Iterable[str]` | optional -- Keys of the parts to serialize, defaults to all of them.
+        """
+        js = {
+            "last_date": self.last_date and self.last_date.isoformat(),
+            "last_event_id": self.last_event_id,
+            "groups": {str(gid): users for gid, users in self.groups.items()},
+            "seen": self.seen,
+            "beatmapsets": self.beatmapsets,
+        }
+        if keys is None:
+            return js
+        return {key: js[key] for key in keys}
+
+    @classmethod
+    def from_dict(cls, js: dict) -> "Checkpoint":
+        """Deserialize a checkpoint made by `to_dict`."""
+        last_date = js.get("last_date")
+        return cls(
+            last_date and datetime.fromisoformat(last_date),
+            js.get("last_event_id"),
+            {int(gid): users for gid, users in js.get("groups", {}).items()},
+            js.get("seen"),
+            js.get("beatmapsets"),
+        )
+
+
+class CheckpointStore(ABC):
+    """Base class of a place to keep `Checkpoint` in."""
+
+    @abstractmethod
+    def load(self) -> Optional[Checkpoint]:
+        """Load the saved checkpoint.
+
+        **Returns**
+
+        * `Optional[Checkpoint]` -- The checkpoint, or `None` if nothing is saved yet.
+        """
+        pass
+
+    @abstractmethod
+    def save(self, checkpoint: Checkpoint, keys: Iterable[str] = None):
+        """Replace the saved checkpoint, or only some of its parts. This must be atomic.
+
+        `Phillip` calls it from an executor, one save at a time.
+
+        **Parameters:**
+
+        * checkpoint - `Checkpoint` -- The checkpoint to save.
+        * keys - `Iterable[str]` | optional -- Keys of `Checkpoint.to_dict` to save, the saved value of the others \
+            is kept. Defaults to all of them.
+        """
+        pass
+
+
+class JSONCheckpointStore(CheckpointStore):
+    """Keeps the checkpoint in a JSON file, replaced atomically on every save.
+
+    The encoded value of every part is kept, so a save only encodes the parts it is given.
+
+    **Parameters:**
+
+    * path - `str` -- Path of the JSON file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._parts: Optional[Dict[str, str]] = None
+
+    def _read(self) -> Optional[dict]:
+        try:
+            with open(self.path) as f:
+                js = json.load(f)
+        except FileNotFoundError:
+            js = None
+        self._parts = {key: json.dumps(value) for key, value in (js or {}).items()}
+        return js
+
+    def load(self) -> Optional[Checkpoint]:
+        js = self._read()
+        return None if js is None else Checkpoint.from_dict(js)
+
+    def save(self, checkpoint: Checkpoint, keys: Iterable[str] = None):
+        if self._parts is None:
+            self._read()
+        parts = dict(self._parts)  # type: ignore
+        for key, value in checkpoint.to_dict(keys).items():
+            parts[key] = json.dumps(value)
+        body = ", ".join(f"{json.dumps(key)}: {value}" for key, value in parts.items())
+        helper.atomic_write(self.path, "{" + body + "}")
+        self._parts = parts
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Keeps the checkpoint in a SQLite database, one row per part, every save is a single transaction.
+
+    **Parameters:**
+
+    * path - `str` -- Path of the database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Saves run in an executor thread, one at a time.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoint (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def load(self) -> Optional[Checkpoint]:
+        rows = dict(self._conn.execute("SELECT key, value FROM checkpoint"))
+        if not rows:
+            return None
+        return Checkpoint.from_dict(
+            {key: json.loads(value) for key, value in rows.items()}
+        )
+
+    def save(self, checkpoint: Checkpoint, keys: Iterable[str] = None):
+        rows = [
+            (key, json.dumps(value)) for key, value in checkpoint.to_dict(keys).items()
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO checkpoint (key, value) VALUES (?, ?)", rows
+            )
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
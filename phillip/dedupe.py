@@ -0,0 +1,127 @@
+import base64
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+
+class BloomFilter:
+    """Fixed size set of integers that may answer "seen" for an ID it never saw, but never the other way around.
+
+    With `bits` bits and `hashes` hashes, holding `n` IDs gives false positives at a rate of about
+    `(1 - e^(-hashes * n / bits)) ^ hashes`, e.g. 1% for 100k IDs in 2**20 bits with 7 hashes.
+
+    **Parameters:**
+
+    * bits - `int` | optional -- Size of the filter in bits, defaults to 2**20 (128 KiB).
+    * hashes - `int` | optional -- Bits set per ID, defaults to 7.
+    """
+
+    def __init__(self, bits: int = 2**20, hashes: int = 7):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray((bits + 7) // 8)
+
+    def _positions(self, value: int):
+        digest = hashlib.blake2b(value.to_bytes(8, "little", signed=True)).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, value: int):
+        """Add an ID to the filter."""
+        for pos in self._positions(value):
+            self.data[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value: int) -> bool:
+        return all(
+            self.data[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value)
+        )
+
+    def to_dict(self) -> dict:
+        """Serialize the filter into a JSON compatible dictionary."""
+        return {
+            "bits": self.bits,
+            "hashes": self.hashes,
+            "data": base64.b64encode(bytes(self.data)).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, js: dict) -> "BloomFilter":
+        """Deserialize a filter made by `to_dict`."""
+        bloom = cls(js["bits"], js["hashes"])
+        bloom.data = bytearray(base64.b64decode(js["data"]))
+        return bloom
+
+
+class SeenEvents:
+    """Bounded set of processed osu! event IDs.
+
+    The most recent `capacity` IDs are kept exactly, least recently seen first out. With a `bloom`
+    filter, evicted IDs go into it, so they are still recognized long after; a false positive there
+    skips a new event, size the filter for the horizon you need. Lookups are O(1) either way.
+
+    **Parameters:**
+
+    * capacity - `int` | optional -- IDs to keep exactly, defaults to 10000.
+    * bloom - `BloomFilter` | optional -- Filter remembering the evicted IDs, defaults to none.
+    """
+
+    def __init__(self, capacity: int = 10000, bloom: BloomFilter = None):
+        self.capacity = capacity
+        self.bloom = bloom
+        self._recent: "OrderedDict[int, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def __contains__(self, event_id: int) -> bool:
+        if event_id in self._recent:
+            self._recent.move_to_end(event_id)
+            return True
+        return self.bloom is not None and event_id in self.bloom
+
+    def add(self, event_id: int):
+        """Mark an event ID as processed.
+
+        **Parameters:**
+
+        * event_id - `int` -- ID of the osu! event.
+        """
+        self._recent[event_id] = None
+        self._recent.move_to_end(event_id)
+        while len(self._recent) > self.capacity:
+            evicted, _ = self._recent.popitem(last=False)
+            if self.bloom is not None:
+                self.bloom.add(evicted)
+
+    def clear(self):
+        """Forget every ID."""
+        self._recent.clear()
+        if self.bloom is not None:
+            self.bloom = BloomFilter(self.bloom.bits, self.bloom.hashes)
+
+    def to_dict(self) -> dict:
+        """Serialize the IDs into a JSON compatible dictionary."""
+        return {
+            "recent": list(self._recent),
+            "bloom": self.bloom and self.bloom.to_dict(),
+        }
+
+    def restore(self, js: Optional[dict]):
+        """Add the IDs saved by `to_dict`, keeping this instance's capacity.
+
+        A saved filter replaces the current one only if its size and hashes match, otherwise its IDs are lost.
+
+        **Parameters:**
+
+        * js - `dict` | optional -- The saved IDs, nothing is done if `None`.
+        """
+        if not js:
+            return
+        saved = js.get("bloom")
+        if saved and self.bloom is not None:
+            if (saved["bits"], saved["hashes"]) == (self.bloom.bits, self.bloom.hashes):
+                self.bloom = BloomFilter.from_dict(saved)
+        for event_id in js.get("recent", []):
+            self.add(event_id)
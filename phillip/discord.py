@@ -1,3 +1,6 @@
+import asyncio
+from typing import Dict, List, Optional, Sequence, Tuple
+
 import aiohttp
 
 from phillip.abstract import EventBase
@@ -8,29 +11,191 @@ from phillip.handlers import Handler
 class DiscordHandler(Handler):
     """Discord handler for `Phillip`.
 
+    Embeds are queued and delivered by a background task, up to `MAX_EMBEDS` and `MAX_EMBED_LENGTH` characters
+    of embeds per webhook request. Discord's rate limit headers are respected, and failed requests are retried
+    with exponential backoff. A request Discord rejects as invalid is split in halves that are sent on their own.
+
+    The queue holds at most `max_pending` embeds, then `on_map_event` waits for room, so a slow or unreachable
+    Discord fills the handler's `Dispatcher` queue and its overflow policy applies.
+
     **Parameters:**
 
     * webhook_url - `str` -- Discord webhook url to send
+    * session - `aiohttp.ClientSession` | optional -- Session to post with, defaults to the session of `Phillip`.
+    * max_retries - `int` | optional -- Attempts per webhook request before its embeds are dropped, defaults to 5.
+    * max_pending - `int` | optional -- Embeds to queue before `send` waits for room, defaults to 100.
     """
 
-    def __init__(self, hook_url: str):
+    MAX_EMBEDS = 10
+    MAX_EMBED_LENGTH = 6000
+    MAX_CONTENT_LENGTH = 2000
+    MAX_BACKOFF = 60
+
+    def __init__(
+        self,
+        hook_url: str,
+        session: aiohttp.ClientSession = None,
+        max_retries: int = 5,
+        max_pending: int = 100,
+    ):
         self.hook_url = hook_url
         self.app: Phillip
+        self.max_retries = max_retries
+        self.max_pending = max_pending
+        self._session = session
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._blocked_until = 0.0
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The session used to post to the webhook."""
+        return self._session or self.app.session
 
     async def on_map_event(self, event: EventBase):
-        """Parse beatmap event and send to discord webhook.
+        """Parse beatmap event and queue it to be sent to discord webhook.
 
         **Parameters:**
 
         * event - `EventBase` -- The beatmapset event
         """
         embed = await gen_embed(event, self.app)
-        async with aiohttp.ClientSession() as session:
-            await session.post(
-                self.hook_url,
-                json={"content": event.event_source_url, "embeds": [embed]},
+        await self.send(event.event_source_url, embed)
+
+    async def send(self, content: str, embed: dict):
+        """Queue an embed to be delivered, waiting for room if `max_pending` embeds are queued already.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * content - `str` -- Message content, joined with the content of other embeds in the same request.
+        * embed - `dict` -- Discord embed object.
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.max_pending)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._deliver())
+        await self._queue.put((content, embed))
+
+    async def flush(self):
+        """Wait until every queued embed is delivered or dropped.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+    def _fits(self, batch: Sequence[Tuple[str, dict]]) -> bool:
+        content = sum(len(content) + 1 for content, _ in batch) - 1
+        embeds = sum(embed_length(embed) for _, embed in batch)
+        return (
+            len(batch) <= self.MAX_EMBEDS
+            and content <= self.MAX_CONTENT_LENGTH
+            and embeds <= self.MAX_EMBED_LENGTH
+        )
+
+    async def _deliver(self):
+        carry: Optional[Tuple[str, dict]] = None
+        while True:
+            batch: List[Tuple[str, dict]] = [carry or await self._queue.get()]  # type: ignore
+            carry = None
+            while len(batch) < self.MAX_EMBEDS and not self._queue.empty():  # type: ignore
+                item = self._queue.get_nowait()  # type: ignore
+                if not self._fits(batch + [item]):
+                    carry = item  # Starts the next request.
+                    break
+                batch.append(item)
+
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                await self.app.on_error(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()  # type: ignore
+
+    async def _send_batch(self, batch: List[Tuple[str, dict]]):
+        try:
+            await self._post(
+                {
+                    "content": "\n".join(content for content, _ in batch),
+                    "embeds": [embed for _, embed in batch],
+                }
             )
-        return
+        except aiohttp.ClientResponseError as e:
+            if e.status != 400 or len(batch) == 1:
+                raise
+            # Do not lose the whole batch to one invalid embed.
+            half = len(batch) // 2
+            errors = []
+            for part in (batch[:half], batch[half:]):
+                try:
+                    await self._send_batch(part)
+                except Exception as error:
+                    errors.append(error)
+            if errors:
+                raise errors[0]
+
+    async def _post(self, payload: dict):
+        loop = asyncio.get_event_loop()
+        for attempt in range(self.max_retries):
+            delay = self._blocked_until - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                async with self.session.post(self.hook_url, json=payload) as response:
+                    headers = response.headers
+                    if headers.get("X-RateLimit-Remaining") == "0":
+                        reset_after = float(headers.get("X-RateLimit-Reset-After", 0))
+                        self._blocked_until = loop.time() + reset_after
+
+                    if response.status == 429:
+                        retry_after = await self._retry_after(response)
+                        self._blocked_until = loop.time() + retry_after
+                        continue
+
+                    if response.status < 500:
+                        response.raise_for_status()
+                        return
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                pass
+
+            await asyncio.sleep(min(2**attempt, self.MAX_BACKOFF))
+        raise Exception(f"Could not deliver to webhook after {self.max_retries} tries.")
+
+    @staticmethod
+    async def _retry_after(response: aiohttp.ClientResponse) -> float:
+        try:
+            js = await response.json(content_type=None)
+            return float(js["retry_after"])
+        except (ValueError, TypeError, KeyError):
+            return float(response.headers.get("Retry-After", 1))
+
+
+def embed_length(embed: dict) -> int:
+    """Characters of an embed that count towards Discord's limit per message.
+
+    **Parameters:**
+
+    * embed - `dict` -- Discord embed object.
+
+    **Returns**
+
+    * `int` -- Length of its title, description, field names and values, footer text and author name.
+    """
+    length = len(embed.get("title", "")) + len(embed.get("description", ""))
+    for field in embed.get("fields", []):
+        length += len(field.get("name", "")) + len(field.get("value", ""))
+    length += len(embed.get("footer", {}).get("text", ""))
+    length += len(embed.get("author", {}).get("name", ""))
+    return length
 
 
 def format_message(msg: str) -> str:
@@ -73,11 +238,10 @@ Mapped by {event.beatmapset.creator} **[{']['.join(event.gamemodes)}]**",
     }
 
     if event.event_type not in ["Ranked", "Loved"]:
-        apiuser = (await app.api.get_api("get_user", u=event.user_id))[0]
+        apiuser = (await app.resolve_users([event.user_id]))[event.user_id]
         user = apiuser["username"]
-        user_id = apiuser["user_id"]
         embed_base["footer"] = {
-            "icon_url": f"https://a.ppy.sh/{user_id}",
+            "icon_url": f"https://a.ppy.sh/{event.user_id}",
             "text": f"{user}",
         }
 
@@ -88,14 +252,15 @@ Mapped by {event.beatmapset.creator} **[{']['.join(event.gamemodes)}]**",
 
     if event.event_type == "Ranked":
         users_str = str()
-        history = await app.web.nomination_history(event.beatmapset.id)
+        users: Dict[int, dict] = dict()
+        history = await app.nomination_history(event.beatmapset.id, users=users)
+        users = await app.resolve_users([h[1] for h in history], known=users)
         for history_event in history:
-            user = await app.api.get_api("get_user", u=history_event[1])
-            u_name = user[0]["username"]
-
-            if u_name == "BanchoBot":
+            user = users.get(history_event[1])
+            if not user or user["username"] == "BanchoBot":
                 continue
 
+            u_name = user["username"]
             users_str += f"{action_icons[history_event[0]]} [{u_name}](https://osu.ppy.sh/u/{history_event[1]}) "
 
         embed_base["description"] += "\r\n " + users_str  # type: ignore
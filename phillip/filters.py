@@ -0,0 +1,103 @@
+from typing import TYPE_CHECKING, Dict, Iterable
+
+if TYPE_CHECKING:
+    from phillip.abstract import EventBase
+
+
+class EventFilter:
+    """Declarative filter for map events, every rule is checked at the cheapest stage it can be:
+
+    1. `types` are sent to osu! in the events URL, other events are never downloaded.
+    2. `user_ids`, `mapper_ids` and `beatmapset_ids` are checked on the raw JSON, before any event object is built.
+    3. `event_types` are checked on the event object, before its beatmap is fetched.
+    4. `modes` are checked last, as they need the beatmap from osu! API.
+
+    Empty rules match everything.
+
+    **Parameters:**
+
+    * types - `Iterable[str]` | optional -- osu!web event types to fetch, any of `TYPES`.
+    * event_types - `Iterable[str]` | optional -- Event types as in `EventBase.event_type`, e.g. `qualified` or `popped`.
+    * user_ids - `Iterable[int]` | optional -- Users causing the event, e.g. nominators.
+    * mapper_ids - `Iterable[int]` | optional -- Creators of the beatmapset.
+    * beatmapset_ids - `Iterable[int]` | optional -- Beatmapsets to follow.
+    * modes - `Iterable[str]` | optional -- Game modes, any of `osu`, `taiko`, `catch` and `mania`.
+
+    **Raises:**
+
+    * `ValueError` -- if `types` contains an unknown type.
+    """
+
+    TYPES = ("nominate", "rank", "love", "nomination_reset", "disqualify")
+
+    def __init__(
+        self,
+        types: Iterable[str] = None,
+        event_types: Iterable[str] = None,
+        user_ids: Iterable[int] = None,
+        mapper_ids: Iterable[int] = None,
+        beatmapset_ids: Iterable[int] = None,
+        modes: Iterable[str] = None,
+    ):
+        self.types = frozenset(types or ())
+        unknown = self.types.difference(self.TYPES)
+        if unknown:
+            raise ValueError(f"Unknown event types: {', '.join(sorted(unknown))}")
+
+        self.event_types = frozenset(t.lower() for t in event_types or ())
+        self.user_ids = frozenset(user_ids or ())
+        self.mapper_ids = frozenset(mapper_ids or ())
+        self.beatmapset_ids = frozenset(beatmapset_ids or ())
+        self.modes = frozenset(modes or ())
+
+    def __repr__(self) -> str:
+        rules = ", ".join(
+            f"{name}={sorted(value)}" for name, value in vars(self).items() if value
+        )
+        return f"EventFilter({rules})"
+
+    def query_types(self) -> Dict[str, bool]:
+        """Keyword arguments for `ABCClient.get_events` selecting `types`, empty if all types are wanted."""
+        if not self.types:
+            return dict()
+        return {t: t in self.types for t in self.TYPES}
+
+    def match_raw(self, js: dict) -> bool:
+        """Check the rules that only need the event JSON.
+
+        **Parameters:**
+
+        * js - `dict` -- The event, as returned by osu!web.
+        """
+        if self.user_ids and js.get("user_id") not in self.user_ids:
+            return False
+        beatmapset = js.get("beatmapset") or {}
+        if self.mapper_ids and beatmapset.get("user_id") not in self.mapper_ids:
+            return False
+        if self.beatmapset_ids and beatmapset.get("id") not in self.beatmapset_ids:
+            return False
+        return True
+
+    def match_event(self, event: "EventBase") -> bool:
+        """Check every rule that does not need the beatmap from osu! API.
+
+        **Parameters:**
+
+        * event - `EventBase` -- The event to check.
+        """
+        if self.types and event.js["type"] not in self.types:
+            return False
+        if self.event_types and event.event_type.lower() not in self.event_types:
+            return False
+        return self.match_raw(event.js)
+
+    def match(self, event: "EventBase") -> bool:
+        """Check every rule. The beatmap of the event must be fetched already if `modes` is set.
+
+        **Parameters:**
+
+        * event - `EventBase` -- The event to check.
+        """
+        if not self.match_event(event):
+            return False
+        return not self.modes or bool(self.modes.intersection(event.gamemodes))
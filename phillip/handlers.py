@@ -1,16 +1,273 @@
-from typing import TYPE_CHECKING
+import asyncio
+import os
+import pickle
+import sys
+import traceback
+from collections import deque
+from functools import partial
+from typing import TYPE_CHECKING, Any, Deque, Dict, Optional, Tuple
 
 from pyee import AsyncIOEventEmitter
 
+from phillip import helper
+from phillip.abstract import EventBase
 from phillip.osu.classes.web import GroupUser
 
 if TYPE_CHECKING:
-    from phillip.abstract import EventBase
     from phillip.application import Phillip
+    from phillip.metrics import MetricsRegistry
+
+
+class Dispatcher:
+    """Runs the callbacks of a handler from a bounded queue.
+
+    Callbacks are started in the order they were submitted. With a single worker they also finish in that order.
+    When the queue is full, `overflow` decides what happens:
+
+    * `block` -- `Phillip` waits for the queue to have room before emitting the next event.
+    * `drop_oldest` -- The oldest queued callback is dropped.
+    * `spill` -- Callbacks are written to `spill_path` and read back once the queue has room.
+        Spilled callbacks left over from a previous run are resumed. How far the file was read is kept
+        next to it (`spill_path` + `.offset`), so callbacks read back before a crash are not run again.
+
+    **Parameters:**
+
+    * handler - `Handler` -- The handler to run callbacks of.
+    * maxsize - `int` | optional -- Callbacks to hold in memory, defaults to 100.
+    * workers - `int` | optional -- Callbacks to run at once, defaults to 1.
+    * overflow - `str` | optional -- Overflow policy, defaults to `block`.
+    * spill_path - `str` | optional -- File to spill to, required by the `spill` policy.
+
+    **Attributes:**
+
+    * processed - `int` -- Callbacks that finished running.
+    * dropped - `int` -- Callbacks dropped by the `drop_oldest` policy.
+    * latency - `float` -- Seconds the last callback took to run.
+    * lag - `float` -- Seconds the last callback waited in the queue.
+    """
+
+    OVERFLOW_POLICIES = ("block", "drop_oldest", "spill")
+
+    def __init__(
+        self,
+        handler: "Handler",
+        maxsize: int = 100,
+        workers: int = 1,
+        overflow: str = "block",
+        spill_path: str = None,
+    ):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if overflow == "spill" and not spill_path:
+            raise ValueError("The spill policy requires spill_path.")
+
+        self.handler = handler
+        self.maxsize = maxsize
+        self.workers = workers
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.processed = 0
+        self.dropped = 0
+        self.latency = 0.0
+        self.lag = 0.0
+
+        self._items: Deque[Tuple[str, tuple, float]] = deque()
+        self._spilled = 0
+        self._spill_offset = 0
+        self._active = 0
+        self._tasks: list = []
+        self._changed: Optional[asyncio.Event] = None
+
+    @property
+    def metrics(self) -> Optional["MetricsRegistry"]:
+        """Registry of the handler's app, if it has one."""
+        return getattr(getattr(self.handler, "app", None), "metrics", None)
+
+    @property
+    def depth(self) -> int:
+        """Callbacks waiting to run, including spilled ones."""
+        return len(self._items) + self._spilled
+
+    def submit(self, name: str, *args):
+        """Queue a callback of the handler.
+
+        **Parameters:**
+
+        * name - `str` -- Name of the handler method to call.
+        * \\*args -- Arguments to call it with.
+        """
+        self._start()
+        item = (name, args, asyncio.get_event_loop().time())
+        if len(self._items) >= self.maxsize or self._spilled:
+            if self.overflow == "drop_oldest":
+                self._items.popleft()
+                self.dropped += 1
+                if self.metrics is not None:
+                    self.metrics.counter(
+                        "phillip_handler_dropped_total",
+                        "Callbacks dropped by overflow.",
+                    ).inc(handler=type(self.handler).__name__)
+            elif self.overflow == "spill":
+                self._spill(item)
+                return
+        self._items.append(item)
+        self._notify()
+
+    async def wait_writable(self):
+        """Wait until the queue has room, if the overflow policy is `block`.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        while self.overflow == "block" and self.depth >= self.maxsize:
+            await self._wait_changed()
+
+    async def join(self):
+        """Wait until every queued callback finished running.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        while self.depth or self._active:
+            await self._wait_changed()
+
+    async def close(self):
+        """Stop the workers. Callbacks still queued in memory are discarded, spilled ones are kept on disk.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _start(self):
+        if self._tasks:
+            return
+        self._changed = asyncio.Event()
+        if self.spill_path and os.path.exists(self.spill_path):
+            self._spill_offset = self._read_offset()
+            self._spilled = self._count_spilled()
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    def _notify(self):
+        self._changed.set()  # type: ignore
+
+    async def _wait_changed(self):
+        if self._changed is None:
+            return
+        self._changed.clear()
+        await self._changed.wait()
+
+    def _spill(self, item: Tuple[str, tuple, float]):
+        with open(self.spill_path, "ab") as f:  # type: ignore
+            pickle.dump(item, f)
+        self._spilled += 1
+
+    @property
+    def _offset_path(self) -> str:
+        return self.spill_path + ".offset"  # type: ignore
+
+    def _read_offset(self) -> int:
+        try:
+            with open(self._offset_path) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return 0
+
+    def _count_spilled(self) -> int:
+        count = 0
+        with open(self.spill_path, "rb") as f:  # type: ignore
+            f.seek(self._spill_offset)
+            while True:
+                try:
+                    pickle.load(f)
+                except EOFError:
+                    return count
+                count += 1
+
+    def _unspill(self):
+        with open(self.spill_path, "rb") as f:  # type: ignore
+            f.seek(self._spill_offset)
+            name, args, enqueued = pickle.load(f)
+            self._spill_offset = f.tell()
+        self._spilled -= 1
+        if not self._spilled:
+            if os.path.exists(self._offset_path):
+                os.remove(self._offset_path)
+            os.remove(self.spill_path)  # type: ignore
+            self._spill_offset = 0
+        else:
+            helper.atomic_write(self._offset_path, str(self._spill_offset))
+
+        for arg in args:
+            # The app is not pickled along with events.
+            if isinstance(arg, EventBase) and arg.app is None:
+                arg.app = getattr(self.handler, "app", None)
+        self._items.append((name, args, enqueued))
+
+    async def _work(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            if not self._items and self._spilled:
+                self._unspill()
+            if not self._items:
+                await self._wait_changed()
+                continue
+
+            name, args, enqueued = self._items.popleft()
+            self._active += 1
+            started = loop.time()
+            self.lag = started - enqueued
+            try:
+                await getattr(self.handler, name)(*args)
+            except Exception as e:
+                await self._on_error(e)
+            finally:
+                self.latency = loop.time() - started
+                self.processed += 1
+                self._record(name)
+                self._active -= 1
+                self._notify()
+            # Not when cancelled, callbacks read back now would be lost with the memory queue.
+            if self._spilled and len(self._items) < self.maxsize:
+                self._unspill()
+                self._notify()
+
+    def _record(self, name: str):
+        metrics = self.metrics
+        if metrics is None:
+            return
+        handler = type(self.handler).__name__
+        metrics.histogram(
+            "phillip_handler_seconds", "Time handlers spend in a callback."
+        ).observe(self.latency, handler=handler, callback=name)
+        metrics.histogram(
+            "phillip_handler_lag_seconds", "Time callbacks wait in a handler's queue."
+        ).observe(self.lag, handler=handler)
+
+    async def _on_error(self, error: Exception):
+        app = getattr(self.handler, "app", None)
+        if app is not None:
+            await app.on_error(error)
+        else:
+            traceback.print_exception(
+                type(error), error, error.__traceback__, file=sys.stderr
+            )
 
 
 class Handler:
-    """Handler base for ``Phillip``"""
+    """Handler base for ``Phillip``
+
+    Callbacks run through a `Dispatcher`, configured with the class attributes below.
+
+    **Attributes:**
+
+    * queue_size - `int` -- Callbacks to hold in memory, defaults to 100.
+    * workers - `int` -- Callbacks to run at once, defaults to 1.
+    * overflow - `str` -- What to do when the queue is full, one of `block`, `drop_oldest` or `spill`.
+    * spill_path - `str` -- File to spill to, required by the `spill` policy.
+    """
+
+    queue_size = 100
+    workers = 1
+    overflow = "block"
+    spill_path: Optional[str] = None
 
     def __init__(self):
         self.app: Phillip
@@ -23,22 +280,37 @@ class Handler:
         * emitter - `pyee.AsyncIOEventEmitter` -- Emitter to register.
         """
         self.emitter = emitter
+        self.dispatcher = Dispatcher(
+            self, self.queue_size, self.workers, self.overflow, self.spill_path
+        )
         self._register_events()
 
+    async def close(self):
+        """Function to be called when the app is closing, to clean up or flush anything pending.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        pass
+
     def _register_events(self):
         for func in dir(self):
             if not func.startswith("on_"):
                 continue
+            if getattr(type(self), func) is getattr(Handler, func, None):
+                continue  # Not overridden, nothing to run.
+
+            listener = partial(self.dispatcher.submit, func)
             if func == "on_map_event":
-                self.emitter.on("map_event", getattr(self, func))
+                self.emitter.on("map_event", listener)
             elif func == "on_group_added":
-                self.emitter.on("group_added", getattr(self, func))
+                self.emitter.on("group_added", listener)
             elif func == "on_group_removed":
-                self.emitter.on("group_removed", getattr(self, func))
+                self.emitter.on("group_removed", listener)
+            elif func == "on_group_changed":
+                self.emitter.on("group_changed", listener)
             elif func == "on_group_probation":
-                self.emitter.on("bng_limited", getattr(self, func))
+                self.emitter.on("bng_limited", listener)
             else:
-                self.emitter.on(func.split("_")[-1], getattr(self, func))
+                self.emitter.on(func.split("_")[-1], listener)
 
     async def on_map_event(self, event: "EventBase"):
         """Function to be called when any beatmap event happens."""
@@ -76,6 +348,14 @@ class Handler:
         """Function to be called when someone gets removed from a group."""
         pass
 
+    async def on_group_changed(
+        self, user: GroupUser, changes: Dict[str, Tuple[Any, Any]]
+    ):
+        """Function to be called when the default group, activity or username of a group member changes.
+
+        `changes` maps the attribute name to its `(old, new)` values."""
+        pass
+
     async def on_group_probation(self, user: GroupUser):
         """Function to be called when someone gets added/removed to/from the probation."""
 
@@ -1,13 +1,29 @@
-from typing import List
+import asyncio
+import os
+import tempfile
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
 
+from phillip.osu.classes.web import GroupUser
 
-def has_user(source: dict, target: List[dict]) -> bool:
+if TYPE_CHECKING:
+    from phillip.abstract import EventBase
+
+
+def _user_id(user: Union[dict, GroupUser]) -> int:
+    return user["id"] if isinstance(user, dict) else user.id
+
+
+def has_user(
+    source: Union[dict, GroupUser], target: List[Union[dict, GroupUser]]
+) -> bool:
     """Check if user is inside of another list
 
+    This is a linear scan, use `index_users` and `diff_users` to compare whole groups.
+
     **Parameters:**
 
-    * source - `dict` -- User to be checked.
-    * target - `List[dict]` -- List of users that will be compared to.
+    * source - `dict` | `GroupUser` -- User to be checked.
+    * target - `List[dict]` | `List[GroupUser]` -- List of users that will be compared to.
 
     **Returns**
 
@@ -16,7 +32,175 @@ def has_user(source: dict, target: List[dict]) -> bool:
     if not target:
         return False
 
+    user_id = _user_id(source)
     for user in target:
-        if source["id"] == user["id"]:
+        if user_id == _user_id(user):
             return True
     return False
+
+
+def index_users(users: Iterable[GroupUser]) -> Dict[int, GroupUser]:
+    """Index users by their ID.
+
+    **Parameters:**
+
+    * users - `Iterable[GroupUser]` -- Users to index.
+
+    **Returns**
+
+    * `Dict[int, GroupUser]` -- The users, keyed by ID.
+    """
+    return {user.id: user for user in users}
+
+
+class GroupDiff:
+    """Difference between two snapshots of a group.
+
+    **Attributes:**
+
+    * added - `List[GroupUser]` -- Users that joined the group.
+    * removed - `List[GroupUser]` -- Users that left the group, as they were in the old snapshot.
+    * changed - `List[Tuple[GroupUser, Dict[str, Tuple[Any, Any]]]]` -- Users that stayed but had a tracked attribute changed, \
+        with a dictionary of attribute name to `(old, new)` values.
+    """
+
+    def __init__(
+        self,
+        added: List[GroupUser] = None,
+        removed: List[GroupUser] = None,
+        changed: List[Tuple[GroupUser, Dict[str, Tuple[Any, Any]]]] = None,
+    ):
+        self.added = added or []
+        self.removed = removed or []
+        self.changed = changed or []
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return f"<GroupDiff added={len(self.added)} removed={len(self.removed)} changed={len(self.changed)}>"
+
+
+TRACKED_ATTRIBUTES = ("default_group", "is_active", "username")
+
+
+def diff_users(
+    old: Dict[int, GroupUser],
+    new: Dict[int, GroupUser],
+    attributes: Iterable[str] = TRACKED_ATTRIBUTES,
+) -> GroupDiff:
+    """Compare two snapshots of a group made by `index_users`.
+
+    **Parameters:**
+
+    * old - `Dict[int, GroupUser]` -- Previous snapshot.
+    * new - `Dict[int, GroupUser]` -- Current snapshot.
+    * attributes - `Iterable[str]` | optional -- Attributes to report changes of, defaults to `TRACKED_ATTRIBUTES`.
+
+    **Returns**
+
+    * `GroupDiff` -- The added, removed and changed users.
+    """
+    diff = GroupDiff()
+    diff.added = [user for user_id, user in new.items() if user_id not in old]
+    diff.removed = [user for user_id, user in old.items() if user_id not in new]
+
+    for user_id in old.keys() & new.keys():
+        before, after = old[user_id], new[user_id]
+        changes = dict()
+        for attr in attributes:
+            old_value, new_value = getattr(before, attr), getattr(after, attr)
+            if old_value != new_value:
+                changes[attr] = (old_value, new_value)
+        if changes:
+            diff.changed.append((after, changes))
+    return diff
+
+
+def json_island_span(page: bytes, tag_id: str) -> Optional[Tuple[int, int]]:
+    """Find where the body of a `<script>` tag is, by its id, without parsing the whole page.
+
+    **Parameters:**
+
+    * page - `bytes` -- Raw HTML page.
+    * tag_id - `str` -- The id of the script tag, e.g. `json-events`.
+
+    **Returns**
+
+    * `Optional[Tuple[int, int]]` -- Start and end offset of the tag content, or `None` if it could not be found.
+    """
+    marker = f'id="{tag_id}"'.encode()
+    start = page.find(marker)
+    while start != -1:
+        tag_start = page.rfind(b"<", 0, start)
+        if page.startswith(b"<script", tag_start):
+            body_start = page.find(b">", start) + 1
+            body_end = page.find(b"</script>", body_start)
+            if not body_start or body_end == -1:
+                return None
+            return body_start, body_end
+        start = page.find(marker, start + len(marker))
+    return None
+
+
+def find_json_island(page: bytes, tag_id: str) -> Optional[bytes]:
+    """Find the body of a `<script>` tag by its id, without parsing the whole page.
+
+    **Parameters:**
+
+    * page - `bytes` -- Raw HTML page.
+    * tag_id - `str` -- The id of the script tag, e.g. `json-events`.
+
+    **Returns**
+
+    * `Optional[bytes]` -- Content of the script tag, or `None` if it could not be found.
+    """
+    span = json_island_span(page, tag_id)
+    if span is None:
+        return None
+    return page[span[0] : span[1]]
+
+
+def atomic_write(path: str, data: str):
+    """Write a file atomically, readers see either the old or the new content, never a partial one.
+
+    **Parameters:**
+
+    * path - `str` -- Path of the file.
+    * data - `str` -- New content of the file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+async def enrich_events(events: List["EventBase"], max_concurrency: int = 5):
+    """Fetch beatmap data for all events concurrently.
+    *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+    Events of the same beatmapset share a single request, and at most
+    `max_concurrency` requests are in flight at once.
+
+    **Parameters:**
+
+    * events - `List[EventBase]` -- Events to fetch beatmap data for.
+    * max_concurrency - `int` | optional -- Maximum requests in flight, defaults to 5.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    beatmapsets: Dict[int, List["EventBase"]] = dict()
+    for event in events:
+        beatmapsets.setdefault(event.beatmapset.id, []).append(event)
+
+    async def fetch(group: List["EventBase"]):
+        async with semaphore:
+            beatmap = await group[0].get_beatmap()
+        for event in group[1:]:
+            event._beatmap = beatmap
+
+    await asyncio.gather(*(fetch(group) for group in beatmapsets.values()))
@@ -0,0 +1,363 @@
+import asyncio
+import signal
+import sys
+import time
+import traceback
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+
+import aiohttp
+
+from phillip import helper
+from phillip.abstract import EventBase
+from phillip.application import EPOCH, Phillip
+from phillip.beatmapsets import BeatmapsetStore
+from phillip.cache import Cache
+from phillip.filters import EventFilter
+from phillip.metrics import MetricsRegistry
+from phillip.osu.classes.web import GroupUser
+from phillip.osu.client import OsuClient
+from phillip.osu.new.abstract import NotModified, RateLimited
+from phillip.osu.new.api import APIClient as APIClientV2
+from phillip.osu.new.web import WebClient
+from phillip.osu.old.api import APIClient
+from phillip.polling import PollScheduler
+
+
+class FeedHub:
+    """Fetches the map and group feeds once and fans them out to many `Phillip` pipelines.
+
+    Every pipeline keeps its own handlers, filters and checkpoint, while the session, the clients
+    and the request budget are shared. Upstream requests do not grow with the number of pipelines.
+
+    Each pipeline processes what was fetched in its own task, so a pipeline held up by its handlers
+    does not hold up the others nor the polling. It is skipped until it caught up, and the fetch
+    cursor stays at its last event so it gets the events it missed afterwards.
+
+    ```python
+    hub = FeedHub("0c38a********************")
+    hub.add_pipeline(webhook_url="https://discordapp.com/api/webhooks/...", modes=["mania"])
+    hub.add_pipeline(handlers=[MyHandler()], event_types=["ranked"])
+    hub.run()
+    ```
+
+    **Parameters:**
+
+    * token - `str` -- osu! API token.
+    * loop | optional -- Custom event loop to run on.
+    * session - `aiohttp.ClientSession` | optional -- aiohttp client session to use for http requests.
+    * max_concurrency - `int` | optional -- Maximum osu! API requests in flight while fetching beatmaps of new events, defaults to 5.
+    * cache - `cache.Cache` | optional -- Cache for osu! API responses, defaults to an in-memory cache.
+    * metrics - `metrics.MetricsRegistry` | optional -- Registry shared by the hub and its pipelines.
+    * map_poll - `polling.PollScheduler` | optional -- Decides the wait between map feed polls, defaults to 1 to 15 minutes.
+    * group_poll - `polling.PollScheduler` | optional -- Decides the wait between group feed sweeps, defaults to 5 to 60 minutes.
+    * api_v2 - `osu.new.APIClient` | optional -- osu! API v2 client, preferred over scraping when given.
+    * beatmapsets - `beatmapsets.BeatmapsetStore` | optional -- Beatmapset data shared by the pipelines, defaults to a new store.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        loop=None,
+        session=None,
+        max_concurrency: int = 5,
+        cache: Cache = None,
+        metrics: MetricsRegistry = None,
+        map_poll: PollScheduler = None,
+        group_poll: PollScheduler = None,
+        api_v2: APIClientV2 = None,
+        beatmapsets: BeatmapsetStore = None,
+    ):
+        self.TESTING = False
+        self._closed = False
+        self.apitoken = token
+        self.loop = loop or asyncio.get_event_loop()
+        self.max_concurrency = max_concurrency
+        self.pipelines: List[Phillip] = []
+        self.tasks: List[asyncio.Task] = []
+        self._processing: Dict[Tuple[str, Phillip], asyncio.Task] = dict()
+
+        self.metrics = metrics or MetricsRegistry()
+        self.session = session or aiohttp.ClientSession()
+        self.api = APIClient(
+            self.session, self.apitoken, cache=cache, metrics=self.metrics
+        )
+        self.web = WebClient(self.session, app=self, metrics=self.metrics)
+        self.beatmapsets = beatmapsets or BeatmapsetStore()
+        if api_v2 is not None:
+            api_v2._app = api_v2._app or self
+            self.web = OsuClient(
+                self.web, api=self.api, api_v2=api_v2, metrics=self.metrics
+            )
+
+        self.map_poll = map_poll or PollScheduler(
+            5 * 60, 60, 15 * 60, scheduler=self.web.scheduler
+        )
+        self.group_poll = group_poll or PollScheduler(
+            15 * 60, 5 * 60, 60 * 60, scheduler=self.web.scheduler
+        )
+
+    @property
+    def group_ids(self) -> List[int]:
+        """IDs of every group watched by at least one pipeline."""
+        return list(
+            dict.fromkeys(
+                gid
+                for pipeline in self.pipelines
+                if not pipeline.disable_user
+                for gid in pipeline.group_ids
+            )
+        )
+
+    def add_pipeline(self, **kwargs) -> Phillip:
+        """Create a pipeline fed by this hub.
+
+        **Parameters:**
+
+        * \\*\\*kwargs -- Keyword arguments of `Phillip`, except those for the shared session and clients.
+
+        **Returns**
+
+        * `Phillip` -- The pipeline.
+        """
+        pipeline = Phillip(self.apitoken, loop=self.loop, hub=self, **kwargs)
+        pipeline.TESTING = self.TESTING
+        self.pipelines.append(pipeline)
+        # The new pipeline has not seen the last responses, so they must not be skipped as unchanged.
+        self.web.invalidate()
+        return pipeline
+
+    async def on_error(self, error):
+        """Function to be called if fetching a feed fails.
+
+        **Parameters:**
+
+        * error - `Exception` -- The exception raised.
+        """
+        self.metrics.counter("phillip_errors_total", "Errors by exception type.").inc(
+            error=type(error).__name__
+        )
+        print("An error occured, will keep running anyway.", file=sys.stderr)
+        traceback.print_exception(
+            type(error), error, error.__traceback__, file=sys.stderr
+        )
+
+    def map_cursor(self, pipelines: List[Phillip]) -> Dict[str, Any]:
+        """Arguments for `ABCClient.get_events` covering the pipeline that is furthest behind."""
+        cursors = [pipeline.map_cursor() for pipeline in pipelines]
+        if not cursors or not all(cursors):
+            return dict()
+        if all("since_id" in cursor for cursor in cursors):
+            return dict(since_id=min(cursor["since_id"] for cursor in cursors))
+
+        oldest = min(pipeline.last_date for pipeline in pipelines)
+        return dict(since=oldest) if oldest > EPOCH else dict()
+
+    def query_types(self, pipelines: List[Phillip]) -> Dict[str, bool]:
+        """Arguments for `ABCClient.get_events` selecting the event types any pipeline wants."""
+        types: Set[str] = set()
+        for pipeline in pipelines:
+            if not pipeline.event_filter.types:
+                return dict()
+            types.update(pipeline.event_filter.types)
+        return EventFilter(types=types).query_types()
+
+    def _dispatch(
+        self, feed: str, pipeline: Phillip, process: Callable[..., Awaitable], *args
+    ) -> bool:
+        task = self._processing.get((feed, pipeline))
+        if task is not None and not task.done():
+            return False
+
+        async def run():
+            try:
+                await process(*args)
+            except Exception as e:
+                self.web.invalidate()
+                await pipeline.on_error(e)
+
+        self._processing[(feed, pipeline)] = asyncio.ensure_future(run())
+        return True
+
+    async def join(self):
+        """Wait until every pipeline processed what was fetched for it so far.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        await asyncio.gather(*self._processing.values(), return_exceptions=True)
+
+    def _record_poll(self, feed: str, started: float, found: int):
+        self.metrics.histogram(
+            "phillip_poll_seconds", "Duration of a feed poll, including enrichment."
+        ).observe(time.perf_counter() - started, feed=feed)
+        self.metrics.counter("phillip_polls_total", "Feed polls by outcome.").inc(
+            feed=feed, result="found" if found else "idle"
+        )
+
+    async def check_map_events(self):
+        """Fetch map events once and pass them to every pipeline.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        while not self._closed:
+            found = 0
+            started = time.perf_counter()
+            pipelines = [p for p in self.pipelines if not p.disable_map]
+            events: List[EventBase] = []
+            try:
+                events = [
+                    e
+                    async for e in self.web.get_events(
+                        conditional=True,
+                        beatmapsets=self.beatmapsets,
+                        **self.query_types(pipelines),
+                        **self.map_cursor(pipelines),
+                    )
+                    if any(p.is_new_event(e) for p in pipelines)
+                ]
+                # Only events some pipeline may emit are worth an osu! API request.
+                await helper.enrich_events(
+                    [
+                        e
+                        for e in events
+                        if any(p.event_filter.match_event(e) for p in pipelines)
+                    ],
+                    self.max_concurrency,
+                )
+                found = len(events)
+            except Exception as e:
+                if isinstance(e, RateLimited):
+                    self.map_poll.retry_after(e.retry_after)
+                self.web.invalidate()
+                await self.on_error(e)
+
+            for pipeline in pipelines:
+                if not events:
+                    continue
+                if not self._dispatch(
+                    "map",
+                    pipeline,
+                    pipeline.process_map_events,
+                    events,
+                    self.web.newest_event_id,
+                ):
+                    # Still busy, fetch its events again rather than skipping them as unchanged.
+                    self.web.invalidate()
+
+            self._record_poll("map", started, found)
+            self.map_poll.record(found)
+            if self.TESTING:
+                break
+            await asyncio.sleep(self.map_poll.next_delay())  # pragma: no cover
+
+    async def check_role_change(self):
+        """Fetch every watched group once and pass them to the pipelines watching it.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        while not self._closed:
+            found = 0
+            started = time.perf_counter()
+            group_ids = self.group_ids
+            pipelines = [p for p in self.pipelines if not p.disable_user]
+            results = await asyncio.gather(
+                *(self.web.get_users(gid, conditional=True) for gid in group_ids),
+                return_exceptions=True,
+            )
+            groups: Dict[int, List[GroupUser]] = dict()
+            for gid, result in zip(group_ids, results):
+                if isinstance(result, NotModified):
+                    continue
+                if isinstance(result, Exception):
+                    if isinstance(result, RateLimited):
+                        self.group_poll.retry_after(result.retry_after)
+                    self.web.invalidate(self.web.groups_url + str(gid))
+                    await self.on_error(result)
+                    continue
+                groups[gid] = result
+            found = len(groups)
+
+            for pipeline in pipelines:
+                if not self._dispatch(
+                    "group", pipeline, self._process_groups, pipeline, groups
+                ):
+                    for gid in pipeline.group_ids:
+                        self.web.invalidate(self.web.groups_url + str(gid))
+
+            self._record_poll("group", started, found)
+            self.group_poll.requests_per_poll = len(group_ids)
+            self.group_poll.record(found)
+            if self.TESTING:
+                break
+            await asyncio.sleep(self.group_poll.next_delay())  # pragma: no cover
+
+    async def _process_groups(
+        self, pipeline: Phillip, groups: Dict[int, List[GroupUser]]
+    ):
+        for gid, users in groups.items():
+            if gid not in pipeline.group_ids:
+                continue
+            try:
+                await pipeline.process_group(gid, users)
+            except Exception as e:
+                self.web.invalidate(self.web.groups_url + str(gid))
+                await pipeline.on_error(e)
+        await pipeline.save_checkpoint()
+
+    def start(self):
+        """Start the feed tasks of the hub.
+
+        **Raises:**
+
+        * `Exception` -- if there is no pipeline, or a pipeline has no handlers nor webhook_url.
+        """
+        if not self.pipelines:
+            raise Exception("Requires at least one pipeline.")
+
+        for pipeline in self.pipelines:
+            pipeline.prepare_handlers()
+        if not all(p.disable_map for p in self.pipelines):
+            self.tasks.append(self.loop.create_task(self.check_map_events()))
+        if not all(p.disable_user for p in self.pipelines):
+            self.tasks.append(self.loop.create_task(self.check_role_change()))
+
+    async def close(self, timeout: float = 10):
+        """Cancel all tasks and close every pipeline.
+
+        However, the session and loop is not closed, so you need to do cleanup on your own.
+
+        **Parameters:**
+
+        * timeout - `float` | optional -- Seconds to wait for the handlers' queues to drain, see `Phillip.close`. Defaults to 10.
+        """
+        self._closed = True
+        tasks = self.tasks + list(self._processing.values())
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*(pipeline.close(timeout) for pipeline in self.pipelines))
+        if isinstance(self.web, OsuClient):
+            await self.web.close()
+
+    def run(self):
+        """Start the hub and run the loop until `KeyboardInterrupt`, `SIGINT` or `SIGTERM`."""
+
+        async def _stop():
+            await self.close()
+            await self.session.close()
+            if not self.TESTING:
+                self.loop.stop()
+
+        def stop():
+            asyncio.ensure_future(_stop())
+
+        try:  # pragma: no cover
+            self.loop.add_signal_handler(signal.SIGINT, stop)
+            self.loop.add_signal_handler(signal.SIGTERM, stop)
+        except NotImplementedError:
+            pass
+
+        try:
+            self.start()
+            if not self.TESTING:
+                self.loop.run_forever()
+        except KeyboardInterrupt:  # pragma: no cover
+            print("Exiting...")
+        finally:
+            stop()
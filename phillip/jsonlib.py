@@ -0,0 +1,50 @@
+"""Single JSON decode path for every client.
+
+The fastest installed backend is used: [orjson](https://github.com/ijl/orjson), then
+[ujson](https://github.com/ultrajson/ultrajson), then the standard library. Install one
+of them (e.g. the `speedups` extra, orjson 3.5 or later) to speed up decoding, nothing else has to change.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+JSONData = Union[bytes, bytearray, memoryview, str]
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif ujson is not None:  # pragma: no cover
+    BACKEND = "ujson"
+else:  # pragma: no cover
+    BACKEND = "json"
+
+
+def loads(data: JSONData, backend: str = None) -> Any:
+    """Decode JSON, straight from the response bytes.
+
+    **Parameters:**
+
+    * data - `bytes` | `memoryview` | `str` -- The JSON document. A `memoryview` is decoded without copying with orjson.
+    * backend - `str` | optional -- Backend to use instead of `BACKEND`, one of `orjson`, `ujson` or `json`.
+
+    **Returns**
+
+    * `Any` -- The decoded document.
+    """
+    backend = backend or BACKEND
+    if backend == "orjson":
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    if backend == "ujson":
+        return ujson.loads(data)
+    return json.loads(data)
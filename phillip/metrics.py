@@ -0,0 +1,273 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from aiohttp import web
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in key
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """Base class of a metric, one value is kept per set of labels.
+
+    Everything runs on the event loop, so values are updated without locks.
+
+    **Parameters:**
+
+    * name - `str` -- Name of the metric, as exported.
+    * help - `str` | optional -- Description of the metric.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = dict()
+
+    def get(self, **labels) -> float:
+        """Current value for `labels`, 0 if it was never set."""
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        return [(self.name, key, value) for key, value in self._values.items()]
+
+    def snapshot(self) -> List[dict]:
+        return [
+            {"labels": dict(key), "value": value} for key, value in self._values.items()
+        ]
+
+
+class Counter(Metric):
+    """Value that only goes up, such as a number of requests."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        """Increase the counter of `labels` by `amount`."""
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down, such as a queue depth."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        """Set the gauge of `labels` to `value`."""
+        self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        """Increase the gauge of `labels` by `amount`."""
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Histogram(Metric):
+    """Distribution of observed values, such as request durations.
+
+    **Parameters:**
+
+    * name - `str` -- Name of the metric, as exported.
+    * help - `str` | optional -- Description of the metric.
+    * buckets - `Sequence[float]` | optional -- Upper bounds of the buckets, defaults to `DEFAULT_BUCKETS` (seconds).
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets: Sequence[float] = None):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS)) + (float("inf"),)
+        self._counts: Dict[LabelKey, List[int]] = dict()
+
+    def observe(self, value: float, **labels):
+        """Record `value` for `labels`."""
+        key = _label_key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * len(self.buckets)
+        counts[bisect_left(self.buckets, value)] += 1
+        self._values[key] = self._values.get(key, 0.0) + value
+
+    def time(self, **labels) -> _Timer:
+        """Context manager that observes the seconds spent inside it."""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        """Number of values observed for `labels`."""
+        return sum(self._counts.get(_label_key(labels), ()))
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        samples = []
+        for key, counts in self._counts.items():
+            total = 0
+            for bound, count in zip(self.buckets, counts):
+                total += count
+                samples.append(
+                    (
+                        self.name + "_bucket",
+                        key + (("le", _format_value(bound)),),
+                        total,
+                    )
+                )
+            samples.append((self.name + "_sum", key, self._values[key]))
+            samples.append((self.name + "_count", key, total))
+        return samples
+
+    def snapshot(self) -> List[dict]:
+        return [
+            {
+                "labels": dict(key),
+                "count": sum(counts),
+                "sum": self._values[key],
+                "buckets": dict(zip(self.buckets, counts)),
+            }
+            for key, counts in self._counts.items()
+        ]
+
+
+class MetricsRegistry:
+    """Holds the metrics of an app and exports them.
+
+    Metrics are created on first use, asking again for the same name returns the same metric.
+    Collectors are called right before every export, to sample values that are cheaper to read
+    than to track (e.g. queue depths).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = dict()
+        self._collectors: List[Callable[[], None]] = []
+
+    def _get(self, cls, name: str, help: str, **kwargs) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, help, **kwargs)
+        elif type(metric) is not cls:
+            raise ValueError(f"{name} is already registered as a {metric.type}.")
+        return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        """Get or create a `Counter`."""
+        return self._get(Counter, name, help)  # type: ignore
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        """Get or create a `Gauge`."""
+        return self._get(Gauge, name, help)  # type: ignore
+
+    def histogram(
+        self, name: str, help: str = "", buckets: Sequence[float] = None
+    ) -> Histogram:
+        """Get or create a `Histogram`."""
+        return self._get(Histogram, name, help, buckets=buckets)  # type: ignore
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Call `collector` before every export.
+
+        **Parameters:**
+
+        * collector - `Callable[[], None]` -- Function that updates some metrics, usually gauges.
+        """
+        self._collectors.append(collector)
+
+    def collect(self):
+        """Run all collectors."""
+        for collector in self._collectors:
+            collector()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Current value of every metric.
+
+        **Returns**
+
+        * `Dict[str, dict]` -- Type and values of every metric, keyed by metric name.
+        """
+        self.collect()
+        return {
+            name: {"type": metric.type, "values": metric.snapshot()}
+            for name, metric in self._metrics.items()
+        }
+
+    def to_prometheus(self) -> str:
+        """Export every metric in the Prometheus text format.
+
+        **Returns**
+
+        * `str` -- The exposition text.
+        """
+        self.collect()
+        lines = []
+        for name, metric in self._metrics.items():
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for sample, key, value in metric.samples():
+                lines.append(f"{sample}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(
+        self, host: str = "127.0.0.1", port: int = 9100, path: str = "/metrics"
+    ) -> web.AppRunner:
+        """Serve `to_prometheus` over HTTP.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * host - `str` | optional -- Address to listen on, defaults to localhost only.
+        * port - `int` | optional -- Port to listen on, defaults to 9100.
+        * path - `str` | optional -- Path of the endpoint, defaults to `/metrics`.
+
+        **Returns**
+
+        * `aiohttp.web.AppRunner` -- The running server, call `cleanup()` on it to stop.
+        """
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(
+                text=self.to_prometheus(), content_type="text/plain", charset="utf-8"
+            )
+
+        server = web.Application()
+        server.router.add_get(path, handle)
+        runner = web.AppRunner(server)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
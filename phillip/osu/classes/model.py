@@ -0,0 +1,93 @@
+from typing import Any, Dict, Type
+
+
+class Field:
+    """An attribute of a `Model`, copied from the source dictionary when the model is built.
+
+    **Parameters:**
+
+    * key - `str` | optional -- Key in the source dictionary, defaults to the attribute name.
+    """
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: str = None):
+        self.key = key
+
+    def parse(self, value: Any) -> Any:
+        """Value of the attribute, from the value in the source dictionary."""
+        return value
+
+    def dump(self, value: Any) -> Any:
+        """Value in the source dictionary, from the value of the attribute."""
+        return value
+
+
+class Nested(Field):
+    """A `Field` holding another object, wrapped into `model`.
+
+    **Parameters:**
+
+    * model - `Type[Model]` -- Class to wrap the value in.
+    * key - `str` | optional -- Key in the source dictionary, defaults to the attribute name.
+    """
+
+    __slots__ = ("model",)
+
+    def __init__(self, model: Type["Model"], key: str = None):
+        super().__init__(key)
+        self.model = model
+
+    def parse(self, value: Any) -> Any:
+        return None if value is None else self.model(value)
+
+    def dump(self, value: Any) -> Any:
+        return None if value is None else value.to_dict()
+
+
+class ModelMeta(type):
+    """Turns the `Field` attributes of a `Model` class into its `__slots__`."""
+
+    def __new__(mcs, name, bases, namespace):
+        fields: Dict[str, Field] = dict()
+        for base in reversed(bases):
+            fields.update(getattr(base, "_fields", {}))
+        own = {
+            key: value for key, value in namespace.items() if isinstance(value, Field)
+        }
+        for key, field in own.items():
+            del namespace[key]
+            field.key = field.key or key
+        fields.update(own)
+
+        namespace["__slots__"] = tuple(own)
+        namespace["_fields"] = fields
+        return super().__new__(mcs, name, bases, namespace)
+
+
+class Model(metaclass=ModelMeta):
+    """Base of the osu! object classes.
+
+    A model copies its fields out of the source dictionary into slots and keeps no reference to it,
+    so the rest of the osu! JSON object can be freed.
+
+    **Parameters:**
+
+    * js - `dict` -- The source osu! JSON object.
+    """
+
+    _fields: Dict[str, Field]
+
+    def __init__(self, js: dict):
+        for name, field in self._fields.items():
+            setattr(self, name, field.parse(js.get(field.key)))
+
+    def to_dict(self) -> dict:
+        """The fields of this model as an osu! JSON object."""
+        return {
+            field.key: field.dump(getattr(self, name))
+            for name, field in self._fields.items()
+        }
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {getattr(self, 'id', '')}>"
@@ -0,0 +1,259 @@
+import time
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional, Tuple, Type
+
+from phillip import abstract
+from phillip.metrics import MetricsRegistry
+from phillip.osu.classes.api import Beatmap
+from phillip.osu.classes.web import GroupUser
+from phillip.osu.new.abstract import ABCClient, NotModified
+from phillip.osu.new.api import APIClient as APIClientV2
+from phillip.osu.new.web import WebClient
+from phillip.osu.old.api import APIClient as APIClientV1
+
+
+class SourceStats:
+    """Moving averages of the latency and error rate of one source for one operation.
+
+    **Parameters:**
+
+    * alpha - `float` | optional -- Weight of the newest request in the averages, defaults to 0.2.
+
+    **Attributes:**
+
+    * latency - `Optional[float]` -- Average seconds per successful request, `None` until one succeeded.
+    * error_rate - `float` -- Average share of failed requests, between 0 and 1.
+    * last_failure - `float` -- Monotonic time of the last failure, 0 if none.
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.last_failure = 0.0
+
+    def record(self, seconds: float, ok: bool):
+        """Add the result of a request to the averages."""
+        self.error_rate += self.alpha * ((not ok) - self.error_rate)
+        if ok:
+            if self.latency is None:
+                self.latency = seconds
+            else:
+                self.latency += self.alpha * (seconds - self.latency)
+        else:
+            self.last_failure = time.monotonic()
+
+
+class OsuClient:
+    """Facade over the osu! sources, choosing one per request and failing over to the others.
+
+    It has the surface of `ABCClient` (`get_events`, `get_users`, `nomination_history`, `beatmapset_events`, `invalidate`) plus
+    `get_beatmaps`, `resolve_users` and `close`. osu! API v2 is preferred for events and users when a client for it is given,
+    as its JSON is cheaper than scraped pages and its rate limit is higher; group members and beatmapset discussions
+    are only served as HTML pages, so they are always scraped. Sources are ordered by their average latency for
+    each operation, and a source whose error rate is above `max_error_rate` is only tried last until it has not
+    failed for `cooldown` seconds.
+
+    **Parameters:**
+
+    * web - `WebClient` -- Scraping client, always available as the last resort.
+    * api - `old.APIClient` | optional -- osu! API v1 client, used for beatmaps and as a fallback for users.
+    * api_v2 - `new.APIClient` | optional -- osu! API v2 client.
+    * metrics - `metrics.MetricsRegistry` | optional -- Registry to record the requests of each source in.
+    * max_error_rate - `float` | optional -- Error rate above which a source is unhealthy, defaults to 0.5.
+    * cooldown - `float` | optional -- Seconds after the last failure an unhealthy source is avoided for, defaults to 300.
+    """
+
+    def __init__(
+        self,
+        web: WebClient,
+        api: APIClientV1 = None,
+        api_v2: APIClientV2 = None,
+        metrics: MetricsRegistry = None,
+        max_error_rate: float = 0.5,
+        cooldown: float = 300,
+    ):
+        self.web = web
+        self.api = api
+        self.api_v2 = api_v2
+        self.metrics = metrics or web.metrics
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.stats: Dict[Tuple[str, str], SourceStats] = dict()
+        self._newest_source: ABCClient = web
+
+        self.sources: Dict[str, Any] = dict()
+        if api_v2 is not None:
+            self.sources["api_v2"] = api_v2
+        self.sources["web"] = web
+        if api is not None:
+            self.sources["api_v1"] = api
+
+    @property
+    def scheduler(self):
+        """Request scheduler of the scraping client."""
+        return self.web.scheduler
+
+    @property
+    def events_url(self) -> str:
+        return self.web.events_url
+
+    @property
+    def groups_url(self) -> str:
+        return self.web.groups_url
+
+    @property
+    def newest_event_id(self) -> Optional[int]:
+        """ID of the newest event seen by the source that answered the last `get_events`."""
+        return self._newest_source.newest_event_id
+
+    def healthy(self, source: str, operation: str) -> bool:
+        """Whether `source` is fit to be tried first for `operation`."""
+        stats = self.stats.get((source, operation))
+        if stats is None or stats.error_rate <= self.max_error_rate:
+            return True
+        return time.monotonic() - stats.last_failure > self.cooldown
+
+    def ranked(self, operation: str, candidates: Iterable[str]) -> List[str]:
+        """Order sources for `operation`: healthy ones first, then the fastest. Untried sources go first in their preference
+        order, sources that have only failed go after the ones that succeeded.
+
+        **Parameters:**
+
+        * operation - `str` -- Name of the operation.
+        * candidates - `Iterable[str]` -- Names of the sources able to do it, most preferred first.
+
+        **Returns**
+
+        * `List[str]` -- Names of the sources, in the order to try them.
+        """
+
+        def key(item: Tuple[int, str]):
+            index, source = item
+            stats = self.stats.get((source, operation))
+            if stats is None:
+                return (not self.healthy(source, operation), False, 0.0, index)
+            failed_only = stats.latency is None
+            latency = 0.0 if failed_only else stats.latency
+            return (not self.healthy(source, operation), failed_only, latency, index)
+
+        names = [name for name in candidates if name in self.sources]
+        return [name for _, name in sorted(enumerate(names), key=key)]
+
+    def _record(self, source: str, operation: str, seconds: float, ok: bool):
+        self.stats.setdefault((source, operation), SourceStats()).record(seconds, ok)
+        self.metrics.histogram(
+            "phillip_source_seconds", "Duration of requests per osu! source."
+        ).observe(seconds, source=source, operation=operation)
+        self.metrics.counter(
+            "phillip_source_requests_total", "Requests per osu! source and outcome."
+        ).inc(source=source, operation=operation, result="ok" if ok else "error")
+
+    async def _call(self, operation: str, candidates: Iterable[str], call) -> Any:
+        error: Optional[Exception] = None
+        for name in self.ranked(operation, candidates):
+            started = time.perf_counter()
+            try:
+                result = await call(self.sources[name])
+            except NotModified:
+                self._record(name, operation, time.perf_counter() - started, True)
+                raise
+            except Exception as e:
+                self._record(name, operation, time.perf_counter() - started, False)
+                error = e
+                continue
+            self._record(name, operation, time.perf_counter() - started, True)
+            return result
+        if error is None:
+            raise Exception(f"No source available for {operation}.")
+        raise error
+
+    async def get_events(
+        self, **kwargs
+    ) -> AsyncGenerator[Type[abstract.EventBase], None]:
+        """Get events, see `ABCClient.get_events` for the arguments.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        Events are only yielded once a source returned all of them, so a failing source never yields a partial list.
+        """
+
+        async def call(source: ABCClient):
+            events = [e async for e in source.get_events(**kwargs)]
+            self._newest_source = source
+            return events
+
+        try:
+            events = await self._call("events", ["api_v2", "web"], call)
+        except NotModified:
+            return
+        for event in events:
+            yield event
+
+    async def get_users(
+        self, group_id: int, conditional: bool = False
+    ) -> List[GroupUser]:
+        """Get users inside of a group, see `ABCClient.get_users`.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        return await self._call(
+            "groups",
+            ["web"],
+            lambda source: source.get_users(group_id, conditional=conditional),
+        )
+
+    async def nomination_history(
+        self, mapid: int, users: Dict[int, dict] = None
+    ) -> List[Tuple[str, int]]:
+        """Get nomination history of a beatmap, see `ABCClient.nomination_history`.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        return await self._call(
+            "history",
+            ["web"],
+            lambda source: source.nomination_history(mapid, users=users),
+        )
+
+    async def beatmapset_events(
+        self, mapid: int, users: Dict[int, dict] = None
+    ) -> List[dict]:
+        """Get every event of a beatmapset, see `ABCClient.beatmapset_events`.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        return await self._call(
+            "history",
+            ["web"],
+            lambda source: source.beatmapset_events(mapid, users=users),
+        )
+
+    async def get_beatmaps(self, **kwargs) -> List[Beatmap]:
+        """Get beatmaps from osu! API v1, see `old.APIClient.get_beatmaps`.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        return await self._call(
+            "beatmaps", ["api_v1"], lambda source: source.get_beatmaps(**kwargs)
+        )
+
+    async def resolve_users(
+        self, ids: Iterable[int], known: Dict[int, dict] = None
+    ) -> Dict[int, dict]:
+        """Get many users at once, see `new.APIClient.resolve_users`.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        ids = list(ids)
+        return await self._call(
+            "users",
+            ["api_v2", "api_v1"],
+            lambda source: source.resolve_users(ids, known=known),
+        )
+
+    async def close(self):
+        """Stop the background work of the sources, such as the osu! API v2 token refresh.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        if self.api_v2 is not None:
+            await self.api_v2.close()
+
+    def invalidate(self, uri: str = None):
+        """Forget the validators of every source, see `ABCClient.invalidate`."""
+        for source in self.sources.values():
+            if isinstance(source, ABCClient):
+                source.invalidate(uri)
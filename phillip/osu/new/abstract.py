@@ -1,14 +1,65 @@
+import hashlib
+import time
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, List, Tuple, Type, Union
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 from urllib.parse import urlencode
 
 import aiohttp
 
 from phillip import abstract, classes
+from phillip.filters import EventFilter
+from phillip.metrics import MetricsRegistry
 from phillip.osu.classes.web import GroupUser
 
 if TYPE_CHECKING:
     from phillip.application import Phillip
+    from phillip.beatmapsets import BeatmapsetStore
+
+
+class NotModified(Exception):
+    """Raised by a conditional request when the resource did not change since the last request."""
+
+    def __init__(self, uri: str):
+        super().__init__(f"{uri} is not modified.")
+        self.uri = uri
+
+
+class RateLimited(Exception):
+    """Raised when osu! responds with 429 Too Many Requests.
+
+    **Attributes:**
+
+    * retry_after - `float` -- Seconds the server asked to wait, from the `Retry-After` header.
+    """
+
+    def __init__(self, uri: str, retry_after: float):
+        super().__init__(f"Rate limited on {uri}, retry after {retry_after} seconds.")
+        self.uri = uri
+        self.retry_after = retry_after
+
+    @classmethod
+    def from_headers(cls, uri: str, headers: Mapping[str, str]) -> "RateLimited":
+        value = headers.get("Retry-After", "60")
+        try:
+            retry_after = float(value)
+        except ValueError:
+            # Retry-After may also be an HTTP date.
+            date = parsedate_to_datetime(value)
+            retry_after = (date - datetime.now(timezone.utc)).total_seconds()
+        return cls(uri, max(retry_after, 0))
 
 
 class ABCClient(ABC):
@@ -19,9 +70,26 @@ class ABCClient(ABC):
     }
     TYPES = ["nominate", "rank", "love", "nomination_reset", "disqualify"]
 
-    def __init__(self, session: aiohttp.ClientSession, app: "Phillip" = None):
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        app: "Phillip" = None,
+        metrics: MetricsRegistry = None,
+    ):
         self._app = app
         self._session = session
+        self._validators: Dict[str, Dict[str, Any]] = dict()
+        self.metrics = metrics or MetricsRegistry()
+        self.newest_event_id: Optional[int] = None
+        self._backlog: Optional[Tuple[Optional[int], Optional[datetime], int]] = None
+
+    def _record_request(self, client: str, status: Any, started: float):
+        self.metrics.histogram(
+            "phillip_http_request_seconds", "Duration of HTTP requests."
+        ).observe(time.perf_counter() - started, client=client)
+        self.metrics.counter(
+            "phillip_http_requests_total", "HTTP requests by response status."
+        ).inc(client=client, status=status)
 
     @property
     @abstractmethod
@@ -35,50 +103,138 @@ class ABCClient(ABC):
 
     @abstractmethod
     async def get_json(
-        self, uri: str, json_tag: str
+        self, uri: str, json_tag: str, conditional: bool = False
     ) -> Union[Dict[str, Any], List[dict]]:
+        """Get JSON object from uri. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * uri - `str` -- URL to request.
+        * json_tag - `str` -- Identifier of the JSON object inside the response.
+        * conditional - `bool` | optional -- Send the validators of the previous response, defaults to False.
+
+        **Raises:**
+
+        * `NotModified` -- If conditional and the object did not change since the last request.
+        """
         pass
 
-    async def nomination_history(self, mapid: int) -> List[Tuple[str, int]]:
-        """Get nomination history of a beatmap. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+    def invalidate(self, uri: str = None):
+        """Forget the validators of conditional requests, so the next request is a full one.
+
+        **Parameters:**
+
+        * uri - `str` | optional -- URL to forget, defaults to every URL.
+        """
+        if uri is None:
+            self._validators.clear()
+        else:
+            self._validators.pop(uri, None)
+
+    def _conditional_headers(self, uri: str) -> Dict[str, str]:
+        validator = self._validators.get(uri, {})
+        headers = dict()
+        if "etag" in validator:
+            headers["If-None-Match"] = validator["etag"]
+        if "last_modified" in validator:
+            headers["If-Modified-Since"] = validator["last_modified"]
+        return headers
+
+    def _store_validators(self, uri: str, headers: Mapping[str, str]):
+        validator = self._validators.setdefault(uri, {})
+        if "ETag" in headers:
+            validator["etag"] = headers["ETag"]
+        if "Last-Modified" in headers:
+            validator["last_modified"] = headers["Last-Modified"]
+
+    def _check_digest(self, uri: str, body: bytes):
+        # osu! rarely sends validators, so compare the body itself before decoding it.
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        validator = self._validators.setdefault(uri, {})
+        if validator.get("digest") == digest:
+            raise NotModified(uri)
+        validator["digest"] = digest
+
+    async def beatmapset_events(
+        self, mapid: int, users: Dict[int, dict] = None
+    ) -> List[dict]:
+        """Get every event of a beatmapset from its discussion page. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
 
         **Parameters:**
 
         * mapid - `int` -- Beatmapset ID to gather.
+        * users - `Dict[int, dict]` | optional -- If given, filled with the user objects embedded in the discussion page, keyed by user ID.
 
         **Returns**
 
-        * parent - `List[child]` -- A list containing child tuples.
-            * `child` - `Tuple[str, int]` -- A tuple with a string of event type and user id of user triggering the event.
+        * `List[dict]` -- osu! beatmapset event objects, oldest first.
         """
         uri = f"https://osu.ppy.sh/beatmapsets/{str(mapid)}/discussion"
         set_json = await self.get_json(uri, "json-beatmapset-discussion")
-        js = set_json["beatmapset"]["events"]  # type: ignore
+        if users is not None:
+            for user in set_json["beatmapset"].get("related_users", []):  # type: ignore
+                users[user["id"]] = user
+        return set_json["beatmapset"]["events"]  # type: ignore
 
+    @classmethod
+    def history_from_events(cls, events: List[dict]) -> List[Tuple[str, int]]:
+        """Build the nomination history out of beatmapset events, see `nomination_history`.
+
+        **Parameters:**
+
+        * events - `List[dict]` -- osu! beatmapset event objects of one beatmapset, oldest first.
+
+        **Returns**
+
+        * `List[Tuple[str, int]]` -- Event types and IDs of the users triggering them.
+        """
         history = []
-        for i, event in enumerate(js):
-            if i + 1 != len(js):
-                next_event = js[i + 1]
-            if event["type"] in self.EVENTS:
-                event_name = self.EVENTS[event["type"]]
-                if next_event["type"] == "qualify":
+        for i, event in enumerate(events):
+            next_event = events[i + 1] if i + 1 != len(events) else None
+            if event["type"] in cls.EVENTS:
+                event_name = cls.EVENTS[event["type"]]
+                if next_event and next_event["type"] == "qualify":
                     event_name = "Qualified"
                 history.append((event_name, event["user_id"]))
         return history
 
-    async def get_users(self, group_id: int) -> List[GroupUser]:
+    async def nomination_history(
+        self, mapid: int, users: Dict[int, dict] = None
+    ) -> List[Tuple[str, int]]:
+        """Get nomination history of a beatmap. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * mapid - `int` -- Beatmapset ID to gather.
+        * users - `Dict[int, dict]` | optional -- If given, filled with the user objects embedded in the discussion page, keyed by user ID.
+
+        **Returns**
+
+        * parent - `List[child]` -- A list containing child tuples.
+            * `child` - `Tuple[str, int]` -- A tuple with a string of event type and user id of user triggering the event.
+        """
+        return self.history_from_events(await self.beatmapset_events(mapid, users))
+
+    async def get_users(
+        self, group_id: int, conditional: bool = False
+    ) -> List[GroupUser]:
         """Get users inside of a group. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
 
         **Parameters:**
 
         * group_id - `int` -- The group id.
+        * conditional - `bool` | optional -- Raise `NotModified` if the group did not change since the last conditional request, defaults to False.
+
+        **Raises:**
+
+        * `NotModified` -- If conditional and the group did not change.
 
         **Returns**
 
         * `List[dict]` -- A dictionary containing users' data.
         """
         uri = self.groups_url + str(group_id)
-        users_json = await self.get_json(uri, "json-users")
+        users_json = await self.get_json(uri, "json-users", conditional=conditional)
 
         out = []
         for user in users_json:
@@ -92,10 +248,22 @@ class ABCClient(ABC):
         love: bool = True,
         nomination_reset: bool = True,
         disqualify: bool = True,
+        conditional: bool = False,
+        since_id: int = None,
+        since: datetime = None,
+        max_pages: int = 5,
+        event_filter: EventFilter = None,
+        beatmapsets: "BeatmapsetStore" = None,
         **kwargs,
     ) -> AsyncGenerator[Type[abstract.EventBase], None]:
         """Get events of from osu!website. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
 
+        Without a cursor (`since_id` or `since`), only the latest page is fetched. With one, pages are
+        fetched until an already known event is reached, so bursts bigger than one page are not lost.
+        If `max_pages` runs out first, the next call ignores its cursor and continues from the following
+        page with this one's, until the known event is reached; newer events shift pages, so events may
+        be yielded twice across calls but never skipped.
+
         **Parameters:**
 
         * nominate - `bool` -- Whether to get nomination events or not. **This implies `qualify` event.**
@@ -103,6 +271,13 @@ class ABCClient(ABC):
         * love - `bool` -- Whetger to get loved events or not.
         * nomination_reset - `bool` -- Whether to get nomination reset events or not.
         * disqualify -- `bool` -- Whether to get disqualification events or not.
+        * conditional - `bool` | optional -- Yield nothing if the events did not change since the last conditional request, defaults to False.
+        * since_id - `int` | optional -- ID of the last known event, only newer events are yielded.
+        * since - `datetime` | optional -- Only get events created at or after this time.
+        * max_pages - `int` | optional -- Maximum pages to fetch per call when a cursor is given, defaults to 5.
+        * event_filter - `filters.EventFilter` | optional -- Its `types` replace the type arguments, and events not \
+            matching its raw JSON rules are skipped before being built. `newest_event_id` still covers skipped events.
+        * beatmapsets - `beatmapsets.BeatmapsetStore` | optional -- Store to log every fetched event in, skipped ones included.
 
         **Yields:**
 
@@ -111,16 +286,69 @@ class ABCClient(ABC):
         """
         additions = list()
         types_val = [nominate, rank, love, nomination_reset, disqualify]
+        if event_filter is not None and event_filter.types:
+            types_val = list(event_filter.query_types().values())
 
         for i in range(5):
             additions.append(types_val[i] and self.TYPES[i] or str())
         if types_val[0]:
             additions.append("qualify")
-        extras = urlencode(kwargs)
-        url = self.events_url + "&types%5B%5D=".join(additions) + "&" + extras
 
-        events = await self.get_json(url, "json-events")
-        events.reverse()  # type: ignore
+        first_page = 1
+        if self._backlog is not None:
+            since_id, since, first_page = self._backlog
+            self._backlog = None
+
+        query = dict(kwargs)
+        if since is not None:
+            query["min_date"] = since.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+        paginate = since_id is not None or since is not None
+
+        events: List[dict] = []
+        seen = set()
+        for page in range(first_page, first_page + max_pages):
+            if paginate:
+                query["page"] = page
+            extras = urlencode(query)
+            url = self.events_url + "&types%5B%5D=".join(additions) + "&" + extras
+
+            try:
+                page_events = await self.get_json(
+                    url, "json-events", conditional=conditional and page == 1
+                )
+            except NotModified:
+                return
+
+            reached_known = False
+            for event in page_events:
+                if since_id is not None and event["id"] <= since_id:  # type: ignore
+                    reached_known = True
+                elif event["id"] not in seen:  # type: ignore
+                    # New events push older ones to the next page, skip the repeats.
+                    seen.add(event["id"])  # type: ignore
+                    events.append(event)  # type: ignore
+
+            if not paginate or not page_events or reached_known:
+                break
+        else:
+            # Older events are left, fetch them before anything newer.
+            self._backlog = (since_id, since, first_page + max_pages)
+            self.metrics.counter(
+                "phillip_event_backlog_total",
+                "Event fetches that ran out of pages before reaching a known event.",
+            ).inc()
+        events.reverse()
+        if events:
+            self.newest_event_id = max(self.newest_event_id or 0, events[-1]["id"])
+        if beatmapsets is not None:
+            # Pops and disqualifications left out of the query are missing from the logs. Without a cursor,
+            # or with older pages left, sets may have events before the ones fetched.
+            history_types = [types_val[0], types_val[3], types_val[4]]
+            beatmapsets.log_fetch(
+                events,
+                all(history_types) and not any(kwargs.values()),
+                contiguous=paginate and self._backlog is None,
+            )
 
         event_cases = {
             "nominate": classes.Nominated,
@@ -134,6 +362,8 @@ class ABCClient(ABC):
             action = event["type"]  # type: ignore
             if action == "qualify":
                 continue  # Skip qualified event news
+            if event_filter is not None and not event_filter.match_raw(event):
+                continue
 
             next_map = None
             if i + 1 != len(events):
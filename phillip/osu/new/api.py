@@ -1,15 +1,43 @@
-from typing import TYPE_CHECKING, Any, Dict, List, Union
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Union
+from urllib.parse import urlencode
 
 import aiohttp
 
-from phillip.osu.new.abstract import ABCClient
+from phillip import jsonlib
+from phillip.metrics import MetricsRegistry
+from phillip.osu.new.abstract import ABCClient, NotModified, RateLimited
+from phillip.osu.new.token import TokenManager
 
 if TYPE_CHECKING:
     from phillip.application import Phillip
 
 
 class APIClient(ABCClient):
-    TOKEN_URL = "https://osu.ppy.sh/oauth/token"
+    """osu! API v2 client.
+
+    The OAuth token pair is handled by a `TokenManager`: it is refreshed before it expires, concurrent
+    requests share a single refresh, and a rejected token is refreshed at most `max_retries` times per request.
+
+    **Parameters:**
+
+    * session - `aiohttp.ClientSession` -- aiohttp client session to use for http requests.
+    * client_id - `int` -- OAuth client ID.
+    * client_secret - `str` -- OAuth client secret.
+    * redirect_uri - `str` -- OAuth redirect URI.
+    * access_token - `str` -- Current access token.
+    * refresh_token - `str` -- Current refresh token.
+    * app - `Phillip` | optional -- The app owning this client.
+    * metrics - `metrics.MetricsRegistry` | optional -- Registry to record request timings in.
+    * expires_at - `float` | optional -- UNIX time the access token expires at.
+    * token_path - `str` | optional -- JSON file to save the token pair in, so restarts skip a refresh.
+    * max_retries - `int` | optional -- Token refreshes allowed per request after a 401, defaults to 1.
+    """
+
+    TOKEN_URL = TokenManager.TOKEN_URL
+    USERS_URL = "https://osu.ppy.sh/api/v2/users"
+    USERS_PER_REQUEST = 50
 
     @property
     def events_url(self):
@@ -28,43 +56,120 @@ class APIClient(ABCClient):
         access_token: str,
         refresh_token: str,
         app: "Phillip" = None,
+        metrics: MetricsRegistry = None,
+        expires_at: float = None,
+        token_path: str = None,
+        max_retries: int = 1,
     ):
-        super().__init__(session, app)
-        self._client_id = client_id
-        self._client_secret = client_secret
+        super().__init__(session, app, metrics)
         self._redirect_uri = redirect_uri
-        self._access_token = access_token
-        self._refresh_token = refresh_token
+        self.max_retries = max_retries
+        self.tokens = TokenManager(
+            session,
+            client_id,
+            client_secret,
+            access_token,
+            refresh_token,
+            expires_at=expires_at,
+            path=token_path,
+        )
 
-    @property
-    def _headers(self):
-        return {"Authorization": f"Bearer {self._access_token}"}
+    async def _fetch(
+        self,
+        method: str,
+        url: str,
+        data: dict = None,
+        conditional: bool = False,
+        retries: int = None,
+    ) -> dict:
+        if retries is None:
+            retries = self.max_retries
+        access_token = await self.tokens.get()
+        headers = {"Authorization": f"Bearer {access_token}"}
+        if conditional:
+            headers.update(self._conditional_headers(url))
 
-    async def _fetch(self, method: str, url: str, data: dict = None) -> dict:
-        async with self._session.request(
-            method, url, headers=self._headers
-        ) as response:
-            if response.status == 401:
-                await self._fetch_new_token()
-                return await self._fetch(method, url)
+        started = time.perf_counter()
+        status: Any = "error"
+        try:
+            async with self._session.request(
+                method, url, headers=headers, data=data
+            ) as response:
+                status = response.status
+                if response.status == 401 and retries > 0:
+                    self.tokens.invalidate(access_token)
+                    return await self._fetch(
+                        method, url, data, conditional, retries=retries - 1
+                    )
+                if response.status == 304:
+                    raise NotModified(url)
+                if response.status == 429:
+                    raise RateLimited.from_headers(url, response.headers)
 
-            response.raise_for_status()
-            return await response.json()
+                response.raise_for_status()
+                body = await response.read()
+                if conditional:
+                    self._store_validators(url, response.headers)
+                    self._check_digest(url, body)
+                return jsonlib.loads(body)
+        finally:
+            self._record_request("api_v2", status, started)
 
     async def _fetch_new_token(self):
-        post_data = {
-            "client_id": self._client_id,
-            "client_secret": self._client_secret,
-            "refresh_token": self._refresh_token,
-            "grant_type": "refresh_token",
-        }
-        js = await self._fetch("POST", self.TOKEN_URL, data=post_data)
-        self._access_token: str = js["access_token"]
-        self._refresh_token: str = js["refresh_token"]
+        await self.tokens.refresh()
+
+    async def close(self):
+        """Stop refreshing the token in the background.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        await self.tokens.close()
 
     async def get_json(
-        self, uri: str, json_tag: str
+        self, uri: str, json_tag: str, conditional: bool = False
     ) -> Union[Dict[str, Any], List[dict]]:
-        response = await self._fetch("GET", uri)
+        response = await self._fetch("GET", uri, conditional=conditional)
         json_tag = json_tag[json_tag.find("-") + 1 :]
         return response[json_tag]
+
+    async def resolve_users(
+        self, ids: Iterable[int], known: Dict[int, dict] = None
+    ) -> Dict[int, dict]:
+        """Get many users at once. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        Duplicate IDs are requested only once, up to `USERS_PER_REQUEST` users per request.
+
+        **Parameters:**
+
+        * ids - `Iterable[int]` -- osu! user IDs to resolve.
+        * known - `Dict[int, dict]` | optional -- User objects that are already available, these are not requested again.
+
+        **Returns**
+
+        * `Dict[int, dict]` -- User objects keyed by user ID. Users that could not be found are left out.
+        """
+        known = known or dict()
+        users = dict()
+        missing = []
+        for user_id in dict.fromkeys(ids):
+            if user_id in known:
+                users[user_id] = known[user_id]
+            else:
+                missing.append(user_id)
+
+        chunks = [
+            missing[i : i + self.USERS_PER_REQUEST]
+            for i in range(0, len(missing), self.USERS_PER_REQUEST)
+        ]
+        responses = await asyncio.gather(
+            *(
+                self._fetch(
+                    "GET",
+                    self.USERS_URL + "?" + urlencode([("ids[]", i) for i in chunk]),
+                )
+                for chunk in chunks
+            )
+        )
+        for response in responses:
+            for user in response["users"]:
+                users[user["id"]] = user
+        return users
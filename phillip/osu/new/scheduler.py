@@ -0,0 +1,89 @@
+import asyncio
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+
+
+class RequestScheduler:
+    """Rate limiter that shares its budget fairly between lanes.
+
+    At most `rate_limit` requests are started within any `period` seconds. Waiting requests are
+    granted round-robin between lanes, so a long queue in one lane (e.g. group pages) never starves
+    another (e.g. the events page).
+
+    **Parameters:**
+
+    * rate_limit - `int` | optional -- Requests allowed per period, defaults to 2.
+    * period - `float` | optional -- Length of the period in seconds, defaults to 60.
+    """
+
+    def __init__(self, rate_limit: int = 2, period: float = 60):
+        self.rate_limit = rate_limit
+        self.period = period
+        self._granted: Deque[float] = deque()
+        self._lanes: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for the budget, in all lanes."""
+        return sum(self.lane_depths().values())
+
+    def lane_depths(self) -> Dict[str, int]:
+        """Number of requests waiting for the budget, per lane.
+
+        **Returns**
+
+        * `Dict[str, int]` -- Waiting requests keyed by lane name.
+        """
+        return {
+            lane: sum(not f.done() for f in waiters)
+            for lane, waiters in self._lanes.items()
+        }
+
+    async def acquire(self, lane: str = "default"):
+        """Wait until a request in `lane` may be sent.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * lane - `str` | optional -- Name of the lane the request belongs to.
+        """
+        future = asyncio.get_event_loop().create_future()
+        if lane not in self._lanes:
+            # Lanes that were not served yet go first.
+            self._lanes[lane] = deque()
+            self._lanes.move_to_end(lane, last=False)
+        self._lanes[lane].append(future)
+        self._dispatch()
+        await future
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for lane, waiters in self._lanes.items():
+            while waiters and waiters[0].done():
+                waiters.popleft()  # Cancelled while waiting.
+            if waiters:
+                # Serve the other lanes before coming back to this one.
+                self._lanes.move_to_end(lane)
+                return waiters.popleft()
+        return None
+
+    def _dispatch(self):
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        while self._granted and self._granted[0] <= now - self.period:
+            self._granted.popleft()
+
+        while len(self._granted) < self.rate_limit:
+            future = self._next_waiter()
+            if future is None:
+                break
+            self._granted.append(now)
+            future.set_result(None)
+
+        if self._timer is None and self.queue_depth:
+            delay = self._granted[0] + self.period - now
+            self._timer = loop.call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
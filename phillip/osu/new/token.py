@@ -0,0 +1,172 @@
+import asyncio
+import json
+import time
+from typing import Optional
+
+import aiohttp
+
+from phillip import helper, jsonlib
+
+
+class TokenManager:
+    """Keeps the OAuth token pair of osu! API v2 fresh.
+
+    The access token is refreshed in the background `margin` seconds before it expires. Concurrent
+    callers that need a refresh at the same time share a single request. When `path` is given, the
+    token pair is saved after every refresh and loaded on start, so a restart does not need one.
+
+    **Parameters:**
+
+    * session - `aiohttp.ClientSession` -- aiohttp client session to use for http requests.
+    * client_id - `int` -- OAuth client ID.
+    * client_secret - `str` -- OAuth client secret.
+    * access_token - `str` | optional -- Current access token.
+    * refresh_token - `str` | optional -- Current refresh token.
+    * expires_at - `float` | optional -- UNIX time the access token expires at, unknown tokens are used until rejected.
+    * path - `str` | optional -- JSON file to save the token pair in.
+    * margin - `float` | optional -- Seconds before expiry to refresh at, defaults to 60.
+    """
+
+    TOKEN_URL = "https://osu.ppy.sh/oauth/token"
+    RETRY_DELAY = 30
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        client_id: int,
+        client_secret: str,
+        access_token: str = None,
+        refresh_token: str = None,
+        expires_at: float = None,
+        path: str = None,
+        margin: float = 60,
+    ):
+        self._session = session
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+        self.path = path
+        self.margin = margin
+        self.refreshes = 0
+        self._refreshing: Optional[asyncio.Future] = None
+        self._background: Optional[asyncio.Task] = None
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:  # type: ignore
+                js = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.access_token = js.get("access_token", self.access_token)
+        self.refresh_token = js.get("refresh_token", self.refresh_token)
+        self.expires_at = js.get("expires_at", self.expires_at)
+
+    def _save(self):
+        data = {
+            "access_token": self.access_token,
+            "refresh_token": self.refresh_token,
+            "expires_at": self.expires_at,
+        }
+        helper.atomic_write(self.path, json.dumps(data))  # type: ignore
+
+    @property
+    def expired(self) -> bool:
+        """Whether the access token is missing or expires within `margin` seconds."""
+        if not self.access_token:
+            return True
+        return (
+            self.expires_at is not None and self.expires_at - self.margin <= time.time()
+        )
+
+    async def get(self) -> str:
+        """Get a valid access token, refreshing it first if needed.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Returns**
+
+        * `str` -- The access token.
+        """
+        self._schedule()
+        if self.expired:
+            await self.refresh()
+        return self.access_token  # type: ignore
+
+    def invalidate(self, access_token: str):
+        """Mark `access_token` as rejected, so the next `get` refreshes it.
+        Does nothing if the token was already replaced by another caller's refresh.
+
+        **Parameters:**
+
+        * access_token - `str` -- The token the server rejected.
+        """
+        if access_token == self.access_token:
+            self.expires_at = 0
+
+    async def refresh(self):
+        """Refresh the token pair. Callers arriving while a refresh is running wait for that one.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._refresh())
+            self._refreshing.add_done_callback(self._refresh_done)
+        # A cancelled caller must not cancel the refresh the others are waiting for.
+        await asyncio.shield(self._refreshing)
+
+    def _refresh_done(self, future: asyncio.Future):
+        self._refreshing = None
+        if not future.cancelled() and future.exception() is None:
+            self._schedule(force=True)
+
+    async def _refresh(self):
+        data = {
+            "client_id": self._client_id,
+            "client_secret": self._client_secret,
+            "refresh_token": self.refresh_token,
+            "grant_type": "refresh_token",
+        }
+        async with self._session.post(self.TOKEN_URL, data=data) as response:
+            response.raise_for_status()
+            js = jsonlib.loads(await response.read())
+
+        self.refreshes += 1
+        self.access_token = js["access_token"]
+        self.refresh_token = js.get("refresh_token", self.refresh_token)
+        expires_in = js.get("expires_in")
+        self.expires_at = time.time() + expires_in if expires_in else None
+        if self.path:
+            self._save()
+
+    def _schedule(self, force: bool = False):
+        if self._background is not None and not self._background.done():
+            if not force:
+                return
+            self._background.cancel()
+        if self.expires_at is None:
+            return
+        self._background = asyncio.ensure_future(self._refresh_later())
+
+    async def _refresh_later(self):
+        while True:
+            delay = self.expires_at - self.margin - time.time()  # type: ignore
+            await asyncio.sleep(max(delay, 0))
+            try:
+                await self.refresh()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Callers still refresh on demand, try again later in the background.
+                await asyncio.sleep(self.RETRY_DELAY)
+
+    async def close(self):
+        """Stop refreshing in the background.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+        """
+        if self._background is not None:
+            self._background.cancel()
+            await asyncio.gather(self._background, return_exceptions=True)
+            self._background = None
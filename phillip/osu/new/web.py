@@ -1,13 +1,30 @@
-import json
+import time
 from typing import Any, Dict, List, Union
 
 from asyncio_throttle import Throttler
 from bs4 import BeautifulSoup
 
-from phillip.osu.new.abstract import ABCClient
+from phillip import helper, jsonlib
+from phillip.metrics import MetricsRegistry
+from phillip.osu.new.abstract import ABCClient, NotModified, RateLimited
+from phillip.osu.new.scheduler import RequestScheduler
 
 
 class WebClient(ABCClient):
+    """Client that scrapes the JSON embedded in osu! web pages.
+
+    Requests go through a `RequestScheduler` which shares the rate limit fairly between the events page,
+    group pages and other pages.
+
+    **Parameters:**
+
+    * session - `aiohttp.ClientSession` -- aiohttp client session to use for http requests.
+    * throttler - `Throttler` | optional -- Its `rate_limit` and `period` are used for the scheduler, kept for compatibility.
+    * app - `Phillip` | optional -- The app owning this client.
+    * scheduler - `RequestScheduler` | optional -- Scheduler to share, defaults to one allowing **2 requests/minute**.
+    * metrics - `metrics.MetricsRegistry` | optional -- Registry to record request, scheduler and parsing timings in.
+    """
+
     @property
     def events_url(self):
         return "https://osu.ppy.sh/beatmapsets/events?user=&types%5B%5D="
@@ -16,9 +33,79 @@ class WebClient(ABCClient):
     def groups_url(self):
         return "https://osu.ppy.sh/groups/"
 
-    def __init__(self, session, throttler=None, app=None):
-        super().__init__(session, app)
-        self._throttler = throttler or Throttler(rate_limit=2, period=60)
+    def __init__(
+        self,
+        session,
+        throttler: Throttler = None,
+        app=None,
+        scheduler: RequestScheduler = None,
+        metrics: MetricsRegistry = None,
+    ):
+        super().__init__(session, app, metrics)
+        if scheduler is None:
+            if throttler is not None:
+                scheduler = RequestScheduler(throttler.rate_limit, throttler.period)
+            else:
+                scheduler = RequestScheduler(rate_limit=2, period=60)
+        self.scheduler = scheduler
+        self.metrics.add_collector(self._collect_metrics)
+
+    def _collect_metrics(self):
+        depth = self.metrics.gauge(
+            "phillip_scheduler_queue_depth", "Requests waiting for the rate limit."
+        )
+        for lane, waiting in self.scheduler.lane_depths().items():
+            depth.set(waiting, lane=lane)
+
+    def _lane(self, uri: str) -> str:
+        if uri.startswith(self.events_url):
+            return "events"
+        if uri.startswith(self.groups_url):
+            return "groups"
+        return "pages"
+
+    async def get_raw(self, uri: str, conditional: bool = False) -> bytes:
+        """Receive raw page from uri with rate limit.
+        *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        **Parameters:**
+
+        * uri - `str` -- URL of the page.
+        * conditional - `bool` | optional -- Send the validators of the previous response, defaults to False.
+
+        **Raises:**
+
+        * `NotModified` -- If conditional and the server responded with 304.
+        * `RateLimited` -- If the server responded with 429.
+
+        **Returns**
+
+        * bytes -- Body of the response.
+        """
+        headers = self._conditional_headers(uri) if conditional else {}
+        lane = self._lane(uri)
+        with self.metrics.histogram(
+            "phillip_scheduler_wait_seconds", "Time spent waiting for the rate limit."
+        ).time(lane=lane):
+            await self.scheduler.acquire(lane)
+
+        started = time.perf_counter()
+        status: Any = "error"
+        try:
+            async with self._session.get(
+                uri, cookies={"locale": "en"}, headers=headers
+            ) as site_html:
+                status = site_html.status
+                if site_html.status == 304:
+                    raise NotModified(uri)
+                if site_html.status == 429:
+                    raise RateLimited.from_headers(uri, site_html.headers)
+                site_html.raise_for_status()
+                if conditional:
+                    self._store_validators(uri, site_html.headers)
+                return await site_html.read()
+        finally:
+            self._record_request("web", status, started)
 
     async def get_html(self, uri: str) -> BeautifulSoup:
         """Receive html from uri with rate limit.
@@ -32,13 +119,26 @@ class WebClient(ABCClient):
 
         * BeautifulSoup -- Soup'd html response.
         """
-        async with self._throttler:
-            async with self._session.get(uri, cookies={"locale": "en"}) as site_html:
-                return BeautifulSoup(await site_html.text(), features="html.parser")
+        return BeautifulSoup(await self.get_raw(uri), features="html.parser")
 
     async def get_json(
-        self, uri: str, json_tag: str
+        self, uri: str, json_tag: str, conditional: bool = False
     ) -> Union[Dict[str, Any], List[dict]]:
-        soup = await self.get_html(uri)
-        js_str = soup.find(id=json_tag).string
-        return json.loads(js_str)
+        page = await self.get_raw(uri, conditional=conditional)
+        parse_seconds = self.metrics.histogram(
+            "phillip_parse_seconds", "Time spent finding the JSON in a page."
+        )
+        with parse_seconds.time(parser="island"):
+            span = helper.json_island_span(page, json_tag)
+        if span is not None:
+            # Decode from the response buffer itself rather than a copy of the island.
+            js_str: jsonlib.JSONData = memoryview(page)[span[0] : span[1]]
+        else:
+            # Page layout changed, let BeautifulSoup find it.
+            with parse_seconds.time(parser="soup"):
+                soup = BeautifulSoup(page, features="html.parser")
+                js_str = soup.find(id=json_tag).string.encode()
+        if conditional:
+            # The rest of the page changes on every request (e.g. CSRF token), only compare the JSON.
+            self._check_digest(uri, js_str)
+        return jsonlib.loads(js_str)
@@ -1,24 +1,58 @@
-from typing import List
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List
 from urllib.parse import urlencode
 
 import aiohttp
 
+from phillip import jsonlib
+from phillip.cache import Cache, MemoryCache
+from phillip.metrics import MetricsRegistry
 from phillip.osu.classes.api import Beatmap
 
 
 class APIClient:
-    BASE_URL = "https://osu.ppy.sh/api/"
+    """osu! API v1 client.
+
+    Responses of endpoints listed in `ttl` are cached, so repeated lookups of the same user or beatmapset
+    do not hit the network until the entry expires.
+
+    **Parameters:**
+
+    * session - `aiohttp.ClientSession` -- aiohttp client session to use for http requests.
+    * key - `str` -- osu! API key.
+    * cache - `cache.Cache` | optional -- Cache to store responses in, defaults to a `cache.MemoryCache`.
+    * ttl - `Dict[str, float]` | optional -- Seconds to cache each endpoint for, merged over `TTL`.
+    * metrics - `metrics.MetricsRegistry` | optional -- Registry to record request timings and cache hits in.
+    """
 
-    def __init__(self, session: aiohttp.ClientSession, key: str):
+    BASE_URL = "https://osu.ppy.sh/api/"
+    TTL: Dict[str, float] = {
+        "get_user": 60 * 60,
+        "get_beatmaps": 5 * 60,
+    }
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        key: str,
+        cache: Cache = None,
+        ttl: Dict[str, float] = None,
+        metrics: MetricsRegistry = None,
+    ):
         self._session = session
         self._key = key
+        self.cache = cache or MemoryCache()
+        self.ttl = {**self.TTL, **(ttl or {})}
+        self.metrics = metrics or MetricsRegistry()
 
-    async def get_api(self, endpoint: str, **kwargs) -> List[dict]:
+    async def get_api(self, endpoint: str, fresh: bool = False, **kwargs) -> List[dict]:
         """Request something based on endpoint. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
 
         **Parameters:**
 
         * endpoint - `str` -- The API endpoint, reference could be found in [osu!wiki](https://github.com/ppy/osu-api/wiki).
+        * fresh - `bool` | optional -- Skip the cached response and cache the new one in its place, defaults to False.
         * \*\*kwargs - `dict` | optional -- Keyword arguments that will be passed as a query string.
 
         **Raises:**
@@ -29,19 +63,82 @@ class APIClient:
 
         * `List[dict]` -- API response.
         """
+        ttl = self.ttl.get(endpoint, 0)
+        cache_key = endpoint + "?" + urlencode(sorted(kwargs.items()))
+        if ttl > 0 and not fresh:
+            cached = await self.cache.get(cache_key)
+            self.metrics.counter(
+                "phillip_cache_requests_total",
+                "osu! API lookups answered by the cache.",
+            ).inc(endpoint=endpoint, result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+
         kwargs["k"] = self._key
 
         api_args = urlencode(kwargs)
         api_url = self.BASE_URL + endpoint + "?" + api_args
 
-        async with self._session.get(api_url) as api_res:
-            return await api_res.json()
+        started = time.perf_counter()
+        status: Any = "error"
+        try:
+            async with self._session.get(api_url) as api_res:
+                status = api_res.status
+                response = jsonlib.loads(await api_res.read())
+        finally:
+            self.metrics.histogram(
+                "phillip_http_request_seconds", "Duration of HTTP requests."
+            ).observe(time.perf_counter() - started, client="api_v1")
+            self.metrics.counter(
+                "phillip_http_requests_total", "HTTP requests by response status."
+            ).inc(client="api_v1", status=status)
+
+        # Errors are returned as an object instead of a list, never cache those.
+        if ttl > 0 and isinstance(response, list):
+            await self.cache.set(cache_key, response, ttl)
+        return response
 
     async def get_beatmaps(self, **kwargs) -> List[Beatmap]:
         """Get beatmapset from osu! API. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
 
+        Keyword arguments are passed to `get_api`, including `fresh`.
+
         **Returns**
 
         * `List[Beatmap]` -- Beatmapsets fetched from API.
         """
         return [Beatmap(map) for map in await self.get_api("get_beatmaps", **kwargs)]
+
+    async def resolve_users(
+        self, ids: Iterable[int], known: Dict[int, dict] = None
+    ) -> Dict[int, dict]:
+        """Get many users at once. *This function is a [coroutine](https://docs.python.org/3/library/asyncio-task.html#coroutine).*
+
+        Duplicate IDs are requested only once, and all requests are sent concurrently.
+
+        **Parameters:**
+
+        * ids - `Iterable[int]` -- osu! user IDs to resolve.
+        * known - `Dict[int, dict]` | optional -- User objects that are already available (for example from \
+            `ABCClient.nomination_history`), these are not requested again.
+
+        **Returns**
+
+        * `Dict[int, dict]` -- User objects keyed by user ID. Users that could not be found are left out.
+        """
+        known = known or dict()
+        users = dict()
+        missing = []
+        for user_id in dict.fromkeys(ids):
+            if user_id in known:
+                users[user_id] = known[user_id]
+            else:
+                missing.append(user_id)
+
+        responses = await asyncio.gather(
+            *(self.get_api("get_user", u=user_id) for user_id in missing)
+        )
+        for user_id, response in zip(missing, responses):
+            if response:
+                users[user_id] = response[0]
+        return users
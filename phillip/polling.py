@@ -0,0 +1,92 @@
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from phillip.osu.new.scheduler import RequestScheduler
+
+
+class PollScheduler:
+    """Decides how long to wait between two polls of a feed.
+
+    A poll that found something drops the interval to `min_interval`, every idle poll multiplies it
+    by `backoff` up to `max_interval`. The interval never goes below what the request budget of
+    `scheduler` allows for `requests_per_poll` requests, and a `Retry-After` from the server always wins.
+
+    **Parameters:**
+
+    * interval - `float` -- Seconds to wait before the first result is known.
+    * min_interval - `float` -- Shortest wait in seconds, used while the feed is busy.
+    * max_interval - `float` -- Longest wait in seconds, reached while the feed is idle.
+    * backoff - `float` | optional -- Factor the interval grows by after an idle poll, defaults to 2.
+    * jitter - `float` | optional -- Random spread applied to every wait, as a fraction of it, defaults to 0.1.
+    * requests_per_poll - `int` | optional -- Requests a single poll makes, defaults to 1.
+    * scheduler - `RequestScheduler` | optional -- Request budget the polls are spent from.
+
+    **Attributes:**
+
+    * next_poll - `Optional[datetime]` -- When the next poll is due (UTC), set by `next_delay`.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        min_interval: float,
+        max_interval: float,
+        backoff: float = 2.0,
+        jitter: float = 0.1,
+        requests_per_poll: int = 1,
+        scheduler: RequestScheduler = None,
+    ):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.requests_per_poll = requests_per_poll
+        self.scheduler = scheduler
+        self.next_poll: Optional[datetime] = None
+        self._retry_after = 0.0
+
+    @property
+    def floor(self) -> float:
+        """Shortest wait allowed by `min_interval` and the request budget."""
+        floor = self.min_interval
+        if self.scheduler is not None:
+            budget = self.scheduler.period / self.scheduler.rate_limit
+            floor = max(floor, budget * self.requests_per_poll)
+        return floor
+
+    def record(self, found: int):
+        """Adjust the interval to the result of a poll.
+
+        **Parameters:**
+
+        * found - `int` -- Number of new items the poll returned.
+        """
+        if found:
+            self.interval = self.min_interval
+        else:
+            self.interval = self.interval * self.backoff
+        self.interval = min(max(self.interval, self.floor), self.max_interval)
+
+    def retry_after(self, seconds: float):
+        """Wait at least `seconds` before the next poll, as asked by the server.
+
+        **Parameters:**
+
+        * seconds - `float` -- Value of the `Retry-After` header.
+        """
+        self._retry_after = max(self._retry_after, seconds)
+
+    def next_delay(self) -> float:
+        """Seconds to wait until the next poll, also updating `next_poll`.
+
+        **Returns**
+
+        * `float` -- The delay, with jitter applied.
+        """
+        delay = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        delay = max(delay, self.floor, self._retry_after)
+        self._retry_after = 0.0
+        self.next_poll = datetime.utcnow() + timedelta(seconds=delay)
+        return delay
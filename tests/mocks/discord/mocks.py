@@ -1,19 +1,17 @@
 import json
 from unittest.mock import AsyncMock
 
-from bs4 import BeautifulSoup
-
 with open("tests/mocks/discord/api.json") as f:
     USERS_JSON = json.load(f)
 
-with open("tests/mocks/discord/mocks.html") as f:
-    MOCKS_SOUP = BeautifulSoup(f, "html.parser")
+with open("tests/mocks/discord/mocks.html", "rb") as f:
+    MOCKS_HTML = f.read()
 
-with open("tests/mocks/discord/pop_mock.html") as f:
-    POP_SOUP = BeautifulSoup(f, "html.parser")
+with open("tests/mocks/discord/pop_mock.html", "rb") as f:
+    POP_HTML = f.read()
 
-html_mock = AsyncMock(return_value=MOCKS_SOUP)
-pop_mock = AsyncMock(return_value=POP_SOUP)
+html_mock = AsyncMock(return_value=MOCKS_HTML)
+pop_mock = AsyncMock(return_value=POP_HTML)
 with open("tests/mocks/discord/map.json") as f:
     map_json = json.load(f)
 
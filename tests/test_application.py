@@ -1,4 +1,5 @@
 import asyncio
+import copy
 from datetime import datetime
 from unittest.mock import AsyncMock, Mock
 
@@ -6,9 +7,20 @@ import pytest
 
 from phillip.abstract import EventBase
 from phillip.application import Phillip
+from phillip.checkpoint import JSONCheckpointStore
+from phillip.classes import Ranked
+from phillip.filters import EventFilter
 from phillip.handlers import Handler
 from phillip.osu.classes.web import GroupUser
-from tests.mocks.application import api_mock, bancho_event_mock, events_mock, users_mock
+from tests.mocks.application import (
+    API_JSON,
+    EVENTS_JSON,
+    USERS_JSON,
+    api_mock,
+    bancho_event_mock,
+    events_mock,
+    users_mock,
+)
 
 
 @pytest.fixture
@@ -66,12 +78,14 @@ async def test_mapfeed(client: Phillip):
     client.handlers = []
     client.add_handler(h)
     await asyncio.wait_for(client.check_map_events(), 5)
+    await h.dispatcher.join()
     assert h.working
 
     # Check if current event is before last event
     h.working = False
     client.last_date = datetime.max
     await asyncio.wait_for(client.check_map_events(), 5)
+    await h.dispatcher.join()
     assert not h.working
 
     # Duplicate event
@@ -80,6 +94,7 @@ async def test_mapfeed(client: Phillip):
         "2020-09-29T07:43:31+00:00", "%Y-%m-%dT%H:%M:%S+00:00"
     )
     await asyncio.wait_for(client.check_map_events(), 5)
+    await h.dispatcher.join()
     assert not h.working
 
     # Bancho skipping
@@ -87,10 +102,111 @@ async def test_mapfeed(client: Phillip):
 
     h.working = False
     client.last_date = datetime.min
+    client.last_event_id = None
     await asyncio.wait_for(client.check_map_events(), 5)
+    await h.dispatcher.join()
     assert not h.working
 
 
+@pytest.mark.asyncio
+async def test_mapfeed_same_second(client: Phillip):
+    class TestHandler(Handler):
+        def __init__(self):
+            super().__init__()
+            self.ids = []
+
+        async def on_map_event(self, event: EventBase):
+            self.ids.append(event.id)
+
+    def page(*ids):
+        # Newest first, all created in the same second on the same beatmapset.
+        out = []
+        for event_id in sorted(ids, reverse=True):
+            js = copy.deepcopy(EVENTS_JSON[0])
+            js["id"] = event_id
+            out.append(js)
+        return out
+
+    h = TestHandler()
+    client.add_handler(h)
+    client.api.get_api = api_mock
+    client.web.get_json = AsyncMock(return_value=page(1, 2))
+    await client.check_map_events()
+    client.web.get_json = AsyncMock(return_value=page(1, 2, 3))
+    await client.check_map_events()
+    await h.dispatcher.join()
+    assert h.ids == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_history_from_feed(client: Phillip):
+    set_id = EVENTS_JSON[0]["beatmapset"]["id"]
+
+    def raw(event_id, event_type, user_id):
+        js = copy.deepcopy(EVENTS_JSON[0])
+        js.update(id=event_id, type=event_type, user_id=user_id)
+        return js
+
+    discussion = {"beatmapset": {"events": [raw(1, "nominate", 11)]}}
+    client.web.get_json = AsyncMock(return_value=discussion)
+    client.api.get_api = api_mock
+    assert await client.nomination_history(set_id) == [("Bubbled", 11)]
+
+    # Neither BanchoBot's pop nor anything but bubbles and ranks are emitted, they are still logged.
+    client.event_filter = EventFilter(event_types=["bubbled", "ranked"])
+    client.web.get_json = AsyncMock(
+        return_value=[raw(3, "nominate", 10), raw(2, "nomination_reset", 3)]
+    )
+    await client.check_map_events()
+    client.web.get_json = AsyncMock()
+    history = await client.nomination_history(set_id)
+    assert history == [("Bubbled", 11), ("Popped", 3), ("Bubbled", 10)]
+    client.web.get_json.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_history_without_scrape(client: Phillip):
+    set_id = EVENTS_JSON[0]["beatmapset"]["id"]
+
+    def raw(event_id, event_type, user_id=None):
+        js = copy.deepcopy(EVENTS_JSON[0])
+        js.update(id=event_id, type=event_type, user_id=user_id)
+        return js
+
+    # Nominated and ranked while the feed was running, newest first.
+    client.last_event_id = 1
+    client.api.get_api = api_mock
+    client.web.get_json = AsyncMock(
+        return_value=[raw(3, "nominate", 11), raw(2, "nominate", 10), raw(1, "rank")]
+    )
+    await client.check_map_events()
+    client.web.get_json = AsyncMock(
+        return_value=[raw(5, "rank"), raw(4, "qualify"), raw(3, "nominate", 11)]
+    )
+    await client.check_map_events()
+
+    client.web.get_json = AsyncMock()
+    history = await client.nomination_history(set_id)
+    assert history == [("Bubbled", 10), ("Qualified", 11)]
+    client.web.get_json.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_history_filtered_feed(client: Phillip):
+    set_id = EVENTS_JSON[0]["beatmapset"]["id"]
+    client.event_filter = EventFilter(types=["nominate", "rank"])
+    client.web.get_json = AsyncMock(return_value={"beatmapset": {"events": []}})
+    client.api.get_api = api_mock
+    await client.nomination_history(set_id)
+
+    # Pops are not fetched at all, the log cannot be trusted anymore.
+    client.web.get_json = AsyncMock(return_value=[])
+    await client.check_map_events()
+    client.web.get_json = AsyncMock(return_value={"beatmapset": {"events": []}})
+    await client.nomination_history(set_id)
+    client.web.get_json.assert_awaited_once()
+
+
 @pytest.mark.asyncio
 async def test_mapfeed_on_error(capsys, client: Phillip):
     # TypeError would happen as its not an async generator
@@ -112,18 +228,32 @@ async def test_groupfeed(client: Phillip):
         async def on_group_removed(self, user: GroupUser):
             self.remove_working = True
 
+        async def on_group_changed(self, user: GroupUser, changes: dict):
+            self.changes = changes
+
     client.group_ids = [28]
     client.web.get_json = users_mock
 
     h = TestUserHandler()
     client.add_handler(h)
     await asyncio.wait_for(client.check_role_change(), 5)
+    await h.dispatcher.join()
     assert h.add_working
     assert not h.remove_working
 
-    client.web.get_json = AsyncMock(return_value=[])
+    client.web.get_json = AsyncMock(
+        return_value=[dict(USERS_JSON[0], default_group="nat")]
+    )
     h.add_working = False
     await asyncio.wait_for(client.check_role_change(), 5)
+    await h.dispatcher.join()
+    assert not h.add_working
+    assert not h.remove_working
+    assert h.changes == {"default_group": ("bng", "nat")}
+
+    client.web.get_json = AsyncMock(return_value=[])
+    await asyncio.wait_for(client.check_role_change(), 5)
+    await h.dispatcher.join()
     assert not h.add_working
     assert h.remove_working
 
@@ -136,6 +266,158 @@ async def test_groupfeed_on_error(capsys, client: Phillip):
     assert "error" in err
 
 
+@pytest.mark.asyncio
+async def test_close_stuck_handler(client: Phillip, tmp_path):
+    class StuckHandler(Handler):
+        queue_size = 1
+        overflow = "spill"
+        spill_path = str(tmp_path / "spill")
+
+        async def on_map_event(self, event):
+            await asyncio.Event().wait()
+
+    client.add_handler(StuckHandler())
+    for i in range(3):
+        client.emitter.emit("map_event", i)
+
+    await asyncio.wait_for(client.close(timeout=0.05), 1)
+    # What did not run is kept for the next run.
+    assert (tmp_path / "spill").exists()
+
+
 def test_disabled_check():
     with pytest.raises(Exception):
         Phillip("", disable_groupfeed=True, disable_mapfeed=True).start()
+
+
+@pytest.mark.asyncio
+async def test_enrich_events(client: Phillip):
+    in_flight = 0
+    peak = 0
+
+    async def get_api(endpoint, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return API_JSON
+
+    events = []
+    for set_id in [1, 2, 2, 3, 4]:
+        js = copy.deepcopy(EVENTS_JSON[0])
+        js["beatmapset"]["id"] = set_id
+        events.append(Ranked(js, app=client))
+
+    client.api.get_api = AsyncMock(side_effect=get_api)
+    client.max_concurrency = 2
+    await client.enrich_events(events)
+
+    assert client.api.get_api.await_count == 4
+    assert peak == 2
+    assert events[1].api_beatmap is events[2].api_beatmap
+    assert all(event.gamemodes == ["osu"] for event in events)
+
+
+@pytest.mark.asyncio
+async def test_checkpoint(client: Phillip, tmp_path):
+    store = JSONCheckpointStore(str(tmp_path / "checkpoint.json"))
+    client.checkpoint = store
+    client.group_ids = [28]
+    client.web.get_json = events_mock
+    client.api.get_api = api_mock
+    await client.check_map_events()
+    client.web.get_json = users_mock
+    await client.check_role_change()
+
+    class TestHandler(Handler):
+        working = False
+
+        async def on_map_event(self, event: EventBase):
+            self.working = True
+
+        async def on_group_added(self, user: GroupUser):
+            self.working = True
+
+    h = TestHandler()
+    resumed = Phillip("whatsupslappers", handlers=[h], checkpoint=store)
+    resumed.TESTING = True
+    resumed.group_ids = [28]
+    assert resumed.last_event_id == 2389105
+    assert 2389105 in resumed.seen_events
+
+    resumed.web.get_json = events_mock
+    resumed.api.get_api = api_mock
+    await resumed.check_map_events()
+    resumed.web.get_json = users_mock
+    await resumed.check_role_change()
+    await resumed.session.close()
+    assert not h.working
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_dirty(client: Phillip, tmp_path):
+    class RecordingStore(JSONCheckpointStore):
+        def __init__(self, path):
+            super().__init__(path)
+            self.saved = []
+
+        def save(self, checkpoint, keys=None):
+            self.saved.append(sorted(keys))
+            super().save(checkpoint, keys)
+
+    store = RecordingStore(str(tmp_path / "checkpoint.json"))
+    client.checkpoint = store
+    client.group_ids = [28]
+    client.web.get_json = events_mock
+    client.api.get_api = api_mock
+    await client.check_map_events()
+    client.web.get_json = users_mock
+    await client.check_role_change()
+    await client.check_role_change()
+
+    # The group changed once, the map feed state was saved with the first cycle.
+    assert store.saved == [
+        ["beatmapsets", "groups", "last_date", "last_event_id", "seen"],
+        ["groups"],
+    ]
+    assert store.load().last_event_id == 2389105
+
+
+@pytest.mark.asyncio
+async def test_mapfeed_filters(client: Phillip):
+    class TestHandler(Handler):
+        working = False
+
+        async def on_map_event(self, event: EventBase):
+            self.working = True
+
+    client.web.get_json = events_mock
+    client.api.get_api = api_mock
+    h = TestHandler()
+    client.add_handler(h)
+
+    client.event_filter = EventFilter(modes=["mania"])
+    await client.check_map_events()
+    await h.dispatcher.join()
+    assert not h.working
+    assert client.last_event_id == 2389105
+
+    client.event_filter = EventFilter(event_types=["ranked"], modes=["osu", "mania"])
+    client.last_date = datetime.min
+    client.last_event_id = None
+    client.seen_events.clear()
+    await client.check_map_events()
+    await h.dispatcher.join()
+    assert h.working
+
+
+@pytest.mark.asyncio
+async def test_mapfeed_filter_skips_api(client: Phillip):
+    client.web.get_json = events_mock
+    client.api.get_api = AsyncMock(return_value=API_JSON)
+    client.event_filter = EventFilter(mapper_ids=[1])
+    await client.check_map_events()
+
+    client.api.get_api.assert_not_awaited()
+    assert client.last_event_id == 2389105
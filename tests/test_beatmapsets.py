@@ -0,0 +1,171 @@
+import copy
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from phillip.beatmapsets import BeatmapsetStore
+from phillip.classes import Nominated, Popped, Ranked
+from tests.mocks.application import API_JSON, EVENTS_JSON
+
+TYPES = {Nominated: "nominate", Popped: "nomination_reset", Ranked: "rank"}
+
+
+def raw_event(event_type: str, event_id: int, user_id: int = None, set_id: int = 1):
+    js = copy.deepcopy(EVENTS_JSON[0])
+    js["id"] = event_id
+    js["type"] = event_type
+    js["user_id"] = user_id
+    js["beatmapset"]["id"] = set_id
+    return js
+
+
+def make_event(
+    cls, event_id: int, user_id: int = None, set_id: int = 1, next_event=None
+):
+    return cls(raw_event(TYPES[cls], event_id, user_id, set_id), next_event)
+
+
+def test_record():
+    store = BeatmapsetStore(maxsize=2)
+    assert store.record(make_event(Nominated, 1, 10))
+    assert store.record(make_event(Ranked, 3))
+    assert not store.record(make_event(Nominated, 2, 10))
+
+    entry = store.get(1)
+    assert entry.last_event_id == 3
+    assert [e["type"] for e in entry.events] == ["nominate", "rank"]
+    assert entry.beatmapset.title == "Boss Bitch"
+
+    store.record(make_event(Ranked, 4, set_id=2))
+    store.record(make_event(Ranked, 5, set_id=3))
+    assert store.get(1) is None
+    assert len(store) == 2
+
+
+@pytest.mark.asyncio
+async def test_difficulties():
+    store = BeatmapsetStore()
+    api = AsyncMock()
+    api.get_beatmaps.return_value = API_JSON
+    first = make_event(Nominated, 1)
+    store.record(first)
+
+    assert await store.difficulties(first, api) == API_JSON
+    assert await store.difficulties(first, api) == API_JSON
+    assert api.get_beatmaps.await_count == 1
+
+    # A newer event of the set needs fresh data, an older one can use it.
+    second = make_event(Ranked, 2)
+    store.record(second)
+    await store.difficulties(second, api)
+    await store.difficulties(first, api)
+    assert api.get_beatmaps.await_count == 2
+    # The osu! API cache may still hold the response for the first event.
+    assert api.get_beatmaps.call_args.kwargs["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_history_from_stream():
+    store = BeatmapsetStore()
+    web = AsyncMock()
+    # Nominated after the feed started, in a fetch following the previous one.
+    store.log_fetch([raw_event("nominate", 1, 10)], contiguous=True)
+    store.log_fetch([raw_event("nominate", 3, 11), raw_event("qualify", 4)], True, True)
+    store.log_fetch([raw_event("nomination_reset", 2, 3)], contiguous=True)
+    assert store.is_complete(1)
+    assert await store.nomination_history(1, web) == [
+        ("Bubbled", 10),
+        ("Popped", 3),
+        ("Qualified", 11),
+    ]
+    web.beatmapset_events.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_history_mid_stream():
+    store = BeatmapsetStore()
+    web = AsyncMock()
+    web.beatmapset_events.return_value = [
+        raw_event("nominate", 1, 10),
+        raw_event("nomination_reset", 2, 3),
+    ]
+    # Seen from a pop, or in the first fetch, the set had earlier events.
+    store.log_fetch([raw_event("nomination_reset", 2, 3)], contiguous=True)
+    store.log_fetch([raw_event("nominate", 5, 10, set_id=2)])
+    assert not store.is_complete(1) and not store.is_complete(2)
+
+    await store.nomination_history(1, web)
+    store.log_fetch([raw_event("nominate", 3, 10)], contiguous=True)
+    assert await store.nomination_history(1, web) == [
+        ("Bubbled", 10),
+        ("Popped", 3),
+        ("Bubbled", 10),
+    ]
+    assert web.beatmapset_events.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_history_filtered_fetch():
+    store = BeatmapsetStore()
+    web = AsyncMock()
+    web.beatmapset_events.return_value = []
+    store.log_fetch(
+        [raw_event("nominate", 1, 10), raw_event("nominate", 2, 10, 2)],
+        contiguous=True,
+    )
+    store.log_fetch([raw_event("rank", 3, set_id=2)], contiguous=True)
+
+    # A fetch without pops may have missed one of the set still in progress.
+    store.log_fetch([raw_event("nominate", 4, 11, set_id=3)], False, True)
+    assert not store.is_complete(1) and not store.is_complete(3)
+    assert store.is_complete(2)
+    await store.nomination_history(1, web)
+    await store.nomination_history(2, web)
+    assert web.beatmapset_events.await_count == 1
+
+
+def test_history_checkpoint():
+    store = BeatmapsetStore()
+    store.log_fetch([raw_event("nominate", 1, 10), raw_event("nominate", 2, 10, 2)])
+    store._complete.add(1)
+
+    saved = json.loads(json.dumps(store.to_dict()))
+    assert saved == {"complete": {"1": [[1, "nominate", 10]]}, "partial": [2]}
+    restored = BeatmapsetStore()
+    restored.restore(saved)
+    assert restored.is_complete(1) and not restored.is_complete(2)
+    assert restored.get(1).history == [("Bubbled", 10)]
+
+    # Set 2 was seen before, its new nomination is not its first one.
+    restored.log_fetch([raw_event("nominate", 3, 11, 2)], contiguous=True)
+    assert not restored.is_complete(2)
+
+
+@pytest.mark.asyncio
+async def test_history_backfill():
+    store = BeatmapsetStore()
+    web = AsyncMock()
+
+    async def beatmapset_events(set_id, users=None):
+        users[10] = {"id": 10, "username": "nominator"}
+        return [
+            raw_event("nominate", 1, 10),
+            raw_event("nominate", 4, 11),
+            raw_event("qualify", 5),
+        ]
+
+    web.beatmapset_events.side_effect = beatmapset_events
+    # Qualified before it was first seen, the log has a gap.
+    store.record(make_event(Nominated, 4, 11, next_event=raw_event("qualify", 5)))
+
+    users = {}
+    assert await store.nomination_history(1, web, users=users) == [
+        ("Bubbled", 10),
+        ("Qualified", 11),
+    ]
+    assert users == {10: {"id": 10, "username": "nominator"}}
+
+    store.record(make_event(Ranked, 6))
+    assert len(await store.nomination_history(1, web)) == 2
+    assert web.beatmapset_events.await_count == 1
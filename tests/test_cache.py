@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+
+from phillip import helper
+from phillip.cache import FileCache, MemoryCache
+
+
+@pytest.mark.asyncio
+async def test_memory_expire(monkeypatch):
+    cache = MemoryCache()
+    await cache.set("a", [1], 10)
+    assert await cache.get("a") == [1]
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert await cache.get("a") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_lru():
+    cache = MemoryCache(maxsize=2)
+    await cache.set("a", 1, 60)
+    await cache.set("b", 2, 60)
+    await cache.get("a")
+    await cache.set("c", 3, 60)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert await cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_file_persist(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = FileCache(path)
+    await cache.set("get_user?u=1", [{"username": "peppy"}], 60)
+    await cache.set("get_user?u=2", [{"username": "old"}], -1)
+    await cache.flush()
+
+    warm = FileCache(path)
+    assert len(warm) == 1
+    assert await warm.get("get_user?u=1") == [{"username": "peppy"}]
+
+    await warm.clear()
+    assert len(FileCache(path)) == 0
+
+
+@pytest.mark.asyncio
+async def test_file_batched(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.json")
+    writes = []
+    monkeypatch.setattr(helper, "atomic_write", lambda *args: writes.append(args))
+    cache = FileCache(path, flush_delay=0.01)
+    for i in range(10):
+        await cache.set(f"get_user?u={i}", [{"user_id": i}], 60)
+    assert writes == []
+
+    await asyncio.sleep(0.05)
+    assert len(writes) == 1
+    await cache.flush()
+    assert len(writes) == 2
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytest
+
+from phillip.checkpoint import Checkpoint, JSONCheckpointStore, SQLiteCheckpointStore
+from tests.mocks.application import USERS_JSON
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "json":
+        yield JSONCheckpointStore(str(tmp_path / "checkpoint.json"))
+    else:
+        s = SQLiteCheckpointStore(str(tmp_path / "checkpoint.db"))
+        yield s
+        s.close()
+
+
+def test_empty(store):
+    assert store.load() is None
+
+
+def test_roundtrip(store, tmp_path):
+    date = datetime(2020, 9, 29, 7, 43, 31)
+    store.save(Checkpoint(date, 2389105, {28: USERS_JSON}))
+    store.save(Checkpoint(date, 2389106, {28: USERS_JSON, 32: []}))
+
+    checkpoint = store.load()
+    assert checkpoint.last_date == date
+    assert checkpoint.last_event_id == 2389106
+    assert checkpoint.groups == {28: USERS_JSON, 32: []}
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_partial_save(store):
+    date = datetime(2020, 9, 29, 7, 43, 31)
+    store.save(Checkpoint(date, 2389105, {28: USERS_JSON}, {"recent": [2389105]}))
+    store.save(Checkpoint(last_event_id=2389106), ["last_event_id"])
+
+    checkpoint = store.load()
+    assert checkpoint.last_date == date
+    assert checkpoint.last_event_id == 2389106
+    assert checkpoint.groups == {28: USERS_JSON}
+    assert checkpoint.seen == {"recent": [2389105]}
@@ -0,0 +1,40 @@
+from phillip.dedupe import BloomFilter, SeenEvents
+
+
+def test_lru():
+    seen = SeenEvents(capacity=2)
+    seen.add(1)
+    seen.add(2)
+    assert 1 in seen  # Refreshes 1, so 2 is evicted next.
+    seen.add(3)
+    assert 1 in seen and 3 in seen
+    assert 2 not in seen
+    assert len(seen) == 2
+
+
+def test_bloom():
+    seen = SeenEvents(capacity=2, bloom=BloomFilter(2**12, 4))
+    for event_id in range(100):
+        seen.add(event_id)
+    assert len(seen) == 2
+    assert all(event_id in seen for event_id in range(100))
+    assert sum(event_id in seen for event_id in range(1000, 2000)) < 50
+
+    seen.clear()
+    assert 0 not in seen
+
+
+def test_restore():
+    seen = SeenEvents(capacity=2, bloom=BloomFilter(2**12, 4))
+    for event_id in range(10):
+        seen.add(event_id)
+
+    restored = SeenEvents(capacity=5, bloom=BloomFilter(2**12, 4))
+    restored.restore(seen.to_dict())
+    assert all(event_id in restored for event_id in range(10))
+
+    # A filter of another size can't be reused, only the exact IDs are.
+    resized = SeenEvents(bloom=BloomFilter(2**10, 4))
+    resized.restore(seen.to_dict())
+    assert 8 in resized and 9 in resized
+    assert 0 not in resized
@@ -1,7 +1,10 @@
+import asyncio
 from unittest import mock
 from unittest.mock import AsyncMock
 
 import pytest
+from aioresponses import aioresponses
+from yarl import URL
 
 from phillip.abstract import EventBase
 from phillip.application import Phillip
@@ -15,6 +18,8 @@ from tests.mocks.discord.mocks import (
     popped_map_json,
 )
 
+HOOK_URL = "https://discord.com/api/webhooks/1/token"
+
 
 @pytest.fixture
 async def client(event_loop):
@@ -26,7 +31,7 @@ async def client(event_loop):
 
 @pytest.fixture
 async def event(client: Phillip):
-    client.web.get_html = html_mock
+    client.web.get_raw = html_mock
     events = [e async for e in client.web.get_events()]
     event = events[0]
     event._beatmap = [Beatmap(j) for j in map_json]
@@ -68,11 +73,13 @@ async def test_embed_ranked(client: Phillip, event: EventBase):
                 "url": "https://assets.ppy.sh/beatmaps/1208022/covers/list@2x.jpg?1600690662"
             },
         }
+        # Every nominator is embedded in the discussion page.
+        mock_object.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_embed_pop(client: Phillip):
-    client.web.get_html = pop_mock
+    client.web.get_raw = pop_mock
     events = [e async for e in client.web.get_events()]
     event = events[0]
     event._beatmap = [Beatmap(j) for j in popped_map_json]
@@ -95,9 +102,107 @@ async def test_embed_pop(client: Phillip):
 
 @pytest.mark.asyncio
 async def test_handler(client: Phillip, event: EventBase):
-    h = DiscordHandler("")
+    h = DiscordHandler(HOOK_URL)
     client.add_handler(h)
     with mock.patch.object(client.api, "get_api") as mock_object:
         mock_object.side_effect = get_api
-        with mock.patch("aiohttp.ClientSession.post", new_callable=AsyncMock):
+        with aioresponses() as m:
+            m.post(HOOK_URL, status=204)
+            await h.on_map_event(event)
             await h.on_map_event(event)
+            await h.close()
+
+            requests = m.requests[("POST", URL(HOOK_URL))]
+            assert len(requests) == 1
+            assert len(requests[0].kwargs["json"]["embeds"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_handler_rate_limit(client: Phillip):
+    h = DiscordHandler(HOOK_URL)
+    client.add_handler(h)
+    with aioresponses() as m:
+        m.post(HOOK_URL, status=429, payload={"retry_after": 0.01, "global": False})
+        m.post(
+            HOOK_URL,
+            status=204,
+            headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "0.01"},
+        )
+        m.post(HOOK_URL, status=204)
+        await h.send("first", {})
+        await h.flush()
+        await h.send("second", {})
+        await h.close()
+
+        requests = m.requests[("POST", URL(HOOK_URL))]
+        assert [r.kwargs["json"]["content"] for r in requests] == [
+            "first",
+            "first",
+            "second",
+        ]
+
+
+@pytest.mark.asyncio
+async def test_handler_batch_size(client: Phillip):
+    h = DiscordHandler(HOOK_URL)
+    client.add_handler(h)
+    with aioresponses() as m:
+        m.post(HOOK_URL, status=204, repeat=True)
+        h._queue = asyncio.Queue()
+        for i in range(4):
+            h._queue.put_nowait((str(i), {"description": "x" * 2500}))
+        await h.send("4", {})
+        await h.close()
+
+        requests = m.requests[("POST", URL(HOOK_URL))]
+        assert [r.kwargs["json"]["content"] for r in requests] == ["0\n1", "2\n3\n4"]
+
+
+@pytest.mark.asyncio
+async def test_handler_invalid_embed(capsys, client: Phillip):
+    h = DiscordHandler(HOOK_URL)
+    client.add_handler(h)
+    with aioresponses() as m:
+        for status in [400, 204, 400, 204, 400]:
+            m.post(HOOK_URL, status=status)
+        h._queue = asyncio.Queue()
+        for content in ["first", "second"]:
+            h._queue.put_nowait((content, {}))
+        await h.send("invalid", {})
+        await h.close()
+
+        # Split in halves, only the invalid embed is lost.
+        requests = m.requests[("POST", URL(HOOK_URL))]
+        assert [r.kwargs["json"]["content"] for r in requests] == [
+            "first\nsecond\ninvalid",
+            "first",
+            "second\ninvalid",
+            "second",
+            "invalid",
+        ]
+    _, err = capsys.readouterr()
+    assert "400" in err
+
+
+@pytest.mark.asyncio
+async def test_handler_backpressure(client: Phillip):
+    h = DiscordHandler(HOOK_URL, max_pending=1)
+    client.add_handler(h)
+    posted = asyncio.Event()
+
+    async def post(payload):
+        await posted.wait()
+
+    h._post = AsyncMock(side_effect=post)
+
+    await h.send("first", {})  # Taken by the worker, which waits on Discord.
+    await asyncio.sleep(0)
+    await h.send("second", {})
+    third = asyncio.ensure_future(h.send("third", {}))
+    await asyncio.sleep(0.01)
+    assert not third.done()
+
+    posted.set()
+    await third
+    await h.close()
+    assert sum(len(c.args[0]["embeds"]) for c in h._post.await_args_list) == 3
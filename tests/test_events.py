@@ -4,7 +4,7 @@ from unittest import mock
 
 import pytest
 
-from phillip.abstract import EventBase
+from phillip.abstract import EventBase, parse_time
 from phillip.application import Phillip
 from phillip.classes import Disqualified, Loved, Nominated, Popped, Ranked
 from phillip.osu.classes.web import Discussion, Post
@@ -21,7 +21,7 @@ async def client(event_loop):
 
 @pytest.fixture
 async def events(client: Phillip):
-    client.web.get_html = html_mock
+    client.web.get_raw = html_mock
     events = [e async for e in client.web.get_events()]
     yield events
 
@@ -126,3 +126,28 @@ def test_post(events: List[Type[EventBase]]):
 def test_no_discussion(events: List[Type[EventBase]]):
     event: Ranked = events[-1]
     assert event.discussion is None
+
+
+def test_beatmapset_model(events: List[Type[EventBase]]):
+    beatmapset = events[-1].beatmapset
+    assert beatmapset.user.username == "Plaudible"
+    source = events[-1].js["beatmapset"]
+    assert beatmapset.to_dict()["title"] == source["title"]
+    assert beatmapset.to_dict()["user"]["id"] == source["user"]["id"]
+    assert not hasattr(beatmapset, "__dict__")
+    with pytest.raises(AttributeError):
+        beatmapset.extra = True
+
+
+def test_memoized(events: List[Type[EventBase]]):
+    event = events[5]
+    assert event.beatmapset is event.beatmapset
+    assert event.discussion is event.discussion
+    assert event.time is event.time
+
+
+def test_parse_time():
+    expected = datetime(2020, 9, 29, 7, 43, 31)
+    assert parse_time("2020-09-29T07:43:31+00:00") == expected
+    assert parse_time("2020-09-29T07:43:31Z") == expected
+    assert parse_time("2020-09-29T14:43:31+07:00") == expected
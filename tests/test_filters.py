@@ -0,0 +1,48 @@
+import copy
+
+import pytest
+
+from phillip.classes import Nominated, Ranked
+from phillip.filters import EventFilter
+from tests.mocks.application import EVENTS_JSON
+
+
+def test_query_types():
+    assert EventFilter().query_types() == {}
+    assert EventFilter(types=["nominate", "love"]).query_types() == {
+        "nominate": True,
+        "rank": False,
+        "love": True,
+        "nomination_reset": False,
+        "disqualify": False,
+    }
+    with pytest.raises(ValueError):
+        EventFilter(types=["qualify"])
+
+
+def test_match_raw():
+    js = EVENTS_JSON[0]
+    assert EventFilter().match_raw(js)
+    assert EventFilter(mapper_ids=[7149815], beatmapset_ids=[1107500]).match_raw(js)
+    assert not EventFilter(mapper_ids=[1]).match_raw(js)
+    assert not EventFilter(beatmapset_ids=[1]).match_raw(js)
+    assert not EventFilter(user_ids=[3]).match_raw(js)
+
+
+def test_match():
+    event = Ranked(EVENTS_JSON[0])
+    assert EventFilter(types=["rank"], event_types=["Ranked"]).match_event(event)
+    assert not EventFilter(types=["love"]).match_event(event)
+    assert not EventFilter(event_types=["qualified"]).match_event(event)
+
+    # Modes are only looked at once the other rules pass.
+    assert not EventFilter(event_types=["loved"], modes=["osu"]).match(event)
+    event._beatmap = [type("Beatmap", (), {"mode": "3"})()]
+    assert EventFilter(modes=["mania"]).match(event)
+    assert not EventFilter(modes=["osu"]).match(event)
+
+    nominate = copy.deepcopy(EVENTS_JSON[0])
+    nominate.update(type="nominate", user_id=3)
+    assert EventFilter(event_types=["bubbled"], user_ids=[3]).match_event(
+        Nominated(nominate)
+    )
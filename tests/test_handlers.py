@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+from pyee import AsyncIOEventEmitter
+
+from phillip.handlers import Dispatcher, Handler
+
+
+class RecordingHandler(Handler):
+    def __init__(self):
+        self.seen = []
+        self.gate = asyncio.Event()
+
+    async def on_nominate(self, name):
+        await self.gate.wait()
+        self.seen.append(name)
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_order():
+    h = RecordingHandler()
+    h.register_emitter(AsyncIOEventEmitter())
+    for i in range(5):
+        h.emitter.emit("nominate", i)
+
+    assert h.dispatcher.depth == 5
+    h.gate.set()
+    await asyncio.wait_for(h.dispatcher.join(), 1)
+    assert h.seen == [0, 1, 2, 3, 4]
+    assert h.dispatcher.processed == 5
+    await h.dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_drop_oldest():
+    h = RecordingHandler()
+    dispatcher = Dispatcher(h, maxsize=2, overflow="drop_oldest")
+    for i in range(5):
+        dispatcher.submit("on_nominate", i)
+    await asyncio.sleep(0)
+
+    # The worker holds the first callback, the queue keeps the two newest.
+    dispatcher.submit("on_nominate", 5)
+    h.gate.set()
+    await asyncio.wait_for(dispatcher.join(), 1)
+    assert h.seen[-2:] == [4, 5]
+    assert dispatcher.dropped == 3
+    await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_spill(tmp_path):
+    path = str(tmp_path / "spill")
+    h = RecordingHandler()
+    dispatcher = Dispatcher(h, maxsize=2, overflow="spill", spill_path=path)
+    for i in range(6):
+        dispatcher.submit("on_nominate", i)
+
+    assert dispatcher.depth == 6
+    await dispatcher.close()
+
+    # Spilled callbacks are resumed by the next dispatcher.
+    h = RecordingHandler()
+    h.gate.set()
+    dispatcher = Dispatcher(h, maxsize=2, overflow="spill", spill_path=path)
+    dispatcher.submit("on_nominate", 6)
+    await asyncio.wait_for(dispatcher.join(), 1)
+    assert h.seen == [2, 3, 4, 5, 6]
+    assert not (tmp_path / "spill").exists()
+    await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_spill_crash(tmp_path):
+    class StuckHandler(Handler):
+        def __init__(self):
+            super().__init__()
+            self.seen = []
+
+        async def on_nominate(self, value):
+            if value == 2:
+                await asyncio.Event().wait()
+            self.seen.append(value)
+
+    path = str(tmp_path / "spill")
+    h = StuckHandler()
+    dispatcher = Dispatcher(h, maxsize=1, overflow="spill", spill_path=path)
+    for i in range(5):
+        dispatcher.submit("on_nominate", i)
+    # 1 and 2 were read back from the file, then the process dies while running 2.
+    await asyncio.sleep(0.01)
+    assert h.seen == [0, 1]
+    await dispatcher.close()
+
+    h = RecordingHandler()
+    h.gate.set()
+    dispatcher = Dispatcher(h, maxsize=1, overflow="spill", spill_path=path)
+    dispatcher.submit("on_nominate", 5)
+    await asyncio.wait_for(dispatcher.join(), 1)
+    assert h.seen == [3, 4, 5]
+    assert not (tmp_path / "spill.offset").exists()
+    await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_block():
+    h = RecordingHandler()
+    dispatcher = Dispatcher(h, maxsize=1)
+    dispatcher.submit("on_nominate", 0)
+    dispatcher.submit("on_nominate", 1)
+
+    waiter = asyncio.ensure_future(dispatcher.wait_writable())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    h.gate.set()
+    await asyncio.wait_for(waiter, 1)
+    await dispatcher.join()
+    assert h.seen == [0, 1]
+    await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_error(capsys):
+    class FailingHandler(Handler):
+        async def on_nominate(self, name):
+            raise ValueError(name)
+
+    dispatcher = Dispatcher(FailingHandler())
+    dispatcher.submit("on_nominate", "broken")
+    await asyncio.wait_for(dispatcher.join(), 1)
+    _, err = capsys.readouterr()
+    assert "ValueError: broken" in err
+    await dispatcher.close()
+
+
+def test_dispatcher_policy():
+    with pytest.raises(ValueError):
+        Dispatcher(Handler(), overflow="unknown")
+    with pytest.raises(ValueError):
+        Dispatcher(Handler(), overflow="spill")
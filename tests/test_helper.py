@@ -1,4 +1,6 @@
-from phillip.helper import has_user
+from phillip.helper import diff_users, find_json_island, has_user, index_users
+from phillip.osu.classes.web import GroupUser
+from tests.mocks.application import USERS_JSON
 
 
 def test_empty_target():
@@ -11,3 +13,33 @@ def test_find_user():
 
 def test_no_user():
     assert not has_user({"id": 99}, [{"id": 1}])
+
+
+def test_json_island():
+    page = b'<div id="json-events"></div><script id="json-events" type="application/json">[1]</script>'
+    assert find_json_island(page, "json-events") == b"[1]"
+
+
+def test_json_island_missing():
+    assert find_json_island(b"<script>[]</script>", "json-events") is None
+    assert find_json_island(b'<script id="json-events">[', "json-events") is None
+
+
+def test_has_group_user():
+    users = [GroupUser(user) for user in USERS_JSON]
+    assert has_user(users[0], users)
+    assert has_user({"id": 3378391}, users)
+
+
+def test_diff_users():
+    stay, leave, join = (dict(USERS_JSON[0], id=i) for i in (1, 2, 3))
+    old = index_users(GroupUser(u) for u in [stay, leave])
+    new = index_users(GroupUser(u) for u in [dict(stay, default_group="nat"), join])
+
+    diff = diff_users(old, new)
+    assert [u.id for u in diff.added] == [3]
+    assert [u.id for u in diff.removed] == [2]
+    assert [(u.id, changes) for u, changes in diff.changed] == [
+        (1, {"default_group": ("bng", "nat")})
+    ]
+    assert not diff_users(new, new)
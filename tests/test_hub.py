@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from phillip.abstract import EventBase
+from phillip.handlers import Handler
+from phillip.hub import FeedHub
+from phillip.osu.classes.web import GroupUser
+from tests.mocks.application import api_mock, events_mock, users_mock
+
+
+class RecordingHandler(Handler):
+    def __init__(self):
+        self.events = []
+        self.added = []
+
+    async def on_map_event(self, event: EventBase):
+        self.events.append(event)
+
+    async def on_group_added(self, user: GroupUser):
+        self.added.append(user)
+
+
+@pytest.fixture
+async def hub(event_loop):
+    h = FeedHub("whatsupslappers", loop=event_loop)
+    h.TESTING = True
+    yield h
+    await h.close()
+    await h.session.close()
+
+
+@pytest.mark.asyncio
+async def test_hub_mapfeed(hub: FeedHub):
+    osu, mania = RecordingHandler(), RecordingHandler()
+    first = hub.add_pipeline(handlers=[osu], modes=["osu"])
+    second = hub.add_pipeline(handlers=[mania], modes=["mania"])
+    hub.web.get_json = events_mock
+    hub.api.get_api = api_mock
+    events_mock.reset_mock()
+    api_mock.reset_mock()
+
+    await hub.check_map_events()
+    await hub.join()
+    await osu.dispatcher.join()
+    await mania.dispatcher.join()
+
+    assert events_mock.await_count == 1
+    assert api_mock.await_count == 1
+    assert len(osu.events) == 1
+    assert not mania.events
+    assert first.last_event_id == second.last_event_id == 2389105
+    assert hub.map_cursor(hub.pipelines) == {"since_id": 2389105}
+
+
+@pytest.mark.asyncio
+async def test_hub_isolation(hub: FeedHub):
+    class StuckHandler(Handler):
+        queue_size = 1
+
+        async def on_map_event(self, event: EventBase):
+            await asyncio.Event().wait()
+
+    stuck, working = StuckHandler(), RecordingHandler()
+    slow = hub.add_pipeline(handlers=[stuck])
+    hub.add_pipeline(handlers=[working])
+    hub.web.get_json = events_mock
+    hub.api.get_api = api_mock
+
+    events_mock.reset_mock()
+
+    # The stuck pipeline waits for room in its queue, the hub does not wait for it.
+    await asyncio.wait_for(hub.check_map_events(), 1)
+    await asyncio.sleep(0.01)
+    assert len(working.events) == 1
+    busy = hub._processing[("map", slow)]
+    assert not busy.done()
+
+    # The hub keeps polling, the busy pipeline is skipped until it catches up.
+    await asyncio.wait_for(hub.check_map_events(), 1)
+    assert events_mock.await_count == 2
+    assert hub._processing[("map", slow)] is busy
+    await asyncio.wait_for(hub.close(timeout=0), 1)
+
+
+@pytest.mark.asyncio
+async def test_hub_groupfeed(hub: FeedHub):
+    gmt, bn = RecordingHandler(), RecordingHandler()
+    hub.add_pipeline(handlers=[gmt]).group_ids = [4, 28]
+    hub.add_pipeline(handlers=[bn]).group_ids = [28]
+    hub.web.get_json = users_mock
+    users_mock.reset_mock()
+
+    await hub.check_role_change()
+    await hub.join()
+    await gmt.dispatcher.join()
+    await bn.dispatcher.join()
+
+    assert users_mock.await_count == 2
+    # Both groups return the same mocked user, so the GMT pipeline sees it twice.
+    assert len(gmt.added) == 2
+    assert len(bn.added) == 1
+
+
+@pytest.mark.asyncio
+async def test_hub_start(hub: FeedHub):
+    with pytest.raises(Exception):
+        hub.start()
+
+    hub.add_pipeline(handlers=[RecordingHandler()], disable_groupfeed=True)
+    hub.start()
+    assert len(hub.tasks) == 1
+    await hub.close()
+
+
+def test_hub_queue_depth(hub: FeedHub):
+    hub.add_pipeline(handlers=[RecordingHandler()])
+    hub.add_pipeline(handlers=[RecordingHandler()])
+
+    values = hub.metrics.snapshot()["phillip_handler_queue_depth"]["values"]
+    assert sorted(v["labels"]["pipeline"] for v in values) == ["0", "1"]
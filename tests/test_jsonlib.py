@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+from phillip import jsonlib
+from phillip.helper import json_island_span
+
+BACKENDS = [
+    name
+    for name, module in [("orjson", jsonlib.orjson), ("ujson", jsonlib.ujson)]
+    if module is not None
+] + ["json"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_agree(backend):
+    with open("tests/mocks/web_mocks.html", "rb") as f:
+        page = f.read()
+    start, end = json_island_span(page, "json-events")
+    expected = json.loads(page[start:end])
+
+    assert jsonlib.loads(page[start:end], backend=backend) == expected
+    assert jsonlib.loads(memoryview(page)[start:end], backend=backend) == expected
+    assert jsonlib.loads('{"a": [1, 2.5, null]}', backend=backend) == {
+        "a": [1, 2.5, None]
+    }
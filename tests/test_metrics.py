@@ -0,0 +1,99 @@
+import aiohttp
+import pytest
+
+from phillip.application import Phillip
+from phillip.handlers import Handler
+from phillip.metrics import MetricsRegistry
+from tests.mocks.application import api_mock, events_mock
+
+
+def test_counter_and_gauge():
+    metrics = MetricsRegistry()
+    metrics.counter("requests_total").inc(status=200)
+    metrics.counter("requests_total").inc(2, status=200)
+    metrics.gauge("depth").set(4, lane="events")
+
+    assert metrics.counter("requests_total").get(status=200) == 3
+    assert metrics.snapshot() == {
+        "requests_total": {
+            "type": "counter",
+            "values": [{"labels": {"status": "200"}, "value": 3.0}],
+        },
+        "depth": {
+            "type": "gauge",
+            "values": [{"labels": {"lane": "events"}, "value": 4}],
+        },
+    }
+    with pytest.raises(ValueError):
+        metrics.gauge("requests_total")
+
+
+def test_histogram_prometheus():
+    metrics = MetricsRegistry()
+    latency = metrics.histogram("latency_seconds", "Latency.", buckets=[0.1, 1])
+    latency.observe(0.05, client="web")
+    latency.observe(0.5, client="web")
+    latency.observe(5, client="web")
+    with latency.time(client="api"):
+        pass
+
+    assert latency.count(client="web") == 3
+    text = metrics.to_prometheus()
+    assert "# HELP latency_seconds Latency.\n# TYPE latency_seconds histogram\n" in text
+    assert 'latency_seconds_bucket{client="web",le="0.1"} 1.0\n' in text
+    assert 'latency_seconds_bucket{client="web",le="1.0"} 2.0\n' in text
+    assert 'latency_seconds_bucket{client="web",le="+Inf"} 3.0\n' in text
+    assert 'latency_seconds_sum{client="web"} 5.55\n' in text
+    assert 'latency_seconds_count{client="api"} 1.0\n' in text
+
+
+def test_collector():
+    metrics = MetricsRegistry()
+    metrics.add_collector(lambda: metrics.gauge("sampled").set(1))
+    assert metrics.snapshot()["sampled"]["values"][0]["value"] == 1
+
+
+@pytest.mark.asyncio
+async def test_serve(unused_tcp_port):
+    metrics = MetricsRegistry()
+    metrics.counter("up").inc()
+    runner = await metrics.serve(port=unused_tcp_port)
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{unused_tcp_port}/metrics") as r:
+                assert r.status == 200
+                assert "up 1.0" in await r.text()
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_app_metrics(event_loop):
+    class TestHandler(Handler):
+        async def on_map_event(self, event):
+            pass
+
+    client = Phillip("token", loop=event_loop)
+    client.TESTING = True
+    client.web.get_json = events_mock
+    client.api.get_api = api_mock
+    h = TestHandler()
+    client.add_handler(h)
+
+    await client.check_map_events()
+    await h.dispatcher.join()
+    await client.close()
+    await client.session.close()
+
+    snapshot = client.metrics.snapshot()
+    assert snapshot["phillip_poll_seconds"]["values"][0]["count"] == 1
+    assert snapshot["phillip_events_total"]["values"]
+    assert client.metrics.histogram("phillip_handler_seconds").count(
+        handler="TestHandler", callback="on_map_event"
+    )
+    assert snapshot["phillip_handler_queue_depth"]["values"] == [
+        {
+            "labels": {"handler": "TestHandler", "pipeline": "0", "index": "0"},
+            "value": 0,
+        }
+    ]
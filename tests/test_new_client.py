@@ -1,10 +1,15 @@
 import re
+from unittest.mock import AsyncMock
+from urllib.parse import parse_qs, urlparse
 
 import aiohttp
 import pytest
 from aioresponses import aioresponses
 from asyncio_throttle import Throttler
+from yarl import URL
 
+from phillip.filters import EventFilter
+from phillip.osu.new.abstract import NotModified, RateLimited
 from phillip.osu.new.web import WebClient
 from tests.mocks.new_client import html_text
 
@@ -27,3 +32,112 @@ async def test_get(client: WebClient):
         ("Bubbled", 4800816),
         ("Qualified", 4446810),
     ]
+
+
+@pytest.mark.asyncio
+async def test_get_json_fallback(client: WebClient):
+    client.get_raw = AsyncMock(return_value=b"<script id='json-users'>[1]</script>")
+    assert await client.get_json("https://osu.ppy.sh/groups/28", "json-users") == [1]
+
+
+@pytest.mark.asyncio
+async def test_conditional_digest(client: WebClient):
+    assert len(await client.get_users(28, conditional=True)) == 94
+    with pytest.raises(NotModified):
+        await client.get_users(28, conditional=True)
+
+    assert len([e async for e in client.get_events(conditional=True)]) == 18
+    assert len([e async for e in client.get_events(conditional=True)]) == 0
+
+    client.invalidate()
+    assert len(await client.get_users(28, conditional=True)) == 94
+
+
+@pytest.mark.asyncio
+async def test_conditional_etag():
+    session = aiohttp.ClientSession()
+    client = WebClient(session, Throttler(rate_limit=9999, period=60))
+    uri = client.groups_url + "28"
+    with aioresponses() as m:
+        m.get(uri, body=html_text, headers={"ETag": '"abc"'})
+        m.get(uri, status=304)
+        await client.get_users(28, conditional=True)
+        with pytest.raises(NotModified):
+            await client.get_users(28, conditional=True)
+
+        requests = m.requests[("GET", URL(uri))]
+        assert requests[1].kwargs["headers"] == {"If-None-Match": '"abc"'}
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_events_cursor(client: WebClient):
+    pages = {
+        "1": [{"id": 10, "type": "rank"}, {"id": 9, "type": "rank"}],
+        "2": [{"id": 9, "type": "rank"}, {"id": 8, "type": "rank"}],
+        "3": [{"id": 7, "type": "rank"}, {"id": 6, "type": "rank"}],
+    }
+
+    async def get_json(uri, json_tag, conditional=False):
+        return pages[parse_qs(urlparse(uri).query)["page"][0]]
+
+    client.get_json = AsyncMock(side_effect=get_json)
+    events = [e async for e in client.get_events(since_id=7)]
+    assert [e.id for e in events] == [8, 9, 10]
+    assert client.get_json.await_count == 3
+
+    client.get_json.reset_mock()
+    events = [e async for e in client.get_events(since_id=10)]
+    assert events == []
+    assert client.get_json.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_events_backlog(client: WebClient):
+    pages = {
+        "1": [{"id": 10, "type": "rank"}, {"id": 9, "type": "rank"}],
+        "2": [{"id": 8, "type": "rank"}, {"id": 7, "type": "rank"}],
+        "3": [{"id": 6, "type": "rank"}, {"id": 5, "type": "rank"}],
+    }
+
+    async def get_json(uri, json_tag, conditional=False):
+        return pages[parse_qs(urlparse(uri).query)["page"][0]]
+
+    client.get_json = AsyncMock(side_effect=get_json)
+    events = [e async for e in client.get_events(since_id=5, max_pages=2)]
+    assert [e.id for e in events] == [7, 8, 9, 10]
+    assert client.metrics.snapshot()["phillip_event_backlog_total"]
+
+    # The cursor moved past the burst, the older page is still fetched.
+    events = [e async for e in client.get_events(since_id=10, max_pages=2)]
+    assert [e.id for e in events] == [6]
+    events = [e async for e in client.get_events(since_id=10, max_pages=2)]
+    assert events == []
+    assert client.get_json.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_events_filter(client: WebClient):
+    # The qualify event is still fetched, so the nomination is known to have qualified the map.
+    events = [
+        e async for e in client.get_events(event_filter=EventFilter(user_ids=[33599]))
+    ]
+    assert [(e.beatmapset.id, e.event_type) for e in events] == [(1264403, "Qualified")]
+    assert client.newest_event_id == 2389105
+
+    client.get_json = AsyncMock(return_value=[])
+    [e async for e in client.get_events(event_filter=EventFilter(types=["rank"]))]
+    types = parse_qs(urlparse(client.get_json.await_args[0][0]).query)["types[]"]
+    assert types == ["rank"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited():
+    session = aiohttp.ClientSession()
+    client = WebClient(session, Throttler(rate_limit=9999, period=60))
+    with aioresponses() as m:
+        m.get(client.groups_url + "28", status=429, headers={"Retry-After": "30"})
+        with pytest.raises(RateLimited) as exc_info:
+            await client.get_users(28)
+    await session.close()
+    assert exc_info.value.retry_after == 30
@@ -21,3 +21,45 @@ async def client(event_loop):
 @pytest.mark.asyncio
 async def test_get_maps(client: APIClient):
     assert len(await client.get_beatmaps(s=1068991)) == 1
+
+
+@pytest.mark.asyncio
+async def test_cached(client: APIClient):
+    # Only one response is mocked, the second call must come from the cache.
+    first = await client.get_beatmaps(s=1068991)
+    second = await client.get_beatmaps(s=1068991)
+    assert len(first) == len(second) == 1
+    assert client.cache.hits == 1
+    assert client.cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_fresh():
+    session = aiohttp.ClientSession()
+    client = APIClient(session, "whatsupslappers")
+    with aioresponses() as m:
+        pattern = re.compile(r"^http[s]://osu\.ppy\.sh.+$")
+        m.get(pattern, payload=MAP_JSONS["1068991"])
+        m.get(pattern, payload=[])
+        await client.get_beatmaps(s=1068991)
+        assert await client.get_beatmaps(s=1068991, fresh=True) == []
+        # The fresh response replaced the cached one.
+        assert await client.get_beatmaps(s=1068991) == []
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_resolve_users():
+    session = aiohttp.ClientSession()
+    client = APIClient(session, "whatsupslappers")
+    with aioresponses() as m:
+        pattern = re.compile(r"^http[s]://osu\.ppy\.sh/api/get_user.+$")
+        m.get(pattern, payload=[{"user_id": "2", "username": "peppy"}])
+        users = await client.resolve_users(
+            [1, 2, 2, 1], known={1: {"id": 1, "username": "BanchoBot"}}
+        )
+        assert len(m.requests) == 1
+    await session.close()
+
+    assert users[1]["username"] == "BanchoBot"
+    assert users[2]["username"] == "peppy"
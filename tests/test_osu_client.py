@@ -0,0 +1,140 @@
+from unittest.mock import AsyncMock
+
+import aiohttp
+import pytest
+
+from phillip.application import Phillip
+from phillip.hub import FeedHub
+from phillip.osu.client import OsuClient
+from phillip.osu.new.api import APIClient as APIClientV2
+from phillip.osu.new.web import WebClient
+from phillip.osu.old.api import APIClient as APIClientV1
+from tests.mocks.application import EVENTS_JSON, USERS_JSON
+
+
+@pytest.fixture
+async def client(event_loop):
+    session = aiohttp.ClientSession()
+    web = WebClient(session)
+    api_v2 = APIClientV2(session, 1, "secret", "", "token", "refresh")
+    api = APIClientV1(session, "key")
+    yield OsuClient(web, api=api, api_v2=api_v2)
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_prefers_v2(client: OsuClient):
+    client.api_v2.get_json = AsyncMock(return_value=EVENTS_JSON)
+    client.web.get_json = AsyncMock(return_value=EVENTS_JSON)
+
+    events = [e async for e in client.get_events()]
+    assert [e.id for e in events] == [2389105]
+    assert client.newest_event_id == 2389105
+    client.api_v2.get_json.assert_awaited_once()
+    client.web.get_json.assert_not_awaited()
+    assert client.stats[("api_v2", "events")].latency is not None
+
+
+@pytest.mark.asyncio
+async def test_failover(client: OsuClient):
+    client.api_v2.get_json = AsyncMock(side_effect=aiohttp.ClientError)
+    client.web.get_json = AsyncMock(return_value=EVENTS_JSON)
+    # v2 used to be the fastest, it keeps being tried first while healthy.
+    client._record("api_v2", "events", 0.1, True)
+    client._record("web", "events", 1.0, True)
+
+    for _ in range(4):
+        assert len([e async for e in client.get_events()]) == 1
+    assert client.api_v2.get_json.await_count == 4
+    assert client.stats[("api_v2", "events")].error_rate > client.max_error_rate
+
+    # Unhealthy now, scraping goes first until the cooldown is over.
+    assert client.ranked("events", ["api_v2", "web"]) == ["web", "api_v2"]
+    [e async for e in client.get_events()]
+    assert client.api_v2.get_json.await_count == 4
+
+    client.cooldown = 0
+    assert client.ranked("events", ["api_v2", "web"]) == ["api_v2", "web"]
+
+
+@pytest.mark.asyncio
+async def test_html_only_operations(client: OsuClient):
+    client.api_v2.get_json = AsyncMock(side_effect=aiohttp.ClientError)
+    client.web.get_json = AsyncMock(return_value=USERS_JSON)
+
+    assert len(await client.get_users(28)) == 1
+    client.api_v2.get_json.assert_not_awaited()
+    assert ("api_v2", "groups") not in client.stats
+
+
+def test_failing_source_ranks_last(client: OsuClient):
+    client._record("api_v2", "events", 0.1, False)
+    client._record("web", "events", 1.0, True)
+    assert client.healthy("api_v2", "events")
+    assert client.ranked("events", ["api_v2", "web"]) == ["web", "api_v2"]
+
+
+@pytest.mark.asyncio
+async def test_fastest_source(client: OsuClient):
+    client.api_v2.resolve_users = AsyncMock(return_value={1: {"id": 1}})
+    client.api.resolve_users = AsyncMock(return_value={1: {"id": 1}})
+    client._record("api_v2", "users", 2.0, True)
+    client._record("api_v1", "users", 0.1, True)
+
+    assert await client.resolve_users([1]) == {1: {"id": 1}}
+    client.api.resolve_users.assert_awaited_once()
+    client.api_v2.resolve_users.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_all_sources_fail(client: OsuClient):
+    client.api.get_beatmaps = AsyncMock(side_effect=ValueError("down"))
+    with pytest.raises(ValueError):
+        await client.get_beatmaps(s=1)
+
+    client.sources.pop("api_v1")
+    with pytest.raises(Exception, match="No source available"):
+        await client.get_beatmaps(s=1)
+
+
+@pytest.mark.asyncio
+async def test_app_uses_facade(event_loop):
+    session = aiohttp.ClientSession()
+    api_v2 = APIClientV2(session, 1, "secret", "", "token", "refresh")
+    app = Phillip("key", loop=event_loop, session=session, api_v2=api_v2)
+    assert isinstance(app.web, OsuClient)
+    assert app.web.sources["api_v2"] is api_v2
+    assert app.map_poll.scheduler is app.web.web.scheduler
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_app_users_and_close(event_loop):
+    session = aiohttp.ClientSession()
+    api_v2 = APIClientV2(session, 1, "secret", "", "token", "refresh")
+    api_v2.resolve_users = AsyncMock(return_value={1: {"id": 1}})
+    api_v2.close = AsyncMock()
+    app = Phillip("key", loop=event_loop, session=session, api_v2=api_v2)
+    app.api.resolve_users = AsyncMock()
+
+    # User lookups go through the facade and its source ranking.
+    assert await app.resolve_users([1]) == {1: {"id": 1}}
+    app.api.resolve_users.assert_not_awaited()
+    assert ("api_v2", "users") in app.web.stats
+
+    await app.close()
+    api_v2.close.assert_awaited_once()
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_hub_closes_api_v2(event_loop):
+    session = aiohttp.ClientSession()
+    api_v2 = APIClientV2(session, 1, "secret", "", "token", "refresh")
+    api_v2.close = AsyncMock()
+    hub = FeedHub("key", loop=event_loop, session=session, api_v2=api_v2)
+    hub.add_pipeline(webhook_url="yes")
+
+    await hub.close()
+    api_v2.close.assert_awaited_once()
+    await session.close()
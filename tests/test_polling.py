@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from phillip.osu.new.scheduler import RequestScheduler
+from phillip.polling import PollScheduler
+
+
+def test_backoff():
+    poll = PollScheduler(300, 60, 900, jitter=0)
+    poll.record(0)
+    assert poll.next_delay() == 600
+    poll.record(0)
+    poll.record(0)
+    assert poll.next_delay() == 900
+
+    poll.record(3)
+    assert poll.next_delay() == 60
+
+
+def test_budget_floor():
+    scheduler = RequestScheduler(rate_limit=2, period=60)
+    poll = PollScheduler(
+        300, 60, 3600, jitter=0, requests_per_poll=5, scheduler=scheduler
+    )
+    poll.record(1)
+    assert poll.next_delay() == 150
+
+
+def test_retry_after_and_jitter():
+    poll = PollScheduler(100, 60, 900, jitter=0.1)
+    for _ in range(20):
+        assert 90 <= poll.next_delay() <= 110
+
+    poll.retry_after(500)
+    assert poll.next_delay() == 500
+    assert poll.next_poll > datetime.utcnow()
+    assert poll.next_delay() <= 110
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from phillip.osu.new.scheduler import RequestScheduler
+
+
+@pytest.mark.asyncio
+async def test_fair_lanes():
+    scheduler = RequestScheduler(rate_limit=1, period=0.02)
+    order = []
+
+    async def request(lane: str, name: str):
+        await scheduler.acquire(lane)
+        order.append(name)
+
+    tasks = [
+        asyncio.ensure_future(request("groups", name)) for name in ["g1", "g2", "g3"]
+    ]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.ensure_future(request("events", "e1")))
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth == 3
+    assert scheduler.lane_depths() == {"groups": 2, "events": 1}
+
+    await asyncio.wait_for(asyncio.gather(*tasks), 1)
+    assert order == ["g1", "e1", "g2", "g3"]
+    assert scheduler.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter():
+    scheduler = RequestScheduler(rate_limit=1, period=0.02)
+    await scheduler.acquire()
+    waiting = asyncio.ensure_future(scheduler.acquire())
+    await asyncio.sleep(0)
+    waiting.cancel()
+
+    await asyncio.wait_for(scheduler.acquire(), 1)
+    assert scheduler.queue_depth == 0
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aioresponses import aioresponses
+from yarl import URL
+
+from phillip.osu.new.api import APIClient
+from phillip.osu.new.token import TokenManager
+
+TOKEN_URL = URL(TokenManager.TOKEN_URL)
+TOKEN_JSON = {"access_token": "new", "refresh_token": "refresh2", "expires_in": 86400}
+
+
+@pytest.mark.asyncio
+async def test_single_flight(tmp_path):
+    path = str(tmp_path / "token.json")
+    async with aiohttp.ClientSession() as session:
+        with aioresponses() as m:
+            m.post(TokenManager.TOKEN_URL, payload=TOKEN_JSON)
+            tokens = TokenManager(session, 1, "secret", "old", "refresh", 0, path)
+            assert (
+                await asyncio.gather(*(tokens.get() for _ in range(5))) == ["new"] * 5
+            )
+
+            calls = m.requests[("POST", TOKEN_URL)]
+            assert len(calls) == 1
+            assert calls[0].kwargs["data"]["refresh_token"] == "refresh"
+            assert tokens.refresh_token == "refresh2"
+            assert tokens.expires_at > time.time() + 86000
+            await tokens.close()
+
+        # The saved pair is used as is after a restart.
+        restarted = TokenManager(session, 1, "secret", "old", "refresh", path=path)
+        assert await restarted.get() == "new"
+        assert restarted.refreshes == 0
+        await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_proactive_refresh():
+    async with aiohttp.ClientSession() as session:
+        with aioresponses() as m:
+            m.post(TokenManager.TOKEN_URL, payload=TOKEN_JSON)
+            tokens = TokenManager(
+                session, 1, "secret", "old", "refresh", time.time() + 0.05, margin=0
+            )
+            assert await tokens.get() == "old"
+            await asyncio.sleep(0.1)
+            assert tokens.access_token == "new"
+            assert tokens.refreshes == 1
+            await tokens.close()
+
+
+@pytest.mark.asyncio
+async def test_client_retry_cap():
+    url = "https://osu.ppy.sh/api/v2/users"
+    async with aiohttp.ClientSession() as session:
+        client = APIClient(session, 1, "secret", "", "old", "refresh")
+        with aioresponses() as m:
+            m.post(TokenManager.TOKEN_URL, payload=TOKEN_JSON, repeat=True)
+            m.get(url, status=401)
+            m.get(url, payload={"users": []})
+            assert await client._fetch("GET", url) == {"users": []}
+            assert client.tokens.refreshes == 1
+
+            m.get(url, status=401, repeat=True)
+            with pytest.raises(aiohttp.ClientResponseError):
+                await client._fetch("GET", url)
+            assert client.tokens.refreshes == 2
+        await client.close()